@@ -1,84 +1,538 @@
 """
-NodeODM_main.py: 
+NodeODM_main.py: Process image sets directly on several NodeODM nodes at once, picking the least loaded node for each,
+or split one image set into overlapping submodels processed on different nodes
 
-Author: Jonas 
-Last Updated: 2025-06-12
+Author: Jonas
+Last Updated: 2026-10-18
 """
 
 # imports
-import os, sys, glob, time
+import os, sys, glob, time, json, argparse, asyncio, concurrent.futures
 import WebODM_main
+import WebODM_monitor
+import WebODM_split
+import WebODM_webhook
 from pyodm import Node
 from pyodm.types import TaskStatus
+from pyodm.exceptions import OdmError, NodeServerError, NodeConnectionError
 
 # variables
+final_statuses = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED)
+default_options = {'fast-orthophoto': True}
+default_port = 3000
+info_timeout = 5 # seconds a node has to answer when selecting a node, so an unreachable node does not hold up every task
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Image directories, one task each
+    parser.add_argument("image_files_dirs", help="Directory paths to folders containing the images, each processed as its own task", nargs="+")
+
+    # Nodes
+    parser.add_argument("-n", "--nodes", help="NodeODM nodes to process on, given as <host>[:<port>]", nargs="+", default=[f"localhost:{default_port}"])
+
+    # Options file (default is fast orthophoto)
+    parser.add_argument("-op", "--options_file", help="Path to options JSON file, as used with WebODM", type=str)
+
+    # Output directory
+    parser.add_argument("-od", "--output_dir", help="Directory path to folder where output files will be placed", type=str, default=os.path.join("output", "NodeODM"))
+
+    # Concurrency
+    parser.add_argument("-u", "--uploads", help="Maximum number of image sets uploaded at the same time", type=int, default=2)
+    parser.add_argument("-d", "--downloads", help="Maximum number of tasks downloaded at the same time", type=int, default=2)
+
+    # Upload settings
+    parser.add_argument("-pu", "--parallel_uploads", help="Number of images uploaded at the same time per task", type=int, default=10)
+
+    # Retries on other nodes
+    parser.add_argument("-r", "--retries", help="Number of times a failed task is sent again, to another node if there is one", type=int, default=1)
+
+    # Client-side split-merge
+    parser.add_argument("-sm", "--split_merge", help="Split each image set into this many overlapping submodels by position, each processed on its own node (default is one per node)", type=int, nargs="?", const=0)
+    parser.add_argument("-so", "--split_overlap", help="Distance neighbouring submodels overlap by in meters (default is one image footprint)", type=float)
+
+    # Webhook instead of polling
+    parser.add_argument("-wh", "--webhook", help="Address the nodes reach this machine at, as <host>[:<port>], to be called back when tasks finish instead of polling", type=str)
+
+    # Poll interval
+    parser.add_argument("-pi", "--poll_interval", help="Seconds between polls of a task (default 3, or 60 as a fallback with --webhook)", type=float)
+
+    return parser
+
 def get_images(dir_path):
     """
     Gets all image paths from a given directory path
-    
+
     :param dir_path: directory path to images
     :return images: list of image paths
     """
-    
+
     # list of file image paths
-    images = list() 
+    images = list()
     min_num_images = 2
-    
+
     # allowed file types
-    file_types = ("*.jpg", "*.jpeg", "*.JPG", "*.JPEG") 
-    
+    file_types = ("*.jpg", "*.jpeg", "*.JPG", "*.JPEG")
+
     # check if valid directory path
     if not os.path.isdir(dir_path):
         WebODM_main.print_error('Invalid Path')
-        
+
     # get all image paths for given directory path and allowed file types
     for type in file_types:
         images.extend(glob.glob(os.path.join(dir_path, type)))
-        
+
     # check if enough images found/provided
     if len(images) < min_num_images:
         WebODM_main.print_error(f'Less than {min_num_images} images found')
-        
+
     # return image paths
     return images
 
+def get_options(options_path):
+    """
+    Reads an options file, either a WebODM options file (list of name and value) or a dictionary of name: value
+
+    :param options_path: path to options file, None for the default options
+    :return: options (dictionary of name: value)
+    """
+
+    if options_path is None:
+        return dict(default_options)
+
+    options = json.loads(WebODM_main.get_options(options_path))
+
+    return {o['name']: o['value'] for o in options} if isinstance(options, list) else options
+
+def get_nodes(addresses):
+    """
+    Creates the nodes given as <host>[:<port>]
+
+    :param addresses: addresses of nodes (list of str)
+    :return: nodes (list of pyodm Node)
+    """
+
+    # var
+    nodes = list()
+
+    for address in addresses:
+        host, separator, port = address.rpartition(":")
+        if not separator:
+            host, port = address, default_port
+        elif not port.isdigit():
+            WebODM_main.print_error(f"Invalid node {address}, must be given as <host>[:<port>]")
+        nodes.append(Node(host, int(port)))
+
+    return nodes
+
+def get_node_label(node):
+    """
+    Gets the address of a node, used to name it
+
+    :param node: node (pyodm Node)
+    :return: label (ex. 'localhost:3000')
+    """
+
+    return f"{node.host}:{node.port}"
+
+def score_node(info, image_count, assigned=0):
+    """
+    Scores how suitable a node is for a new task, lower is better
+
+    :param info: node information (pyodm NodeInfo)
+    :param image_count: number of images of the task
+    :param assigned: number of tasks being sent to this node that its queue count does not show yet
+    :return: score (float), None if the node cannot take the task
+    """
+
+    # node must accept this many images
+    if info.max_images and image_count > info.max_images:
+        return None
+
+    # tasks per processing slot, a node running fewer tasks than it can run at once scores below 1
+    score = (info.task_queue_count + assigned) / max(1, info.max_parallel_tasks or 1)
+
+    # prefer nodes with more room for the task
+    if info.max_images:
+        score += image_count / info.max_images
+
+    return score
+
+def get_node_infos(nodes, exclude=()):
+    """
+    Asks every node for its queue and capacity at the same time, giving each a short timeout
+
+    :param nodes: nodes (list of pyodm Node)
+    :param exclude: labels of nodes not to ask (ex. nodes a task already failed on)
+    :return: info of each node that answered (dictionary of label: pyodm NodeInfo)
+    """
+
+    # var
+    nodes = [n for n in nodes if get_node_label(n) not in exclude]
+    infos = dict()
+
+    def get_info(node):
+        # a copy of the node, so uploads and downloads keep their longer timeout
+        try:
+            return Node(node.host, node.port, node.token, timeout=info_timeout).info()
+        except OdmError: # offline
+            return None
+
+    if not nodes:
+        return infos
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+        for node, info in zip(nodes, executor.map(get_info, nodes)):
+            if info is not None:
+                infos[get_node_label(node)] = info
+
+    return infos
+
+def select_node(nodes, infos, image_count, assigned):
+    """
+    Selects the least loaded node that can take a task
+
+    :param nodes: nodes (list of pyodm Node)
+    :param infos: info of each node that answered (dictionary from get_node_infos)
+    :param image_count: number of images of the task
+    :param assigned: tasks being sent to each node by this process (dictionary of label: count), updated with the selected node
+    :return: node (pyodm Node), None if no node can take the task
+    """
+
+    # var
+    best_node = None
+    best_score = None
+
+    # score every node that answered
+    for node in nodes:
+        label = get_node_label(node)
+        if label not in infos:
+            continue
+        score = score_node(infos[label], image_count, assigned.get(label, 0))
+        if score is not None and (best_score is None or score < best_score):
+            best_node, best_score = node, score
+
+    if best_node is not None:
+        label = get_node_label(best_node)
+        assigned[label] = assigned.get(label, 0) + 1
+
+    return best_node
+
+def get_upload_progress(name):
+    """
+    Creates an upload progress callback that prints every 10 percent
+
+    :param name: name of task
+    :return: function called by pyodm with the upload progress percentage
+    """
+
+    # var
+    printed = [-10]
+
+    def print_progress(percentage):
+        if percentage >= printed[0] + 10 or percentage >= 100 > printed[0]:
+            printed[0] = percentage
+            print(f"[{name}] Uploading . . . ({percentage:.0f}%)")
+
+    return print_progress
+
+async def wait_for_task(name, task, request_limit, listener=None, webhook_key=None, poll_interval=3):
+    """
+    Waits for a task to reach a final status. With a webhook listener the task is only fetched when the node calls
+    back, or every poll_interval seconds in case the callback is lost
+
+    :param name: name of task
+    :param task: task (pyodm Task)
+    :param request_limit: semaphore shared by all tasks, limiting requests in flight
+    :param listener: webhook listener (WebhookListener) the task was created with, or None to poll
+    :param webhook_key: key of the task's callback URL
+    :param poll_interval: seconds between polls
+    :return: final task info (pyodm TaskInfo)
+    """
+
+    # var
+    status = None
+    failures = 0 # consecutive failed polls
+
+    while True:
+        # a poll that fails for a moment (ex. the node restarting) is retried in place, the task keeps running
+        try:
+            async with request_limit:
+                task_info = await asyncio.to_thread(task.info)
+            failures = 0
+        except (NodeServerError, NodeConnectionError) as e:
+            failures += 1
+            if failures > WebODM_monitor.max_failures:
+                raise
+            delay = min(60, poll_interval * 2 ** (failures - 1))
+            print(f"[{name}] Request failed ({e}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if task_info.status != status:
+            status = task_info.status
+            print(f"[{name}] {status.name} ({WebODM_monitor.format_processing_time(task_info.processing_time)})")
+
+        if task_info.status in final_statuses:
+            return task_info
+
+        if listener:
+            await listener.wait_async(webhook_key, poll_interval)
+        else:
+            await asyncio.sleep(poll_interval)
+
+async def run_task(name, images, nodes, options, limits, assigned, asset_dir, parallel_uploads=10, listener=None,
+                   poll_interval=3, exclude=(), remove_failed=False):
+    """
+    Uploads, processes and downloads one image set on the least loaded node. Each stage waits
+    for a slot of its own limit, so one image set can upload while others are processing or downloading
+
+    :param name: name of task
+    :param images: paths to images (and GCP file)
+    :param nodes: nodes (list of pyodm Node)
+    :param options: options (dictionary of name: value)
+    :param limits: semaphores of each stage (dictionary with upload, download and request)
+    :param assigned: tasks being sent to each node by this process (dictionary of label: count)
+    :param asset_dir: directory the assets are extracted to
+    :param parallel_uploads: number of images uploaded at the same time
+    :param listener: webhook listener (WebhookListener), or None to poll
+    :param poll_interval: seconds between polls
+    :param exclude: labels of nodes not to use
+    :param remove_failed: cancel and remove the task from its node if it fails (ex. because it is sent again elsewhere)
+    :return: summary of task (dictionary)
+    """
+
+    # var
+    task = None
+    summary = {'name': name, 'images': len(images), 'node': None, 'uuid': None, 'status': None, 'stage': 'upload',
+               'upload_time': None, 'processing_time': None, 'download_time': None, 'error': None}
+    webhook_key, webhook_url = listener.register() if listener else (None, None)
+
+    try:
+        # pick node and upload, the task is only counted in the node's queue once created
+        async with limits['upload']:
+            # nodes are asked at the same time, the selection itself runs on the event loop so it needs no lock
+            infos = await asyncio.to_thread(get_node_infos, nodes, exclude)
+            node = select_node(nodes, infos, len(images), assigned)
+            if node is None:
+                raise OdmError(f"No node can take {len(images)} images")
+            summary['node'] = get_node_label(node)
+            print(f"[{name}] Uploading {len(images)} files to {summary['node']}")
+
+            start = time.time()
+            try:
+                task = await asyncio.to_thread(node.create_task, images, options, name=name, progress_callback=get_upload_progress(name),
+                                               webhook=webhook_url, parallel_uploads=parallel_uploads)
+            finally:
+                assigned[summary['node']] -= 1
+            summary.update(uuid=task.uuid, upload_time=round(time.time() - start, 1))
+
+        # processing
+        summary['stage'] = 'processing'
+        task_info = await wait_for_task(name, task, limits['request'], listener, webhook_key, poll_interval)
+        summary.update(status=task_info.status.name,
+                       processing_time=WebODM_monitor.format_processing_time(task_info.processing_time))
+        if task_info.status != TaskStatus.COMPLETED:
+            raise OdmError(f"Task {task_info.status.name.lower()} ({task_info.last_error})")
+
+        # download all.zip in parallel chunks and extract it
+        summary['stage'] = 'download'
+        async with limits['download']:
+            start = time.time()
+            await asyncio.to_thread(task.download_assets, asset_dir)
+            summary['download_time'] = round(time.time() - start, 1)
+        print(f"[{name}] Assets downloaded to {asset_dir}")
+
+        summary['stage'] = 'done'
+    except Exception as e: # one failed task does not stop the others
+        summary['error'] = str(e)
+        print(f"[{name}] Failed during {summary['stage']} ({e})")
+
+        # an abandoned task would keep its node busy and hold on to its images
+        if remove_failed and task is not None:
+            try:
+                await asyncio.to_thread(task.remove)
+                print(f"[{name}] Removed task {task.uuid} from {summary['node']}")
+            except OdmError as remove_error:
+                print(f"[{name}] Unable to remove task {task.uuid} from {summary['node']} ({remove_error})")
+    finally:
+        if listener:
+            listener.release(webhook_key)
+
+    return summary
+
+async def run_task_with_retries(name, images, nodes, options, limits, assigned, asset_dir, retries=1, **kwargs):
+    """
+    Runs a task, sending it again to a node it has not failed on yet if it fails (or to any node once it failed on all of them)
+
+    :param name: name of task
+    :param images: paths to images (and GCP file)
+    :param nodes: nodes (list of pyodm Node)
+    :param options: options (dictionary of name: value)
+    :param limits: semaphores of each stage (dictionary with upload, download and request)
+    :param assigned: tasks being sent to each node by this process (dictionary of label: count)
+    :param asset_dir: directory the assets are extracted to
+    :param retries: number of times the task is sent again
+    :param kwargs: arguments passed to run_task
+    :return: summary of the last attempt, with attempts and failed_nodes (dictionary)
+    """
+
+    # var
+    failed_nodes = list()
+
+    for attempt in range(retries + 1):
+        exclude = failed_nodes if len(set(failed_nodes)) < len(nodes) else ()
+        summary = await run_task(name, images, nodes, options, limits, assigned, asset_dir, exclude=exclude,
+                                 remove_failed=attempt < retries, **kwargs)
+
+        # done, or no node could take it
+        if summary['error'] is None or summary['node'] is None:
+            break
+
+        failed_nodes.append(summary['node'])
+        if attempt < retries:
+            print(f"[{name}] Sending again, attempt {attempt + 2} of {retries + 1}")
+
+    summary.update(attempts=attempt + 1, failed_nodes=failed_nodes)
+
+    return summary
+
+async def run_split(name, images, nodes, options, limits, assigned, output_dir, submodels, overlap=None, retries=1, **kwargs):
+    """
+    Splits an image set into overlapping submodels by position and processes every submodel at the same time,
+    each on the least loaded node. The assets of each submodel are extracted to
+    <output_dir>/<name>/submodels/submodel_<number>, and submodels.json lists their images, nodes and status
+
+    :param name: name of image set
+    :param images: paths to images
+    :param nodes: nodes (list of pyodm Node)
+    :param options: options (dictionary of name: value)
+    :param limits: semaphores of each stage (dictionary with upload, download and request)
+    :param assigned: tasks being sent to each node by this process (dictionary of label: count)
+    :param output_dir: directory of where the files should be downloaded
+    :param submodels: number of submodels
+    :param overlap: distance neighbouring submodels overlap by (meters), None to work it out from the images
+    :param retries: number of times a failed submodel is sent again
+    :param kwargs: arguments passed to run_task
+    :return: summary of each submodel (list of dictionaries)
+    """
+
+    # var
+    dataset_dir = os.path.join(output_dir, name)
+
+    # partition
+    try:
+        partitions, overlap = await asyncio.to_thread(WebODM_split.partition_images, images, submodels, overlap)
+    except ValueError as e:
+        print(f"[{name}] Cannot split ({e})")
+        return [{'name': name, 'images': len(images), 'node': None, 'uuid': None, 'status': None, 'stage': 'split',
+                 'upload_time': None, 'processing_time': None, 'download_time': None, 'error': str(e)}]
+    partitions = [p for p in partitions if p]
+    print(f"[{name}] Split into {len(partitions)} submodels of {', '.join(str(len(p)) for p in partitions)} images, overlapping by {overlap} m")
+
+    # process
+    summaries = await asyncio.gather(*[run_task_with_retries(f"{name}/submodel_{i:04d}", partition, nodes, options, limits, assigned,
+                                                             os.path.join(dataset_dir, "submodels", f"submodel_{i:04d}"), retries, **kwargs)
+                                       for i, partition in enumerate(partitions)])
+
+    # index of the output tree
+    os.makedirs(dataset_dir, exist_ok=True)
+    with open(os.path.join(dataset_dir, "submodels.json"), 'w') as file:
+        json.dump({'name': name, 'images': len(images), 'split_overlap': overlap,
+                   'submodels': [dict(s, directory=os.path.join("submodels", f"submodel_{i:04d}"), image_names=[os.path.basename(p) for p in partition])
+                                 for i, (s, partition) in enumerate(zip(summaries, partitions))]}, file, indent=4)
+
+    return summaries
+
+async def run_tasks(datasets, nodes, options, uploads=2, downloads=2, output_dir=os.path.join("output", "NodeODM"),
+                    retries=1, submodels=None, overlap=None, **kwargs):
+    """
+    Runs every image set on the nodes at the same time, as one task each or split into submodels
+
+    :param datasets: image sets (list of (name, image paths) tuples)
+    :param nodes: nodes (list of pyodm Node)
+    :param options: options (dictionary of name: value)
+    :param uploads: maximum number of image sets uploaded at the same time
+    :param downloads: maximum number of tasks downloaded at the same time
+    :param output_dir: directory of where the files should be downloaded
+    :param retries: number of times a failed task is sent again
+    :param submodels: number of submodels each image set is split into, None to not split
+    :param overlap: distance neighbouring submodels overlap by (meters), None to work it out from the images
+    :param kwargs: arguments passed to run_task (parallel_uploads, listener, poll_interval)
+    :return: summary of each task (list of dictionaries)
+    """
+
+    # enough threads that uploads and downloads never hold up the status requests
+    max_requests = 16
+    asyncio.get_running_loop().set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=uploads + downloads + max_requests))
+
+    # var
+    limits = {'upload': asyncio.Semaphore(uploads),
+              'download': asyncio.Semaphore(downloads),
+              'request': asyncio.Semaphore(max_requests)}
+    assigned = dict()
+
+    if submodels:
+        results = await asyncio.gather(*[run_split(name, images, nodes, options, limits, assigned, output_dir, submodels, overlap, retries, **kwargs)
+                                         for name, images in datasets])
+        return [summary for summaries in results for summary in summaries]
+
+    return await asyncio.gather(*[run_task_with_retries(name, images, nodes, options, limits, assigned, os.path.join(output_dir, name), retries, **kwargs)
+                                  for name, images in datasets])
+
+def print_summary(summaries):
+    """
+    Prints the summary of each task to the console
+
+    :param summaries: summary of each task (list of dictionaries)
+    :return: N/A
+    """
+
+    print("\nSummary:")
+    for s in summaries:
+        if s['error']:
+            print(f"\t* {s['name']}: failed during {s['stage']} on {s['node']} ({s['error']})"
+                  + (f", after {s['attempts']} attempts" if s.get('attempts', 1) > 1 else ""))
+        else:
+            print(f"\t* {s['name']}: {s['status']} on {s['node']} (upload {s['upload_time']}s, processing {s['processing_time']}, "
+                  f"download {s['download_time']}s)")
 
 if __name__ == '__main__':
-    
-    if len(sys.argv) < 2:
-        WebODM_main.print_error('Invalid number of arguments')
-    
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
     # var
-    dir_path = sys.argv[1] # path to images
-    options = {
-        'fast-orthophoto': True
-    }
-
-    # create node
-    n = Node('localhost', 3000)
-    print('Node connected')
-    
-    # get images
-    images = get_images(dir_path)
-    print('Images retrieved')
-
-    # create task
-    task = n.create_task(images, options)
-    print('Task created')
-
-    # wait for the task to be completed
-    task_info = task.info()
-    while task_info.status != TaskStatus.COMPLETED:
-        print(f'Task processing . . .  ({task_info.status})')
-        task_info = task.info() # reretrieve info
-        time.sleep(3)
-
-    # Task completed!
-    print('Task Completed')
-    
-    # download assets and list first 2
-    os.listdir(task.download_assets("output/NodeODM"))[0:2]
-    print('Assets downloaded')
-
-    # Note, this is essentially just the first script run in the documentation
-    # More features and error handling to come
\ No newline at end of file
+    poll_interval = args.poll_interval or (WebODM_webhook.fallback_interval if args.webhook else 3)
+    options = get_options(args.options_file)
+
+    # create nodes
+    nodes = get_nodes(args.nodes)
+
+    # get images, each directory is one task named after it
+    datasets = [(os.path.basename(os.path.normpath(d)), get_images(d)) for d in args.image_files_dirs]
+    if len({name for name, images in datasets}) < len(datasets):
+        WebODM_main.print_error('Image directories must have different names')
+    print(f'Images retrieved ({sum(len(images) for name, images in datasets)} in {len(datasets)} sets)')
+
+    # listen for the nodes to call back when tasks finish
+    listener = WebODM_webhook.start_listener(args.webhook) if args.webhook else None
+
+    # one submodel per node unless given
+    submodels = (args.split_merge or len(nodes)) if args.split_merge is not None else None
+
+    # process every image set
+    summaries = asyncio.run(run_tasks(datasets, nodes, options, args.uploads, args.downloads, args.output_dir, args.retries,
+                                      submodels, args.split_overlap, parallel_uploads=args.parallel_uploads,
+                                      listener=listener, poll_interval=poll_interval))
+
+    print_summary(summaries)
+    sys.exit(0 if all(s['error'] is None for s in summaries) else 1)
@@ -0,0 +1,329 @@
+"""
+WebODM_batch.py: Process a manifest of datasets, overlapping uploads, processing and downloads
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import argparse, asyncio, csv, json, os, sys, time, concurrent.futures # standard libraries
+import status_codes
+import WebODM_download
+import WebODM_main
+import WebODM_metrics
+import WebODM_monitor
+import WebODM_processing_nodes
+import WebODM_upload
+import WebODM_variants
+import WebODM_watch
+import WebODM_webhook
+
+# global variables
+
+required_fields = ("project_name", "options_file", "image_files_dir")
+
+# functions
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Manifest
+    parser.add_argument("manifest", help="CSV or JSON file listing the datasets (project_name, options_file, image_files_dir and optionally asset)")
+
+    # Output directory (default is root directory)
+    parser.add_argument("-od", "--output_dir", help="Directory path to folder where output files will be placed", type=str)
+
+    # Stage concurrency
+    parser.add_argument("-u", "--uploads", help="Maximum number of datasets uploaded at the same time", type=int, default=2)
+    parser.add_argument("-p", "--processing", help="Maximum number of tasks processing (or queued) in WebODM at the same time", type=int, default=4)
+    parser.add_argument("-d", "--downloads", help="Maximum number of assets downloaded at the same time", type=int, default=2)
+
+    # Upload settings
+    parser.add_argument("-t", "--threads", help="Number of batches uploaded at the same time per dataset", type=int, default=4)
+    parser.add_argument("-bs", "--batch_size", help="Number of images uploaded per request", type=int, default=10)
+
+    # Pre-flight checks
+    parser.add_argument("-pf", "--preflight", help="Check every dataset's images and GCP files before anything is uploaded, stopping if a check fails", action="store_true", default=False)
+
+    # Summary file
+    parser.add_argument("-sf", "--summary_file", help="Path of JSON file the summary is written to", type=str)
+
+    # Webhook instead of polling
+    parser.add_argument("-wh", "--webhook", help="Address WebODM reaches this machine at, as <host>[:<port>], to be called back when tasks finish instead of waiting for the next poll", type=str)
+
+    # Phase timing
+    parser.add_argument("-mf", "--metrics_file", help="Path to the JSON lines file the time of each phase of every dataset is appended to", type=str, default=WebODM_metrics.default_metrics_path)
+    parser.add_argument("-pt", "--prometheus_textfile", help="Path to a Prometheus textfile rewritten from the metrics file after each dataset (ex. for node_exporter)", type=str)
+
+    return parser
+
+def get_manifest(manifest_path):
+    """
+    Reads a manifest of datasets from a CSV (with header) or JSON (list of objects) file
+
+    :param manifest_path: path to manifest file
+    :return: datasets (list of dictionaries)
+    """
+
+    # read datasets
+    with open(manifest_path, 'r', newline='') as file:
+        if manifest_path.lower().endswith(".json"):
+            datasets = json.load(file)
+        else:
+            datasets = list(csv.DictReader(file))
+
+    # validate
+    names = set()
+    for i, dataset in enumerate(datasets):
+        missing = [f for f in required_fields if not dataset.get(f)]
+        if missing:
+            WebODM_main.print_error(f"Dataset {i + 1} of manifest is missing {', '.join(missing)}")
+        if dataset['project_name'] in names:
+            WebODM_main.print_error(f"Project name {dataset['project_name']} is used more than once in manifest")
+        names.add(dataset['project_name'])
+        dataset['asset'] = dataset.get('asset') or "all.zip"
+
+    return datasets
+
+def prepare_dataset(dataset, preflight=False, metrics_path=None, textfile_path=None):
+    """
+    Finds the files and reads the options of a dataset, so errors show up before anything is uploaded
+
+    :param dataset: dataset (dictionary from manifest)
+    :param preflight: whether to run the pre-flight checks of the images
+    :param metrics_path: path to JSON lines file the phases of the dataset are appended to, or None
+    :param textfile_path: path to Prometheus textfile rewritten when the dataset is recorded, or None
+    :return: N/A
+    """
+
+    # var
+    metrics = WebODM_metrics.RunMetrics(metrics_path, textfile_path, project_name=dataset['project_name'],
+                                        options_profile=WebODM_variants.get_variant_name(dataset['options_file']))
+
+    print(f"[{dataset['project_name']}] ", end="")
+    with metrics.phase("scan"):
+        image_paths = WebODM_main.get_image_paths(dataset['image_files_dir'])
+
+    if preflight:
+        with metrics.phase("validate"):
+            if not WebODM_main.get_preflight_report(dataset['image_files_dir'], image_paths)['passed']:
+                WebODM_main.print_error(f"Pre-flight check of {dataset['project_name']} failed")
+
+    dataset['files'] = WebODM_main.get_upload_files(dataset['image_files_dir'], image_paths)
+    dataset['image_count'] = len([f for f in dataset['files'] if f[0] == 'images']) # GCP and geo files are not images
+    dataset['metrics'] = metrics if metrics_path else None
+    metrics.set(image_count=dataset['image_count'])
+    dataset['options'] = WebODM_main.get_options(dataset['options_file'])
+
+def upload_dataset(client, dataset, threads, batch_size, assigned, webhook=None):
+    """
+    Creates the project and a partial task of a dataset on the least loaded processing node and uploads its files, without committing the task
+
+    :param client: authenticated client (WebODMClient)
+    :param dataset: dataset (dictionary from manifest, prepared)
+    :param threads: number of batches uploaded at the same time
+    :param batch_size: number of images uploaded per request
+    :param assigned: tasks sent to each processing node by this batch (dictionary of id: count)
+    :param webhook: URL the server should call when the task finishes, only sent with a new task
+    :return: project ID, task ID, whether the task was created with the webhook
+    """
+
+    # var
+    state_path = WebODM_main.get_upload_state_path(dataset['project_name'])
+    state = WebODM_upload.get_upload_state(state_path)
+
+    # resume interrupted upload, or create project and partial task
+    if state is None:
+        project_id = WebODM_main.create_project(client, dataset['project_name'])
+        node = WebODM_processing_nodes.select_processing_node(client, dataset['image_count'], assigned)
+        task_id = WebODM_upload.post_partial_task(client, project_id, dataset['options'], node['id'] if node else None, webhook)
+        state = {'project_id': project_id, 'task_id': task_id, 'uploaded': list(), 'webhook': webhook}
+        WebODM_upload.save_upload_state(state_path, state)
+
+    WebODM_upload.upload_task_files(client, state['project_id'], state['task_id'], dataset['files'], state_path, state,
+                                    batch_size=batch_size, threads=threads)
+
+    return state['project_id'], state['task_id'], webhook is not None and state.get('webhook') == webhook
+
+def commit_dataset(client, dataset, project_id, task_id):
+    """
+    Commits the uploaded task of a dataset, starting its processing
+
+    :param client: authenticated client (WebODMClient)
+    :param dataset: dataset (dictionary from manifest, prepared)
+    :param project_id: ID of project
+    :param task_id: ID of partial task
+    :return: N/A
+    """
+
+    WebODM_upload.post_task_commit(client, project_id, task_id)
+    os.remove(WebODM_main.get_upload_state_path(dataset['project_name'])) # nothing left to resume
+
+async def run_dataset(client, dataset, limits, output_dir, threads, batch_size, assigned, listener=None):
+    """
+    Uploads, processes and downloads one dataset. Each stage waits for a slot of its own limit,
+    so one dataset can upload while others are processing or downloading
+
+    :param client: authenticated client (WebODMClient)
+    :param dataset: dataset (dictionary from manifest, prepared)
+    :param limits: semaphores of each stage (dictionary with upload, processing, download and request)
+    :param output_dir: directory of where the files should be downloaded
+    :param threads: number of batches uploaded at the same time
+    :param batch_size: number of images uploaded per request
+    :param assigned: tasks sent to each processing node by this batch (dictionary of id: count)
+    :param listener: webhook listener (WebhookListener) woken when the task finishes, or None to poll
+    :return: summary of dataset (dictionary)
+    """
+
+    # var
+    name = dataset['project_name']
+    webhook_key, webhook_url = listener.register() if listener else (None, None)
+    watch_options = dict()
+    metrics = dataset.get('metrics')
+    summary = {'project_name': name, 'images': dataset['image_count'], 'status': None, 'stage': 'upload',
+               'project_id': None, 'task_id': None, 'upload_time': None, 'processing_time': None,
+               'download_time': None, 'asset': None, 'error': None}
+
+    try:
+        # upload
+        async with limits['upload']:
+            print(f"[{name}] Uploading {len(dataset['files'])} files")
+            start = time.time()
+            project_id, task_id, called_back = await asyncio.to_thread(upload_dataset, client, dataset, threads, batch_size, assigned, webhook_url)
+            summary.update(project_id=project_id, task_id=task_id, upload_time=round(time.time() - start, 1))
+            if metrics:
+                metrics.add("upload", time.time() - start, WebODM_metrics.get_size(path for field, path, content_type in dataset['files']))
+                metrics.set(task_id=task_id)
+
+        # a callback only cuts the wait short, polling keeps its usual interval since stock WebODM does not call back per task
+        if called_back:
+            watch_options = {'wake': lambda interval: listener.wait_async(webhook_key, interval)}
+
+        # processing, the slot is held from commit until the task is finished
+        summary['stage'] = 'processing'
+        async with limits['processing']:
+            await asyncio.to_thread(commit_dataset, client, dataset, project_id, task_id)
+            print(f"[{name}] Task committed")
+            start = time.time()
+            task = await WebODM_watch.watch_task(client, project_id, task_id, limits['request'], limits['download'],
+                                                 download=False, **watch_options)
+        if metrics:
+            running_time = task['processing_time'] / 1000 if task['processing_time'] > 0 else 0
+            metrics.add("queue", max(0, time.time() - start - running_time))
+            metrics.add("running", running_time)
+            metrics.set(processing_node=task.get('processing_node_name') or task.get('processing_node'))
+        summary.update(status=status_codes.names.get(task['status'], task['status']),
+                       processing_time=WebODM_monitor.format_processing_time(task['processing_time']))
+
+        # download
+        if task['status'] == status_codes.COMPLETED:
+            summary['stage'] = 'download'
+            async with limits['download']:
+                start = time.time()
+                asset = WebODM_main.validate_asset(task['available_assets'], dataset['asset'])
+                asset_dir = WebODM_main.get_asset_dir(name, output_dir)
+                asset_paths = await asyncio.to_thread(WebODM_download.download_assets, client, project_id, task_id, [asset], asset_dir)
+                for asset_path in asset_paths:
+                    print(f"[{name}] Saved ./{asset_path}")
+                summary.update(asset=asset, download_time=round(time.time() - start, 1))
+                if metrics:
+                    metrics.add("download", time.time() - start, WebODM_metrics.get_size(asset_paths))
+
+        summary['stage'] = 'done'
+    except Exception as e: # one failed dataset does not stop the others, so nothing here may exit
+        summary.update(status='ERROR', error=str(e))
+        print(f"[{name}] Failed during {summary['stage']} ({e})")
+    finally:
+        if listener:
+            listener.release(webhook_key)
+        if metrics:
+            metrics.set(status=summary['status'].lower() if summary['status'] else 'incomplete')
+            metrics.save()
+
+    return summary
+
+async def run_batch(client, datasets, uploads=2, processing=4, downloads=2, output_dir=None, threads=4, batch_size=10, listener=None):
+    """
+    Runs all datasets of a manifest with separate concurrency limits per stage
+
+    :param client: authenticated client (WebODMClient)
+    :param datasets: datasets (list of dictionaries from manifest, prepared)
+    :param uploads: maximum number of datasets uploaded at the same time
+    :param processing: maximum number of tasks processing (or queued) at the same time
+    :param downloads: maximum number of assets downloaded at the same time
+    :param output_dir: directory of where the files should be downloaded
+    :param threads: number of batches uploaded at the same time per dataset
+    :param batch_size: number of images uploaded per request
+    :param listener: webhook listener (WebhookListener) woken when tasks finish, or None to poll
+    :return: summary of each dataset (list of dictionaries)
+    """
+
+    # enough threads that long uploads and downloads never hold up the status requests
+    max_requests = 16
+    asyncio.get_running_loop().set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=uploads + downloads + max_requests))
+
+    limits = {'upload': asyncio.Semaphore(uploads),
+              'processing': asyncio.Semaphore(processing),
+              'download': asyncio.Semaphore(downloads),
+              'request': asyncio.Semaphore(max_requests)}
+
+    # spread tasks over processing nodes, even before their queue counts are refreshed
+    assigned = dict()
+
+    return await asyncio.gather(*[run_dataset(client, d, limits, output_dir, threads, batch_size, assigned, listener) for d in datasets])
+
+def print_summary(summaries):
+    """
+    Prints the summary of each dataset to the console
+
+    :param summaries: summary of each dataset (list of dictionaries)
+    :return: N/A
+    """
+
+    print("\nSummary:")
+    for s in summaries:
+        if s['error']:
+            print(f"\t* {s['project_name']}: {s['status']} during {s['stage']} ({s['error']})")
+        elif s['asset'] is None:
+            print(f"\t* {s['project_name']}: {s['status']} ({s['images']} images, upload {s['upload_time']}s, "
+                  f"processing {s['processing_time']})")
+        else:
+            print(f"\t* {s['project_name']}: {s['status']} ({s['images']} images, upload {s['upload_time']}s, "
+                  f"processing {s['processing_time']}, download {s['download_time']}s, {s['asset']})")
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # read and check every dataset before anything is sent
+    datasets = get_manifest(args.manifest)
+    for dataset in datasets:
+        prepare_dataset(dataset, args.preflight, args.metrics_file, args.prometheus_textfile)
+
+    # authorize
+    client = WebODM_main.post_authentication(WebODM_main.username, WebODM_main.password)
+
+    # listen for the server to call back when tasks finish
+    listener = WebODM_webhook.start_listener(args.webhook) if args.webhook else None
+
+    summaries = asyncio.run(run_batch(client, datasets, args.uploads, args.processing, args.downloads,
+                                      args.output_dir, args.threads, args.batch_size, listener))
+
+    # summary
+    print_summary(summaries)
+    if args.summary_file:
+        with open(args.summary_file, 'w') as file:
+            json.dump(summaries, file, indent=4)
+
+    # exit with an error unless every dataset completed
+    sys.exit(0 if all(s['status'] == status_codes.names[status_codes.COMPLETED] and not s['error'] for s in summaries) else 1)
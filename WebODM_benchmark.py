@@ -0,0 +1,709 @@
+"""
+WebODM_benchmark.py: Benchmark options profiles across datasets and processing nodes, with repeat runs kept in SQLite for comparison reports
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, sys, csv, glob, json, time, sqlite3, argparse, asyncio, threading, statistics # standard libraries
+import status_codes
+import WebODM_download
+import WebODM_main
+import WebODM_upload
+import WebODM_variants
+import WebODM_watch
+
+# global variables
+
+default_results_path = ".webodm_benchmark.sqlite"
+default_report_options = ("pc-quality", "mesh-octree-depth", "orthophoto-resolution")
+progress_marks = (0.5, 0.9) # progress reported in comparisons, as time taken to reach it
+
+schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    benchmark TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    image_count INTEGER,
+    profile TEXT NOT NULL,
+    options TEXT,
+    node_id INTEGER,
+    node_label TEXT,
+    repeat INTEGER NOT NULL,
+    project_id INTEGER,
+    task_id TEXT,
+    status TEXT,
+    error TEXT,
+    processing_time REAL,
+    queue_time REAL,
+    output_bytes INTEGER,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    elapsed REAL NOT NULL,
+    processing_time REAL,
+    running_progress REAL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    asset TEXT NOT NULL,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_benchmark ON runs(benchmark);
+CREATE INDEX IF NOT EXISTS progress_run ON progress(run_id);
+"""
+
+# classes
+
+class ResultStore:
+    """
+    Runs of benchmarks with their progress curves and output sizes, kept in SQLite so repeats of a
+    benchmark can be added later and compared with earlier benchmarks
+    """
+
+    def __init__(self, path=default_results_path):
+        """
+        :param path: path to SQLite database
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(schema)
+
+    def create_run(self, benchmark, dataset, image_count, profile, options, node_id, node_label, repeat, project_id):
+        """
+        Records a run that is about to start
+
+        :param benchmark: name of benchmark
+        :param dataset: name of dataset
+        :param image_count: number of images of dataset
+        :param profile: name of options profile
+        :param options: options in raw JSON format
+        :param node_id: ID of processing node, None if WebODM chooses
+        :param node_label: label of processing node
+        :param repeat: number of the repeat (from 1)
+        :param project_id: ID of project
+        :return: ID of run
+        """
+
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (benchmark, dataset, image_count, profile, options, node_id, node_label, repeat, project_id, started) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (benchmark, dataset, image_count, profile, options, node_id, node_label, repeat, project_id, time.time()))
+
+        return cursor.lastrowid
+
+    def update_run(self, run_id, **fields):
+        """
+        Changes fields of a run
+
+        :param run_id: ID of run
+        :param fields: columns to change (ex. task_id, status, processing_time)
+        :return: N/A
+        """
+
+        with self.lock, self.connection:
+            self.connection.execute(f"UPDATE runs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                                    (*fields.values(), run_id))
+
+    def add_progress(self, run_id, samples):
+        """
+        Records the progress curve of a run
+
+        :param run_id: ID of run
+        :param samples: (elapsed seconds, processing time in seconds, running progress) of every tick (list of tuples)
+        :return: N/A
+        """
+
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT INTO progress (run_id, elapsed, processing_time, running_progress) VALUES (?, ?, ?, ?)",
+                                        [(run_id, *sample) for sample in samples])
+
+    def add_outputs(self, run_id, sizes):
+        """
+        Records the size of each output asset of a run
+
+        :param run_id: ID of run
+        :param sizes: size of each asset (dictionary of asset: bytes, None if unknown)
+        :return: N/A
+        """
+
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT INTO outputs (run_id, asset, bytes) VALUES (?, ?, ?)",
+                                        [(run_id, asset, size) for asset, size in sizes.items()])
+
+    def get_runs(self, benchmark):
+        """
+        Gets the finished runs of a benchmark, with their progress curves and output sizes
+
+        :param benchmark: name of benchmark
+        :return: runs, oldest first (list of dictionaries with progress and outputs)
+        """
+
+        with self.lock:
+            runs = [dict(row) for row in self.connection.execute(
+                "SELECT * FROM runs WHERE benchmark = ? AND status IS NOT NULL ORDER BY id", (benchmark,)).fetchall()]
+            for run in runs:
+                run['progress'] = [dict(row) for row in self.connection.execute(
+                    "SELECT elapsed, processing_time, running_progress FROM progress WHERE run_id = ? ORDER BY rowid", (run['id'],)).fetchall()]
+                run['outputs'] = {row['asset']: row['bytes'] for row in self.connection.execute(
+                    "SELECT asset, bytes FROM outputs WHERE run_id = ?", (run['id'],)).fetchall()}
+
+        return runs
+
+    def count_runs(self, benchmark, dataset, profile, node_id):
+        """
+        Counts the finished runs of one cell of a benchmark, so an interrupted benchmark only runs the repeats left
+
+        :param benchmark: name of benchmark
+        :param dataset: name of dataset
+        :param profile: name of options profile
+        :param node_id: ID of processing node, None if WebODM chooses
+        :return: number of runs (int)
+        """
+
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM runs WHERE benchmark = ? AND dataset = ? AND profile = ? AND node_id IS ? AND status IS NOT NULL",
+                (benchmark, dataset, profile, node_id)).fetchone()[0]
+
+    def list_benchmarks(self):
+        """
+        Gets every benchmark with its number of runs
+
+        :param: N/A
+        :return: benchmarks, latest first (list of dictionaries with benchmark, runs, failed, started and finished)
+        """
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT benchmark, COUNT(*) AS runs, SUM(status != 'COMPLETED') AS failed, MIN(started) AS started, MAX(finished) AS finished "
+                "FROM runs WHERE status IS NOT NULL GROUP BY benchmark ORDER BY MAX(id) DESC").fetchall()
+
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+# functions
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Command
+    parser.add_argument("command", help="run a benchmark, report on a benchmark, or list the recorded benchmarks",
+                        choices=["run", "report", "list"])
+
+    # Datasets
+    parser.add_argument("image_files_dirs", help="Directory paths to folders of images, one dataset each (run only)", nargs="*")
+
+    # Name of benchmark
+    parser.add_argument("-n", "--name", help="Name of benchmark, running an existing benchmark again only runs the repeats it is missing (default is the date and time for run, the latest benchmark for report)", type=str)
+
+    # Options profiles
+    parser.add_argument("-op", "--options_files", help="Paths to options files compared (default is options.json and every options file in options/)", type=str, nargs="+")
+
+    # Processing nodes
+    parser.add_argument("-pn", "--processing_nodes", help="IDs of processing nodes compared (default is the node WebODM chooses)", type=int, nargs="+")
+
+    # Repeats
+    parser.add_argument("-r", "--repeats", help="Number of runs of each dataset, profile and node", type=int, default=3)
+
+    # Assets to download
+    parser.add_argument("-a", "--asset", help="Assets to download from every run, to compare their quality (default is none, only their sizes are recorded)", type=str, nargs="+")
+
+    # Output directory (default is root directory)
+    parser.add_argument("-od", "--output_dir", help="Directory path to folder where downloaded assets will be placed", type=str)
+
+    # Delete projects
+    parser.add_argument("-dp", "--delete_projects", help="Delete the project of each dataset once its runs are recorded", action="store_true", default=False)
+
+    # Baseline profile
+    parser.add_argument("-b", "--baseline", help="Name of options profile the others are compared to (report only, default is the first profile)", type=str)
+
+    # Options shown in report
+    parser.add_argument("-ro", "--report_options", help="Options whose values are shown for each profile (report only)", type=str, nargs="+",
+                        default=list(default_report_options))
+
+    # Report file
+    parser.add_argument("-o", "--output", help="Path of CSV or JSON file the report is also written to (report only)", type=str)
+
+    # Results store
+    parser.add_argument("-rs", "--results_store", help="Path to results store", type=str, default=default_results_path)
+
+    return parser
+
+def get_profiles(options_paths=None):
+    """
+    Reads the options profiles to compare
+
+    :param options_paths: paths to options files, None for options.json and every options file in options/
+    :return: profiles (list of dictionaries with name and options)
+    """
+
+    if options_paths is None:
+        options_paths = [p for p in ["options.json"] + sorted(glob.glob(os.path.join("options", "*.json"))) if os.path.isfile(p)]
+
+    # var
+    profiles = [{'name': WebODM_variants.get_variant_name(p), 'options': WebODM_main.get_options(p)} for p in options_paths]
+
+    if not profiles:
+        WebODM_main.print_error("No options files found")
+    if len({p['name'] for p in profiles}) < len(profiles):
+        WebODM_main.print_error("Options files of profiles must have different names")
+
+    return profiles
+
+def get_datasets(image_files_dirs):
+    """
+    Finds the images of each dataset, so errors show up before anything is uploaded
+
+    :param image_files_dirs: paths to directories of images
+    :return: datasets (list of dictionaries with name, files and image_count)
+    """
+
+    # var
+    datasets = list()
+
+    for dir_path in image_files_dirs:
+        name = os.path.basename(os.path.normpath(dir_path))
+        files = WebODM_main.get_upload_files(dir_path, WebODM_main.get_image_paths(dir_path))
+        datasets.append({'name': name, 'files': files, 'image_count': len([f for f in files if f[0] == 'images'])})
+
+    if len({d['name'] for d in datasets}) < len(datasets):
+        WebODM_main.print_error("Directories of datasets must have different names")
+
+    return datasets
+
+def get_nodes(client, node_ids=None):
+    """
+    Gets the processing nodes to compare
+
+    :param client: authenticated client (WebODMClient)
+    :param node_ids: IDs of processing nodes, None to let WebODM choose
+    :return: nodes (list of dictionaries with id and label)
+    """
+
+    if node_ids is None:
+        return [{'id': None, 'label': "auto"}]
+
+    # var
+    labels = {n['id']: n['label'] for n in client.get('/api/processingnodes/').json()}
+
+    missing = [i for i in node_ids if i not in labels]
+    if missing:
+        WebODM_main.print_error(f"Processing nodes {', '.join(map(str, missing))} not found")
+
+    return [{'id': i, 'label': labels[i]} for i in dict.fromkeys(node_ids)]
+
+def get_option_values(options):
+    """
+    Reads the values of an options file
+
+    :param options: options in raw JSON format (list of name and value)
+    :return: value of each option (dictionary)
+    """
+
+    return {o['name']: o['value'] for o in json.loads(options)}
+
+def get_output_sizes(client, project_id, task_id, available_assets):
+    """
+    Gets the size of every asset of a task without downloading it
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param available_assets: all assets available to download (list)
+    :return: size of each asset (dictionary of asset: bytes, None if unknown)
+    """
+
+    return {asset: WebODM_download.get_asset_info(client, "/api/projects/{}/tasks/{}/download/{}".format(project_id, task_id, asset))['size']
+            for asset in available_assets}
+
+def upload_dataset(client, benchmark, dataset, profile, node):
+    """
+    Creates the project of a dataset and uploads its images once to a partial task, which every run is created from
+
+    :param client: authenticated client (WebODMClient)
+    :param benchmark: name of benchmark
+    :param dataset: dataset (dictionary)
+    :param profile: options profile of the first run
+    :param node: processing node of the first run
+    :return: project ID, task ID
+    """
+
+    # var
+    project_name = f"{benchmark}_{dataset['name']}"
+    state_path = WebODM_main.get_upload_state_path(project_name)
+    state = WebODM_upload.get_upload_state(state_path)
+
+    # resume interrupted upload, or create project and partial task
+    if state is None:
+        project_id = WebODM_main.create_project(client, project_name) # raises, so one failed dataset does not stop the benchmark
+        task_id = WebODM_upload.post_partial_task(client, project_id, profile['options'], node['id'])
+        state = {'project_id': project_id, 'task_id': task_id, 'uploaded': list()}
+        WebODM_upload.save_upload_state(state_path, state)
+
+    WebODM_upload.upload_task_files(client, state['project_id'], state['task_id'], dataset['files'], state_path, state)
+
+    return state['project_id'], state['task_id']
+
+async def start_task(client, run, base):
+    """
+    Starts the task of a run: the uploaded task for the first run of a dataset, a duplicate of it for the others.
+    If the server cannot duplicate tasks, the uploaded task is restarted with the run's options instead
+
+    :param client: authenticated client (WebODMClient)
+    :param run: run (dictionary with dataset, profile, node and repeat)
+    :param base: uploaded task of the dataset (dictionary)
+    :return: ID of task
+    """
+
+    # var
+    name = f"{run['profile']['name']} @ {run['node']['label']} #{run['repeat']}"
+
+    if run['first']:
+        await asyncio.to_thread(WebODM_upload.post_task_commit, client, base['project_id'], base['task_id'])
+        os.remove(WebODM_main.get_upload_state_path(base['project_name'])) # nothing left to resume
+        base['committed'].set()
+        return base['task_id']
+
+    await base['committed'].wait()
+
+    if base['duplicate']:
+        task_id = await asyncio.to_thread(WebODM_variants.post_task_duplicate, client, base['project_id'], base['task_id'],
+                                          name, run['profile']['options'], run['node']['id'])
+        if task_id is not None:
+            return task_id
+        base['duplicate'] = False
+        print(f"[{run['dataset']['name']}] Server cannot duplicate tasks, runs of this dataset take turns on the uploaded task")
+
+    # the first run still processes the uploaded task
+    await base['finished'].wait()
+    await asyncio.to_thread(WebODM_variants.update_task, client, base['project_id'], base['task_id'],
+                            name, run['profile']['options'], run['node']['id'])
+
+    return base['task_id']
+
+async def run_benchmark_run(client, store, benchmark, run, base, limits, output_dir=None, assets=None):
+    """
+    Runs one dataset with one options profile on one processing node, recording its processing time,
+    progress curve and output sizes. Runs on the same node take turns, so they do not slow each other down
+
+    :param client: authenticated client (WebODMClient)
+    :param store: results store (ResultStore)
+    :param benchmark: name of benchmark
+    :param run: run (dictionary with dataset, profile, node, repeat and first)
+    :param base: uploaded task of the dataset (dictionary)
+    :param limits: semaphores (dictionary with request and download, and a lock per node)
+    :param output_dir: directory of where downloaded assets are placed
+    :param assets: assets to download (list), None to only record their sizes
+    :return: status of run (str)
+    """
+
+    # var
+    label = f"{run['dataset']['name']}/{run['profile']['name']}@{run['node']['label']} #{run['repeat']}"
+    samples = list()
+    held = False # whether this run holds the uploaded task
+
+    await base['uploaded'].wait()
+
+    async with limits['nodes'][run['node']['id']]:
+        run_id = store.create_run(benchmark, run['dataset']['name'], run['dataset']['image_count'], run['profile']['name'],
+                                  run['profile']['options'], run['node']['id'], run['node']['label'], run['repeat'], base['project_id'])
+
+        def record_tick(task):
+            samples.append((round(time.time() - start, 3), max(task['processing_time'], 0) / 1000, task['running_progress']))
+
+        def print_transition(project_id, task_id, task, previous_status):
+            print(f"[{label}] {status_codes.names.get(task['status'], task['status'])}")
+
+        try:
+            if base['error']:
+                raise RuntimeError(f"Upload failed ({base['error']})")
+
+            # tasks are created one at a time, and only copies of the uploaded task run side by side
+            if not run['first']:
+                await base['lock'].acquire()
+                held = True
+            start = time.time()
+            task_id = await start_task(client, run, base)
+            store.update_run(run_id, task_id=task_id)
+            if held and base['duplicate']:
+                base['lock'].release()
+                held = False
+
+            task = await WebODM_watch.watch_task(client, base['project_id'], task_id, limits['request'], limits['download'],
+                                                 on_transition=print_transition, download=False, on_tick=record_tick)
+            watched = time.time() - start
+            processing_time = max(task['processing_time'], 0) / 1000
+            status = status_codes.names.get(task['status'], task['status'])
+            store.add_progress(run_id, samples)
+
+            # output sizes, and assets to compare by eye
+            output_bytes = None
+            if task['status'] == status_codes.COMPLETED:
+                async with limits['request']:
+                    sizes = await asyncio.to_thread(get_output_sizes, client, base['project_id'], task_id, task['available_assets'])
+                store.add_outputs(run_id, sizes)
+                output_bytes = sum(size or 0 for asset, size in sizes.items() if asset != 'all.zip') or sizes.get('all.zip')
+
+                if assets:
+                    asset_dir = WebODM_main.get_asset_dir(os.path.join(benchmark, run['dataset']['name'], run['profile']['name'],
+                                                                       f"{run['node']['label']}_{run['repeat']}"), output_dir)
+                    async with limits['download']:
+                        await asyncio.to_thread(WebODM_download.download_assets, client, base['project_id'], task_id,
+                                                [WebODM_main.validate_asset(task['available_assets'], a) for a in assets], asset_dir)
+
+            store.update_run(run_id, status=status, processing_time=processing_time, finished=time.time(), output_bytes=output_bytes,
+                             queue_time=round(max(0, watched - processing_time), 3))
+            print(f"[{label}] {status} in {processing_time:.1f}s")
+        except Exception as e: # one failed run does not stop the others
+            store.add_progress(run_id, samples)
+            store.update_run(run_id, status='ERROR', error=str(e), finished=time.time())
+            print(f"[{label}] Failed ({e})")
+            status = 'ERROR'
+        finally:
+            if held:
+                base['lock'].release()
+            if run['first']: # later runs of the dataset go ahead, or fail on their own
+                base['committed'].set()
+                base['finished'].set()
+
+    return status
+
+async def run_benchmark(client, store, benchmark, datasets, profiles, nodes, repeats=3, output_dir=None, assets=None):
+    """
+    Runs every dataset with every options profile on every processing node, repeats times. The images of each
+    dataset are uploaded once and every run is a copy of the uploaded task, so only processing is compared.
+    Repeats are interleaved so slow drifts of a node spread over every profile
+
+    :param client: authenticated client (WebODMClient)
+    :param store: results store (ResultStore)
+    :param benchmark: name of benchmark
+    :param datasets: datasets (list of dictionaries)
+    :param profiles: options profiles (list of dictionaries)
+    :param nodes: processing nodes (list of dictionaries)
+    :param repeats: number of runs of each dataset, profile and node
+    :param output_dir: directory of where downloaded assets are placed
+    :param assets: assets to download (list), None to only record their sizes
+    :return: status of each run (list)
+    """
+
+    # var
+    limits = {'request': asyncio.Semaphore(16), 'download': asyncio.Semaphore(2), 'upload': asyncio.Semaphore(1),
+              'nodes': {n['id']: asyncio.Lock() for n in nodes}}
+    runs = list()
+
+    # repeats already recorded (ex. of an interrupted benchmark) are not run again
+    for repeat in range(1, repeats + 1):
+        for dataset in datasets:
+            for profile in profiles:
+                for node in nodes:
+                    if store.count_runs(benchmark, dataset['name'], profile['name'], node['id']) < repeat:
+                        runs.append({'dataset': dataset, 'profile': profile, 'node': node, 'repeat': repeat, 'first': False})
+
+    # the first run of each dataset is processed by the uploaded task itself
+    bases = dict()
+    for run in runs:
+        if run['dataset']['name'] not in bases:
+            run['first'] = True
+            bases[run['dataset']['name']] = {'project_name': f"{benchmark}_{run['dataset']['name']}", 'project_id': None, 'task_id': None,
+                                             'uploaded': asyncio.Event(), 'committed': asyncio.Event(), 'finished': asyncio.Event(), 'lock': asyncio.Lock(),
+                                             'duplicate': True, 'error': None, 'run': run}
+
+    print(f"Benchmark {benchmark}: {len(runs)} runs of {len(datasets)} datasets, {len(profiles)} profiles and {len(nodes)} nodes")
+
+    async def upload(base):
+        try:
+            async with limits['upload']:
+                print(f"[{base['run']['dataset']['name']}] Uploading {len(base['run']['dataset']['files'])} files")
+                base['project_id'], base['task_id'] = await asyncio.to_thread(upload_dataset, client, benchmark, base['run']['dataset'],
+                                                                              base['run']['profile'], base['run']['node'])
+        except Exception as e:
+            base['error'] = str(e)
+            print(f"[{base['run']['dataset']['name']}] Upload failed ({e})")
+        base['uploaded'].set()
+
+    results = await asyncio.gather(*[upload(b) for b in bases.values()],
+                                   *[run_benchmark_run(client, store, benchmark, r, bases[r['dataset']['name']], limits, output_dir, assets)
+                                     for r in runs])
+
+    return results[len(bases):]
+
+def get_time_to_progress(progress, mark):
+    """
+    Gets the processing time a run took to reach a progress
+
+    :param progress: progress curve of run (list of dictionaries with processing_time and running_progress)
+    :param mark: progress (0 to 1)
+    :return: processing time (seconds), None if never reached
+    """
+
+    return next((p['processing_time'] for p in progress if p['running_progress'] is not None and p['running_progress'] >= mark), None)
+
+def get_report(runs, baseline=None, report_options=default_report_options):
+    """
+    Compares the runs of a benchmark, grouped by dataset, options profile and processing node. Each group gets its
+    failure rate, the mean, standard deviation and range of its processing time, the median time to reach each
+    progress mark and its mean output size, and is compared to the baseline profile on the same dataset and node
+
+    :param runs: runs of benchmark (list of dictionaries from ResultStore.get_runs)
+    :param baseline: name of options profile the others are compared to, None for the first profile
+    :param report_options: options whose values are shown for each profile
+    :return: rows (list of dictionaries)
+    """
+
+    # var
+    groups = dict()
+
+    for run in runs:
+        groups.setdefault((run['dataset'], run['profile'], run['node_label']), list()).append(run)
+
+    if baseline is None and runs:
+        baseline = runs[0]['profile']
+
+    rows = list()
+    for (dataset, profile, node), group in groups.items():
+        completed = [r for r in group if r['status'] == status_codes.names[status_codes.COMPLETED]]
+        times = [r['processing_time'] for r in completed]
+        sizes = [r['output_bytes'] for r in completed if r['output_bytes'] is not None]
+        values = get_option_values(group[0]['options']) if group[0]['options'] else dict()
+
+        row = {'dataset': dataset, 'images': group[0]['image_count'], 'profile': profile, 'node': node, 'runs': len(group),
+               'completed': len(completed), 'failure_rate': round(1 - len(completed) / len(group), 3),
+               'mean_s': round(statistics.mean(times), 1) if times else None,
+               'stdev_s': round(statistics.stdev(times), 1) if len(times) > 1 else None,
+               'min_s': round(min(times), 1) if times else None, 'max_s': round(max(times), 1) if times else None,
+               'mean_queue_s': round(statistics.mean(r['queue_time'] for r in completed), 1) if completed else None,
+               'output_mb': round(statistics.mean(sizes) / 1e6, 2) if sizes else None}
+        row['cv'] = round(row['stdev_s'] / row['mean_s'], 3) if row['stdev_s'] is not None and row['mean_s'] else None
+        for mark in progress_marks:
+            marks = [t for t in (get_time_to_progress(r['progress'], mark) for r in completed) if t is not None]
+            row[f't{round(mark * 100)}_s'] = round(statistics.median(marks), 1) if marks else None
+        for name in report_options:
+            row[name] = values.get(name, "default")
+        rows.append(row)
+
+    # compare every profile to the baseline on the same dataset and node
+    means = {(r['dataset'], r['node']): r for r in rows if r['profile'] == baseline}
+    for row in rows:
+        reference = means.get((row['dataset'], row['node']))
+        row['speedup'] = round(reference['mean_s'] / row['mean_s'], 2) if reference and reference['mean_s'] and row['mean_s'] else None
+        row['size_ratio'] = round(row['output_mb'] / reference['output_mb'], 2) if reference and reference['output_mb'] and row['output_mb'] else None
+
+    return rows
+
+def print_report(benchmark, rows, baseline, report_options=default_report_options):
+    """
+    Prints a report to the console, one line per dataset, options profile and processing node
+
+    :param benchmark: name of benchmark
+    :param rows: rows of report (list of dictionaries)
+    :param baseline: name of options profile the others are compared to
+    :param report_options: options whose values are shown for each profile
+    :return: N/A
+    """
+
+    print(f"\nBenchmark {benchmark} (compared to {baseline}):")
+    for dataset in dict.fromkeys(r['dataset'] for r in rows):
+        group = [r for r in rows if r['dataset'] == dataset]
+        print(f"{dataset} ({group[0]['images']} images):")
+        for r in group:
+            line = f"\t* {r['profile']} @ {r['node']}: {r['completed']}/{r['runs']} completed"
+            if r['mean_s'] is not None:
+                line += f", {r['mean_s']}s" + (f" ± {r['stdev_s']}s (cv {r['cv'] * 100:.1f}%)" if r['stdev_s'] is not None else "")
+                line += "".join(f", {round(m * 100)}% at {r[f't{round(m * 100)}_s']}s" for m in progress_marks if r[f't{round(m * 100)}_s'] is not None)
+            if r['output_mb'] is not None:
+                line += f", {r['output_mb']} MB out"
+            if r['profile'] != baseline and r['speedup'] is not None:
+                line += f", {r['speedup']}x speed" + (f" and {r['size_ratio']}x size" if r['size_ratio'] is not None else "")
+            line += " [" + ", ".join(f"{name}={r[name]}" for name in report_options) + "]"
+            print(line)
+
+def write_report(path, rows):
+    """
+    Writes a report to a CSV or JSON file, chosen by its extension
+
+    :param path: path to report file (*.csv or *.json)
+    :param rows: rows of report (list of dictionaries)
+    :return: N/A
+    """
+
+    with open(path, 'w', newline='') as file:
+        if path.lower().endswith(".json"):
+            json.dump(rows, file, indent=4)
+        else:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # var
+    store = ResultStore(args.results_store)
+
+    if args.command == "list":
+        print("\nBenchmarks:")
+        for b in store.list_benchmarks():
+            print(f"\t* {b['benchmark']}: {b['runs']} runs, {b['failed']} failed "
+                  f"({time.strftime('%Y-%m-%d %H:%M', time.localtime(b['started']))})")
+        sys.exit(0)
+
+    if args.command == "report":
+        benchmarks = store.list_benchmarks()
+        benchmark = args.name or (benchmarks[0]['benchmark'] if benchmarks else None)
+        runs = store.get_runs(benchmark) if benchmark else list()
+        if not runs:
+            WebODM_main.print_error(f"No runs recorded for benchmark {benchmark}")
+
+        rows = get_report(runs, args.baseline, args.report_options)
+        print_report(benchmark, rows, args.baseline or runs[0]['profile'], args.report_options)
+        if args.output:
+            write_report(args.output, rows)
+        sys.exit(0)
+
+    # read and check every dataset and profile before anything is sent
+    if not args.image_files_dirs:
+        WebODM_main.print_error("Give the directories of the datasets to run")
+    profiles = get_profiles(args.options_files)
+    datasets = get_datasets(args.image_files_dirs)
+    benchmark = args.name or time.strftime("%Y%m%d_%H%M%S")
+
+    # authorize
+    client = WebODM_main.post_authentication(WebODM_main.username, WebODM_main.password)
+    nodes = get_nodes(client, args.processing_nodes)
+
+    try:
+        statuses = asyncio.run(run_benchmark(client, store, benchmark, datasets, profiles, nodes, args.repeats, args.output_dir, args.asset))
+    except KeyboardInterrupt:
+        WebODM_main.print_error(f"KeyboardInterrupt, run the missing repeats with: python WebODM_benchmark.py run -n {benchmark} ...")
+
+    # clean up the server
+    if args.delete_projects:
+        for project_id in {r['project_id'] for r in store.get_runs(benchmark) if r['project_id'] is not None}:
+            WebODM_main.delete_project(client, project_id)
+
+    # report
+    runs = store.get_runs(benchmark)
+    print_report(benchmark, get_report(runs), runs[0]['profile'] if runs else None)
+    sys.exit(0 if all(s == status_codes.names[status_codes.COMPLETED] for s in statuses) else 1)
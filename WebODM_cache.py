@@ -0,0 +1,295 @@
+"""
+WebODM_cache.py: Reuse tasks and downloaded assets of earlier runs with the same images and options
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, json, time, shutil, hashlib, threading, concurrent.futures # standard libraries
+import WebODM_index
+
+# global variables
+
+default_cache_dir = ".webodm_cache" # same scratch directory as processed images
+default_max_size = 20 * 1000 ** 3 # size of asset store before least recently used assets are evicted (bytes)
+hash_block_size = 8 * 1024 * 1024 # bytes read at a time when hashing (8 MiB)
+
+# functions
+
+def get_file_hash(path):
+    """
+    Gets the SHA-256 hash of a file's contents, from the directory index if the file is indexed and unchanged
+
+    :param path: path to file
+    :return: hash (hex string)
+    """
+
+    # already hashed by the index
+    entry = WebODM_index.get_entry(path)
+    if entry is not None:
+        return entry['sha256']
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(hash_block_size), b''):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+def get_files_hash(paths, threads=8):
+    """
+    Hashes the contents of a set of files. The order of the files does not matter, their names do since GCP files refer to them
+
+    :param paths: paths to files
+    :param threads: number of files hashed at the same time
+    :return: hash (hex string)
+    """
+
+    # hash files in parallel, hashlib releases the GIL while hashing
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        hashes = list(executor.map(get_file_hash, paths))
+
+    # combine
+    sha256 = hashlib.sha256()
+    for name, file_hash in sorted(zip((os.path.basename(p) for p in paths), hashes)):
+        sha256.update(f"{name}:{file_hash}\n".encode("utf-8"))
+
+    return sha256.hexdigest()
+
+def normalize_options(raw_options):
+    """
+    Normalizes options, so files that differ only in order, formatting or value types give the same result
+
+    :param raw_options: options in raw JSON format (list of name/value objects)
+    :return: normalized options (str)
+    """
+
+    options = dict()
+    for option in json.loads(raw_options):
+        value = option['value']
+        options[option['name']] = str(value).lower() if isinstance(value, bool) else str(value)
+
+    return json.dumps(options, sort_keys=True)
+
+def link_or_copy(source, destination):
+    """
+    Hard links a file, or copies it if linking is not possible (ex. different file systems)
+
+    :param source: path to file
+    :param destination: path to new file, replaced if it exists
+    :return: N/A
+    """
+
+    if os.path.exists(destination):
+        os.remove(destination)
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+# classes
+
+class ResultCache:
+    """
+    Index mapping a key of the image set and options to the task that processed them, and to a
+    store of the assets already downloaded for it
+
+    The asset store is kept under a maximum size by evicting the least recently used assets.
+    Assets are hard linked between the store and the output directories where possible, so they
+    do not take up disk space twice.
+    """
+
+    def __init__(self, cache_dir=default_cache_dir, max_size=default_max_size):
+        """
+        :param cache_dir: directory of the index and asset store
+        :param max_size: maximum size of the asset store (bytes)
+        """
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        self.files_hashes = dict() # tuple of paths: hash, so keys of several options profiles hash the files once
+
+    def get_key(self, files, raw_options):
+        """
+        Gets the key of a set of upload files and options
+
+        :param files: files to upload (list of (field, path, content type) tuples)
+        :param raw_options: options in raw JSON format
+        :return: key (hex string)
+        """
+
+        # var
+        paths = tuple(path for field, path, content_type in files)
+
+        if paths not in self.files_hashes:
+            self.files_hashes[paths] = get_files_hash(paths)
+        files_hash = self.files_hashes[paths]
+
+        return hashlib.sha256(f"{files_hash}\n{normalize_options(raw_options)}".encode("utf-8")).hexdigest()
+
+    def get_asset_dir(self, key):
+        return os.path.join(self.cache_dir, "assets", key)
+
+    def read_index(self):
+        """
+        Reads the index
+
+        :param: N/A
+        :return: index (dictionary of key: entry)
+        """
+
+        if not os.path.isfile(self.index_path):
+            return dict()
+
+        with open(self.index_path, 'r') as file:
+            return json.load(file)
+
+    def write_index(self, index):
+        """
+        Writes the index, replacing the file atomically
+
+        :param index: index (dictionary of key: entry)
+        :return: N/A
+        """
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(index, file, indent=4)
+        os.replace(temp_path, self.index_path)
+
+    def get(self, key):
+        """
+        Gets the entry of a key, marking it as recently used
+
+        :param key: key from get_key
+        :return: entry (dictionary with project_id, task_id and assets), None if not cached
+        """
+
+        with self.lock:
+            index = self.read_index()
+            entry = index.get(key)
+            if entry is not None:
+                entry['last_used'] = time.time()
+                self.write_index(index)
+
+        return entry
+
+    def put(self, key, project_id, task_id):
+        """
+        Records the task processing a key
+
+        :param key: key from get_key
+        :param project_id: ID of project
+        :param task_id: ID of task
+        :return: N/A
+        """
+
+        with self.lock:
+            index = self.read_index()
+            index[key] = {'project_id': project_id, 'task_id': task_id, 'assets': dict(), 'last_used': time.time()}
+            self.write_index(index)
+
+    def forget_task(self, key):
+        """
+        Forgets the task of a key, keeping its stored assets, for example when the task is restarted with other options
+
+        :param key: key from get_key
+        :return: N/A
+        """
+
+        with self.lock:
+            index = self.read_index()
+            if key in index:
+                index[key]['task_id'] = None
+                self.write_index(index)
+
+    def remove(self, key):
+        """
+        Removes a key and its stored assets, for example when its task no longer exists
+
+        :param key: key from get_key
+        :return: N/A
+        """
+
+        with self.lock:
+            index = self.read_index()
+            index.pop(key, None)
+            self.write_index(index)
+            shutil.rmtree(self.get_asset_dir(key), ignore_errors=True)
+
+    def store_assets(self, key, asset_paths):
+        """
+        Adds downloaded assets of a key to the store, then evicts assets until the store fits its maximum size
+
+        :param key: key from get_key
+        :param asset_paths: paths to downloaded assets
+        :return: N/A
+        """
+
+        # var
+        asset_dir = self.get_asset_dir(key)
+        os.makedirs(asset_dir, exist_ok=True)
+
+        with self.lock:
+            index = self.read_index()
+            if key not in index:
+                return
+
+            for path in asset_paths:
+                link_or_copy(path, os.path.join(asset_dir, os.path.basename(path)))
+                index[key]['assets'][os.path.basename(path)] = os.path.getsize(path)
+
+            index[key]['last_used'] = time.time()
+            self.evict(index)
+            self.write_index(index)
+
+    def restore_assets(self, key, assets, dest_dir):
+        """
+        Copies stored assets of a key to a directory, if all of them are stored
+
+        :param key: key from get_key
+        :param assets: what to restore (list, ex. ['orthophoto.tif'])
+        :param dest_dir: directory to restore to
+        :return: paths of restored assets (list), None if any asset is not stored
+        """
+
+        # var
+        entry = self.get(key)
+        asset_dir = self.get_asset_dir(key)
+
+        if entry is None or not all(a in entry['assets'] and os.path.isfile(os.path.join(asset_dir, a)) for a in assets):
+            return None
+
+        # restore
+        paths = list()
+        for asset in assets:
+            path = os.path.join(dest_dir, asset)
+            link_or_copy(os.path.join(asset_dir, asset), path)
+            paths.append(path)
+
+        return paths
+
+    def evict(self, index):
+        """
+        Deletes stored assets of the least recently used keys until the store fits its maximum size.
+        Keys keep their task, so the assets can still be downloaded again without processing
+
+        :param index: index (dictionary of key: entry), updated in place
+        :return: N/A
+        """
+
+        # var
+        total_size = sum(sum(e['assets'].values()) for e in index.values())
+
+        for key, entry in sorted(index.items(), key=lambda item: item[1]['last_used']):
+            if total_size <= self.max_size:
+                break
+            if entry['assets']:
+                total_size -= sum(entry['assets'].values())
+                entry['assets'] = dict()
+                shutil.rmtree(self.get_asset_dir(key), ignore_errors=True)
@@ -0,0 +1,264 @@
+"""
+WebODM_client.py: Shared WebODM API client with a pooled keep-alive session and a JWT cached to disk
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, time, json, base64 # standard libraries
+import requests
+from requests.adapters import HTTPAdapter
+
+# global variables
+
+default_base_url = "http://localhost:8000" # used if WEBODM_URL is not set
+default_token_path = ".webodm_token.json" # cache of authentication tokens
+default_token_lifetime = 6 * 60 * 60 # WebODM default, used if the token expiry cannot be read (seconds)
+token_refresh_margin = 5 * 60 # refresh tokens this long before they expire (seconds)
+
+shared_client = None # client returned by get_client
+
+# classes
+
+class AuthenticationError(Exception):
+    """
+    Raised when WebODM rejects the credentials
+    """
+
+class WebODMClient:
+    """
+    Client for the WebODM API
+
+    All requests go through one requests Session, so connections are kept alive and reused
+    instead of paying a handshake per call. The JWT is cached on disk between runs and
+    refreshed shortly before it expires.
+    """
+
+    def __init__(self, username, password, base_url=None, token_path=default_token_path, pool_size=16):
+        """
+        :param username: username (str)
+        :param password: password (str)
+        :param base_url: URL of WebODM, defaults to WEBODM_URL or http://localhost:8000 (str)
+        :param token_path: path to token cache file (JSON), or None to not cache
+        :param pool_size: maximum number of connections kept open (int)
+        """
+
+        # var
+        self.username = username
+        self.password = password
+        self.base_url = (base_url or os.getenv("WEBODM_URL") or default_base_url).rstrip("/")
+        self.token_path = token_path
+        self.token = None
+        self.token_expires = 0
+
+        # pooled session
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        """
+        Gets the full URL of an API path
+
+        :param path: API path (ex. '/api/projects/')
+        :return: URL (str)
+        """
+
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    def login(self):
+        """
+        Makes sure a valid token is available, reading it from the cache or authenticating if needed
+
+        :param: N/A
+        :return: token
+        """
+
+        # token in memory still valid
+        if self.token and time.time() < self.token_expires - token_refresh_margin:
+            return self.token
+
+        # token in cache still valid
+        cached = self._read_cached_token()
+        if cached and time.time() < cached['expires'] - token_refresh_margin:
+            self._set_token(cached['token'], cached['expires'])
+            return self.token
+
+        # authenticate
+        res = self.session.post(self.url('/api/token-auth/'),
+                                data = {'username': self.username,
+                                        'password': self.password}).json()
+
+        if 'token' not in res:
+            raise AuthenticationError("Invalid credentials")
+
+        self._set_token(res['token'], get_token_expiry(res['token']))
+        self._write_cached_token()
+
+        return self.token
+
+    def _set_token(self, token, expires):
+        """
+        Sets the token used by the session
+
+        :param token: authentication token
+        :param expires: time the token expires (seconds since epoch)
+        :return: N/A
+        """
+
+        self.token = token
+        self.token_expires = expires
+        self.session.headers['Authorization'] = 'JWT {}'.format(token)
+
+    def _cache_key(self):
+        return f"{self.username}@{self.base_url}"
+
+    def _read_cached_token(self):
+        """
+        Reads the cached token of this user and server
+
+        :param: N/A
+        :return: dictionary with token and expires, or None if not cached
+        """
+
+        if not self.token_path or not os.path.isfile(self.token_path):
+            return None
+
+        try:
+            with open(self.token_path, 'r') as file:
+                return json.load(file).get(self._cache_key())
+        except (ValueError, OSError):
+            return None # unreadable cache is treated as empty
+
+    def _write_cached_token(self, remove=False):
+        """
+        Writes the token of this user and server to the cache, readable only by the current user
+
+        :param remove: remove the token of this user and server instead, keeping the others (bool)
+        :return: N/A
+        """
+
+        if not self.token_path:
+            return
+
+        # keep tokens of other users and servers
+        cache = dict()
+        if os.path.isfile(self.token_path):
+            try:
+                with open(self.token_path, 'r') as file:
+                    cache = json.load(file)
+            except (ValueError, OSError):
+                pass
+
+        if remove:
+            cache.pop(self._cache_key(), None)
+        else:
+            cache[self._cache_key()] = {'token': self.token, 'expires': self.token_expires}
+
+        # write
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as file:
+            json.dump(cache, file)
+
+    def request(self, method, path, **kwargs):
+        """
+        Sends an authenticated request. If the token was rejected, authenticates again and retries once
+
+        :param method: HTTP method (ex. 'GET')
+        :param path: API path or full URL
+        :param kwargs: arguments passed to requests
+        :return: response
+        """
+
+        self.login()
+        res = self.session.request(method, self.url(path), **kwargs)
+
+        # streamed bodies cannot be sent twice, open files are sent again from the start
+        body = kwargs.get('data')
+        if res.status_code == 401 and not hasattr(body, 'read') and rewind_files(kwargs.get('files')):
+            self.token_expires = 0
+            if self.token_path and os.path.isfile(self.token_path):
+                self._write_cached_token(remove=True) # cached token is no longer valid
+            self.login()
+            res = self.session.request(method, self.url(path), **kwargs)
+
+        return res
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request('PATCH', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def close(self):
+        """
+        Closes all pooled connections
+
+        :param: N/A
+        :return: N/A
+        """
+
+        self.session.close()
+
+# functions
+
+def get_token_expiry(token):
+    """
+    Reads the expiry time of a JWT
+
+    :param token: authentication token (JWT)
+    :return: time the token expires (seconds since epoch)
+    """
+
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4) # restore base64 padding
+        return json.loads(base64.urlsafe_b64decode(payload))['exp']
+    except (IndexError, KeyError, ValueError):
+        return time.time() + default_token_lifetime
+
+def rewind_files(files):
+    """
+    Rewinds the open files of a multipart upload, so it can be sent again
+
+    :param files: files passed to requests (list of (field, (file name, file, content type)) tuples or dictionary), or None
+    :return: True if every file was rewound, False if one cannot be
+    """
+
+    if not files:
+        return True
+
+    for value in (files.values() if isinstance(files, dict) else [value for field, value in files]):
+        file = value[1] if isinstance(value, (tuple, list)) else value
+        if isinstance(file, (str, bytes)):
+            continue # sent from memory
+        if not getattr(file, 'seekable', lambda: False)():
+            return False
+        file.seek(0)
+
+    return True
+
+def get_client(username, password, base_url=None):
+    """
+    Gets the client shared by all scripts, creating it on first use
+
+    :param username: username (str)
+    :param password: password (str)
+    :param base_url: URL of WebODM, defaults to WEBODM_URL or http://localhost:8000 (str)
+    :return: WebODMClient
+    """
+
+    global shared_client
+
+    if shared_client is None:
+        shared_client = WebODMClient(username, password, base_url)
+
+    return shared_client
@@ -0,0 +1,182 @@
+"""
+WebODM_common.py: Helpers shared by the scripts (credentials, errors, options, images and asset directories)
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import glob, sys, os, mimetypes # standard libraries
+from dotenv import load_dotenv
+import WebODM_client
+import WebODM_index
+
+# environment variables
+load_dotenv() # load environment variables
+username = os.getenv("USERNAME") # set environment variable
+password = os.getenv("PASSWORD") # set environment variable
+
+# global variables
+
+min_number_of_images = 5 
+
+# functions
+def validate_asset(available_assets, asset):
+    """
+    Check if assets is in available assets list. If not, set to 'all.zip'
+    
+    :param available_assets: all assets available to download (list)
+    :param asset: user inputed asset (string)
+    :return: asset (string)
+    """
+    
+    # var
+    default_asset = 'all.zip'
+    
+    # validation
+    if asset in available_assets: # check if asset available
+        # asset is avaiable, so it is returned
+        return asset
+    else: 
+        
+        # notify user of availability and print available assets
+        print(f"\nAsset ({asset}) not found in available assets:")
+        for a in available_assets:
+            print(f"\t* {a}")
+        
+        # notify user that asset set to default
+        print(f"Setting asset to \'{default_asset}\'\n")
+        
+        # return the default asset
+        return default_asset
+
+def print_error(error_message):
+    """
+    Prints an error to the console and exits the system
+    
+    :param error_message: error message to be printed
+    :return: N/A
+    """
+    
+    print(f"ERROR: {error_message} \nexiting with status 1")
+    sys.exit(1)
+    
+def post_authentication(username, password):
+    """
+    Authenticates a user. The token is cached on disk and reused by later runs until shortly before it expires
+    
+    :param username: username (str)
+    :param password: password (str)
+    :return: client shared by all scripts (WebODMClient)
+    """
+    
+    client = WebODM_client.get_client(username, password)
+    
+    # get authentication token
+    try:
+        client.login()
+    except WebODM_client.AuthenticationError:
+        print_error("Invalid credentials")
+    
+    return client
+        
+def get_image_paths(dir_path, unique_names=True):
+    """
+    Gets all image paths (JPEG, TIFF and PNG) from a given directory path and its subdirectories. The images
+    are indexed with their hashes and metadata, and later runs only read the images that changed
+    
+    :param dir_path: directory path to images
+    :param unique_names: whether images in different subdirectories must have different names
+    :return images: list of image paths
+    """
+    
+    # check directory
+    if not os.path.isdir(dir_path):
+        print_error(f"Directory {dir_path} not found")
+    
+    # var
+    index = WebODM_index.get_index(dir_path)
+    read_count = index.update()
+    image_paths = index.get_paths()
+    
+    # check names, images are identified by file name once uploaded
+    names = dict()
+    for image_path in image_paths:
+        names.setdefault(os.path.basename(image_path), list()).append(image_path)
+    duplicates = [paths for paths in names.values() if len(paths) > 1]
+    if duplicates and unique_names:
+        print_error("Images in different subdirectories have the same name: {}".format(", ".join(duplicates[0])))
+    
+    # check length
+    if len(image_paths) < min_number_of_images:
+        print_error("Less than {} images provided".format(min_number_of_images))
+    else:
+        print(f"Found {len(image_paths)} images ({read_count} new or changed)")
+    
+    # return all of the paths
+    return image_paths
+        
+def get_upload_files(dir_path, image_paths):
+    """
+    Gets the files to upload from a given list of image paths, without opening them
+    
+    :param dir_path: path to directory containing the images
+    :param image_paths: paths to the images
+    :returns: list of (field, path, content type) tuples
+    """
+
+    # create empty list of files    
+    files = list()
+    gcp_paths = list()
+    text_file_types = ["*.txt", "*.TXT"]
+    
+    # iterate through each path
+    for image_path in image_paths:
+        # append tuple to files
+        files.append(('images', image_path, mimetypes.guess_type(image_path)[0] or 'image/jpeg'))
+    
+    # append gcp data
+    for type in text_file_types: # check for gcp files
+        gcp_paths.extend(glob.glob(os.path.join(dir_path, type))) # add file paths of given type to image paths
+
+    for gcp_path in gcp_paths: # append all gcp files to end of files
+        files.append(('gcp', gcp_path, 'text/plain'))
+
+    # return files
+    return files
+
+def get_asset_dir(project_name, output_dir):
+    """
+    Gets the directory assets of a project are downloaded to, creating it if needed. If output directory not found, defaults to root directory
+    
+    :param project_name: name of project
+    :param output_dir: directory of where the files should be downloaded
+    :return: asset directory (string)
+    """
+    
+    # check that output directory is valid
+    if output_dir == None:
+        asset_dir = project_name
+    elif os.path.exists(output_dir) and os.path.isdir(output_dir):
+        asset_dir = os.path.join(output_dir, project_name)
+    else:
+        print("\nOutput_dir invalid, downloading to root directory\n")
+        asset_dir = project_name
+    
+    # make directory 
+    os.makedirs(asset_dir, exist_ok=True)
+    
+    return asset_dir
+
+def get_options(file_name):
+    """
+    Reads in a JSON file to get the various options
+    
+    :param file_name: file name of options (JSON)
+    :return: options in raw JSON format
+    """
+
+    with open(f"{file_name}", 'r') as file:
+        raw_options = file.read()
+
+    return raw_options
@@ -2,20 +2,19 @@
 WebODM_delete_project.py: delete ALL projects of a given name
 
 Author: Jonas 
-Last Updated: 2025-06-04
+Last Updated: 2026-10-18
 """
 
 # imports
-import os, sys
+import sys
 import WebODM_main
-import requests
 
 # functions
-def get_project_ids(token, project_name):
+def get_project_ids(client, project_name):
     """
     Gets list of project IDs based on inputed project_name
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_name: name of project to get ID/s for
     :return: list of project IDs
     """
@@ -24,8 +23,7 @@ def get_project_ids(token, project_name):
     project_ids = list()
     
     # get project IDs of name project_name
-    res = requests.get('http://localhost:8000/api/projects/?name={}'.format(project_name), 
-                   headers={'Authorization': 'JWT {}'.format(token)}).json()
+    res = client.get('/api/projects/', params={'name': project_name}).json()
 
     # get id for each
     for result in res:
@@ -34,18 +32,17 @@ def get_project_ids(token, project_name):
     # return list of IDs
     return project_ids
 
-def delete_projects(token, project_id):
+def delete_projects(client, project_ids):
     """
     Deletes projects based on list of ids
     
-    :param token: authentication token
-    :param project_id: list of ID having project name
+    :param client: authenticated client (WebODMClient)
+    :param project_ids: list of ID having project name
     :return: list of project IDs
     """
     
     for project_id in project_ids:
-        requests.delete("http://localhost:8000/api/projects/{}/".format(project_id), 
-                            headers={'Authorization': 'JWT {}'.format(token)})
+        client.delete("/api/projects/{}/".format(project_id))
 
     
 if __name__ == '__main__':
@@ -59,14 +56,14 @@ if __name__ == '__main__':
     # name of project to be deleted
     print(f'Deleting {project_name}')
     
-    # get token
-    token = WebODM_main.post_authentication(WebODM_main.username, WebODM_main.password)
+    # get authenticated client
+    client = WebODM_main.post_authentication(WebODM_main.username, WebODM_main.password)
     
     # get project IDs
-    project_ids = get_project_ids(token, project_name)
+    project_ids = get_project_ids(client, project_name)
     
     # delete all projects of name
-    delete_projects(token, project_ids)
+    delete_projects(client, project_ids)
     
     
 
@@ -0,0 +1,321 @@
+"""
+WebODM_download.py: Download task assets in parallel, splitting large files into resumable Range segments
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, time, json, hashlib, threading, zipfile, concurrent.futures # standard libraries
+import requests
+import WebODM_upload
+
+# global variables
+
+read_size = 1024 * 1024 # bytes read from the connection at a time (1 MiB)
+write_size = 8 * 1024 * 1024 # bytes buffered before writing to disk (8 MiB)
+min_segment_size = 32 * 1024 * 1024 # files are only split into segments at least this big (32 MiB)
+
+# classes
+
+class DownloadError(Exception):
+    """
+    Raised when an asset could not be downloaded completely
+    """
+
+# functions
+
+def print_download_progress(asset, bytes_received, total_bytes, elapsed):
+    """
+    Prints download progress and throughput to the console
+
+    :param asset: name of asset (str)
+    :param bytes_received: number of bytes received so far (int)
+    :param total_bytes: total number of bytes, None if unknown (int)
+    :param elapsed: seconds since the download started (float)
+    :return: N/A
+    """
+
+    # var
+    rate = bytes_received / elapsed if elapsed > 0 else 0 # bytes per second
+    format_bytes = WebODM_upload.format_bytes
+
+    if total_bytes:
+        print(f"Downloading {asset} . . . ({format_bytes(bytes_received)} / {format_bytes(total_bytes)}) "
+              f"({bytes_received / total_bytes * 100:2.2f}%) ({format_bytes(rate)}/s)")
+    else:
+        print(f"Downloading {asset} . . . ({format_bytes(bytes_received)}) ({format_bytes(rate)}/s)")
+
+def get_asset_info(client, url, retries=3):
+    """
+    Gets the size of an asset and whether the server accepts Range requests for it
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the asset download
+    :param retries: number of times the request is sent again after a failure
+    :return: dictionary with size (None if unknown), ranges (bool) and validator (ETag or Last-Modified)
+    """
+
+    for attempt in range(retries + 1):
+        # ask for the first byte only, a server without Range support answers with the whole file
+        try:
+            res = client.get(url, headers={'Range': 'bytes=0-0'}, stream=True)
+            res.close()
+            if res.status_code not in (206, 416):
+                res.raise_for_status()
+            break
+        except requests.RequestException as e:
+            if attempt == retries:
+                raise DownloadError(f"Asset info failed ({e})")
+            time.sleep(2 ** attempt)
+
+    if res.status_code in (206, 416): # 416 with 'bytes */0' is an empty asset
+        size = int(res.headers['Content-Range'].split('/')[-1])
+        ranges = True
+    else:
+        size = int(res.headers['Content-Length']) if 'Content-Length' in res.headers else None
+        ranges = False
+
+    return {'size': size, 'ranges': ranges,
+            'validator': res.headers.get('ETag') or res.headers.get('Last-Modified')}
+
+def get_segments(size, segments):
+    """
+    Splits a file into byte ranges
+
+    :param size: size of file (bytes)
+    :param segments: maximum number of segments
+    :return: list of [start, end (inclusive), bytes done] lists, empty for an empty file
+    """
+
+    if size == 0:
+        return list()
+
+    # var
+    count = max(1, min(segments, size // min_segment_size))
+    segment_size = -(-size // count) # round up so the last segment is the smallest
+
+    return [[start, min(start + segment_size, size) - 1, 0] for start in range(0, size, segment_size)]
+
+def get_download_state(state_path, info):
+    """
+    Reads the state of a partial download, if it belongs to the same version of the asset
+
+    :param state_path: path to download state file (JSON)
+    :param info: asset info from get_asset_info
+    :return: state (dictionary with size, validator and segments), or None if nothing to resume
+    """
+
+    if not os.path.isfile(state_path):
+        return None
+
+    with open(state_path, 'r') as file:
+        state = json.load(file)
+
+    # the asset changed on the server, start over
+    if state['size'] != info['size'] or state['validator'] != info['validator']:
+        return None
+
+    return state
+
+def save_download_state(state_path, state):
+    """
+    Writes the state of a partial download. The file is replaced atomically so a crash never leaves it half written
+
+    :param state_path: path to download state file (JSON)
+    :param state: state (dictionary with size, validator and segments)
+    :return: N/A
+    """
+
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_path, state_path)
+
+def download_segment(client, url, part_path, segment, on_bytes, retries=3):
+    """
+    Downloads one byte range of an asset into its place in the partial file, resuming from the bytes already done
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the asset download
+    :param part_path: path to partial file
+    :param segment: [start, end (inclusive), bytes done] list, bytes done is updated as data is written
+    :param on_bytes: function called with the number of bytes written after every write
+    :param retries: number of times the segment is re-requested after a failure
+    :return: N/A
+    """
+
+    for attempt in range(retries + 1):
+        start, end, done = segment
+        if start + done > end:
+            return
+
+        try:
+            res = client.get(url, headers={'Range': f'bytes={start + done}-{end}'}, stream=True)
+            if res.status_code != 206:
+                raise DownloadError(f"Range request answered with status {res.status_code}")
+
+            # large buffered writes at the segment's offset
+            with open(part_path, 'r+b') as file:
+                file.seek(start + done)
+                buffer = bytearray()
+                for chunk in res.iter_content(chunk_size=read_size):
+                    buffer.extend(chunk)
+                    if len(buffer) >= write_size:
+                        file.write(buffer)
+                        file.flush()
+                        on_bytes(len(buffer))
+                        buffer.clear()
+                file.write(buffer)
+                file.flush()
+                on_bytes(len(buffer))
+            return
+        except (requests.RequestException, DownloadError) as e:
+            if attempt == retries:
+                raise DownloadError(f"Segment {start}-{end} failed ({e})")
+            time.sleep(2 ** attempt)
+
+def download_stream(client, url, part_path, on_bytes, retries=3):
+    """
+    Downloads an asset in a single request, for servers that do not accept Range requests
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the asset download
+    :param part_path: path to partial file
+    :param on_bytes: function called with the number of bytes written after every write, negative when a failed attempt is discarded
+    :param retries: number of times the asset is re-requested after a failure, from the start since there is no Range support
+    :return: N/A
+    """
+
+    for attempt in range(retries + 1):
+        written = 0
+        try:
+            res = client.get(url, stream=True)
+            res.raise_for_status()
+
+            with open(part_path, 'wb', buffering=write_size) as file:
+                for chunk in res.iter_content(chunk_size=read_size):
+                    file.write(chunk)
+                    written += len(chunk)
+                    on_bytes(len(chunk))
+            return
+        except requests.RequestException as e:
+            on_bytes(-written)
+            if attempt == retries:
+                raise DownloadError(f"Download failed ({e})")
+            time.sleep(2 ** attempt)
+
+def get_sha256(path):
+    """
+    Gets the SHA-256 checksum of a file
+
+    :param path: path to file
+    :return: checksum (hex string)
+    """
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(write_size), b''):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+def download_asset(client, url, asset_path, segments=4, sha256=None, progress=print_download_progress, progress_interval=1.0):
+    """
+    Downloads an asset to a file. If the server accepts Range requests, the file is split into
+    segments downloaded at the same time, and an interrupted download resumes where it stopped
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the asset download
+    :param asset_path: path of the downloaded file
+    :param segments: maximum number of segments downloaded at the same time
+    :param sha256: expected SHA-256 checksum (hex string), or None to only check the size
+    :param progress: function called with (asset, bytes received, total bytes, elapsed seconds), or None
+    :param progress_interval: minimum number of seconds between progress calls
+    :return: path of the downloaded file
+    """
+
+    # var
+    asset = os.path.basename(asset_path)
+    part_path = f"{asset_path}.part"
+    state_path = f"{asset_path}.part.json"
+    info = get_asset_info(client, url)
+    lock = threading.Lock()
+
+    # resume or start over
+    state = get_download_state(state_path, info) if info['ranges'] and os.path.isfile(part_path) else None
+    if state is None and info['ranges']:
+        state = {'size': info['size'], 'validator': info['validator'], 'segments': get_segments(info['size'], segments)}
+        with open(part_path, 'wb') as file:
+            file.truncate(info['size']) # segments write into their place in the file
+        save_download_state(state_path, state)
+
+    # progress of all segments
+    counter = {'bytes': sum(s[2] for s in state['segments']) if state else 0, 'start': time.time(), 'last': 0}
+    if counter['bytes']:
+        print(f"Resuming {asset} at {WebODM_upload.format_bytes(counter['bytes'])}")
+
+    def on_bytes(num_bytes):
+        with lock:
+            counter['bytes'] += num_bytes
+            if state is not None:
+                save_download_state(state_path, state) # segments already hold the new bytes done
+            now = time.time()
+            if progress is not None and now - counter['last'] >= progress_interval:
+                counter['last'] = now
+                progress(asset, counter['bytes'], info['size'], now - counter['start'])
+
+    # download
+    if state is None:
+        download_stream(client, url, part_path, on_bytes)
+    else:
+        def on_segment_bytes(segment):
+            def on_segment(num_bytes):
+                with lock:
+                    segment[2] += num_bytes
+                on_bytes(num_bytes)
+            return on_segment
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(state['segments']))) as executor:
+            futures = [executor.submit(download_segment, client, url, part_path, s, on_segment_bytes(s)) for s in state['segments']]
+            for future in concurrent.futures.as_completed(futures):
+                future.result() # re-raise errors of failed segments
+
+    # check size and checksum
+    if info['size'] is not None and os.path.getsize(part_path) != info['size']:
+        raise DownloadError(f"{asset} is {os.path.getsize(part_path)} bytes, expected {info['size']}")
+    if sha256 is not None and get_sha256(part_path) != sha256.lower():
+        raise DownloadError(f"{asset} checksum does not match")
+    if asset.endswith(".zip") and not zipfile.is_zipfile(part_path): # only reads the zip's directory at the end of the file
+        raise DownloadError(f"{asset} is not a complete zip archive")
+
+    # complete
+    os.replace(part_path, asset_path)
+    if os.path.isfile(state_path):
+        os.remove(state_path)
+    if progress is not None:
+        progress(asset, counter['bytes'], info['size'], time.time() - counter['start'])
+
+    return asset_path
+
+def download_assets(client, project_id, task_id, assets, asset_dir, max_parallel=4, segments=4):
+    """
+    Downloads several assets of a task at the same time
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param assets: what to download (list, ex. ['orthophoto.tif', 'dsm.tif'])
+    :param asset_dir: directory of where the files should be downloaded
+    :param max_parallel: maximum number of assets downloaded at the same time
+    :param segments: maximum number of segments per asset
+    :return: paths of downloaded files (list)
+    """
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        futures = [executor.submit(download_asset, client,
+                                   "/api/projects/{}/tasks/{}/download/{}".format(project_id, task_id, asset),
+                                   os.path.join(asset_dir, asset), segments)
+                   for asset in assets]
+
+        return [future.result() for future in futures]
@@ -0,0 +1,269 @@
+"""
+WebODM_exif.py: Read camera, time and GPS metadata of images from their EXIF and DJI XMP headers, without decoding them
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import re, struct # standard libraries
+
+# global variables
+
+max_header_size = 256 * 1024 # bytes of a JPEG read before giving up on finding its metadata (256 KiB)
+
+# size in bytes of each TIFF field type
+type_sizes = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+type_formats = {1: 'B', 3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i', 11: 'f', 12: 'd'}
+
+# tags
+ifd_tags = {0x010F: 'make', 0x0110: 'model', 0x0132: 'datetime', 0x0100: 'width', 0x0101: 'height'}
+exif_tags = {0x9003: 'datetime', 0x9291: 'subsec', 0x920A: 'focal_length', 0xA405: 'focal_length_35mm', 0xA002: 'width', 0xA003: 'height'}
+exif_ifd_tag = 0x8769
+gps_ifd_tag = 0x8825
+xmp_tag = 700 # XMP packet of TIFF files
+
+# DJI writes attitude and altitudes in the XMP packet
+xmp_patterns = {'gimbal_yaw': re.compile(rb'GimbalYawDegree\s*=\s*"([-+\d.]+)"'),
+                'flight_yaw': re.compile(rb'FlightYawDegree\s*=\s*"([-+\d.]+)"'),
+                'gimbal_pitch': re.compile(rb'GimbalPitchDegree\s*=\s*"([-+\d.]+)"'),
+                'relative_altitude': re.compile(rb'RelativeAltitude\s*=\s*"([-+\d.]+)"'),
+                'central_wavelength': re.compile(rb'CentralWavelength\s*(?:=\s*"|>\s*(?:<rdf:Seq>\s*<rdf:li>)?)([-+\d.]+)')}
+
+# multispectral cameras (MicaSense, DJI, Parrot) write the band and capture of each image in the XMP packet
+xmp_text_patterns = {'band_name': re.compile(rb'BandName\s*(?:=\s*"|>\s*(?:<rdf:Seq>\s*<rdf:li>)?)([^"<]+)'),
+                     'capture_id': re.compile(rb'Capture(?:Id|UUID)\s*(?:=\s*"|>)([^"<]+)')}
+
+# functions
+
+def read_value(read, endian, field_type, count, value_offset):
+    """
+    Reads the value of a TIFF field
+
+    :param read: function reading (offset, size) bytes of the TIFF data
+    :param endian: struct byte order ('<' or '>')
+    :param field_type: TIFF field type
+    :param count: number of values
+    :param value_offset: the 4 value/offset bytes of the field
+    :return: value (str, number or tuple of numbers), None if the type is not supported
+    """
+
+    # var
+    size = type_sizes.get(field_type, 0) * count
+
+    if size == 0:
+        return None
+
+    # small values are stored in the field itself
+    data = value_offset[:size] if size <= 4 else read(struct.unpack(endian + 'I', value_offset)[0], size)
+    if len(data) < size:
+        return None
+
+    if field_type == 2: # ASCII
+        return data.split(b"\x00", 1)[0].decode("utf-8", errors="ignore").strip()
+    if field_type in (5, 10): # (S)RATIONAL
+        numbers = struct.unpack(endian + ('I' if field_type == 5 else 'i') * (2 * count), data)
+        values = tuple(n / d if d else 0.0 for n, d in zip(numbers[::2], numbers[1::2]))
+    elif field_type in type_formats:
+        values = struct.unpack(endian + type_formats[field_type] * count, data)
+    else: # UNDEFINED
+        return data
+
+    return values[0] if count == 1 else values
+
+def read_ifd(read, endian, offset):
+    """
+    Reads the fields of a TIFF image file directory
+
+    :param read: function reading (offset, size) bytes of the TIFF data
+    :param endian: struct byte order ('<' or '>')
+    :param offset: offset of directory
+    :return: fields (dictionary of tag: value)
+    """
+
+    # var
+    fields = dict()
+    data = read(offset, 2)
+
+    if len(data) < 2:
+        return fields
+
+    count = struct.unpack(endian + 'H', data)[0]
+    entries = read(offset + 2, count * 12)
+
+    for i in range(len(entries) // 12):
+        tag, field_type, value_count = struct.unpack(endian + 'HHI', entries[i * 12:i * 12 + 8])
+        fields[tag] = read_value(read, endian, field_type, value_count, entries[i * 12 + 8:i * 12 + 12])
+
+    return fields
+
+def to_degrees(value, ref):
+    """
+    Converts an EXIF GPS coordinate to signed decimal degrees
+
+    :param value: degrees, minutes, seconds (tuple)
+    :param ref: N, S, E or W
+    :return: degrees (float), None if invalid
+    """
+
+    if not isinstance(value, tuple) or len(value) != 3:
+        return None
+
+    degrees = value[0] + value[1] / 60 + value[2] / 3600
+
+    return -degrees if ref in ('S', 'W') else degrees
+
+def parse_tiff(read):
+    """
+    Reads the metadata of TIFF data (the body of an EXIF segment, or a TIFF file)
+
+    :param read: function reading (offset, size) bytes of the TIFF data
+    :return: metadata (dictionary)
+    """
+
+    # var
+    metadata = dict()
+    header = read(0, 8)
+
+    if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+        return metadata
+
+    endian = '<' if header[:2] == b"II" else '>'
+    ifd = read_ifd(read, endian, struct.unpack(endian + 'I', header[4:8])[0])
+
+    for tag, name in ifd_tags.items():
+        if ifd.get(tag) is not None:
+            metadata[name] = ifd[tag]
+
+    # XMP packet of TIFF files (stored as BYTE or UNDEFINED)
+    if ifd.get(xmp_tag) is not None:
+        metadata.update(parse_xmp(ifd[xmp_tag] if isinstance(ifd[xmp_tag], bytes) else bytes(ifd[xmp_tag])))
+
+    # camera settings
+    if isinstance(ifd.get(exif_ifd_tag), int):
+        exif = read_ifd(read, endian, ifd[exif_ifd_tag])
+        for tag, name in exif_tags.items():
+            if exif.get(tag) is not None:
+                metadata[name] = exif[tag]
+
+    # position
+    if isinstance(ifd.get(gps_ifd_tag), int):
+        gps = read_ifd(read, endian, ifd[gps_ifd_tag])
+        latitude, longitude = to_degrees(gps.get(2), gps.get(1)), to_degrees(gps.get(4), gps.get(3))
+        if latitude is not None and longitude is not None and (latitude, longitude) != (0, 0):
+            metadata['latitude'], metadata['longitude'] = latitude, longitude
+        if isinstance(gps.get(6), float):
+            metadata['altitude'] = -gps[6] if gps.get(5) in (1, b"\x01") else gps[6]
+        if isinstance(gps.get(17), float):
+            metadata['heading'] = gps[17]
+
+    return metadata
+
+def parse_xmp(data):
+    """
+    Reads the DJI attitude and altitude fields, and the multispectral band and capture fields, of an XMP packet
+
+    :param data: XMP packet (bytes)
+    :return: metadata (dictionary)
+    """
+
+    # var
+    metadata = dict()
+
+    for name, pattern in xmp_patterns.items():
+        match = pattern.search(data)
+        if match:
+            metadata[name] = float(match.group(1))
+
+    for name, pattern in xmp_text_patterns.items():
+        match = pattern.search(data)
+        if match:
+            metadata[name] = match.group(1).decode("utf-8", errors="ignore").strip()
+
+    return metadata
+
+def read_jpeg(file):
+    """
+    Reads the metadata segments of a JPEG, stopping at the image data
+
+    :param file: file opened in binary mode, positioned after the SOI marker
+    :return: metadata (dictionary)
+    """
+
+    # var
+    metadata = dict()
+    position = 2
+
+    while position < max_header_size:
+        marker = file.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF or marker[1] == 0xDA: # end of file or start of scan
+            break
+        length = struct.unpack('>H', marker[2:4])[0]
+        position += 2 + length
+
+        if marker[1] != 0xE1: # not APP1, skip
+            file.seek(length - 2, 1)
+            continue
+
+        segment = file.read(length - 2)
+        if segment.startswith(b"Exif\x00\x00"):
+            tiff = segment[6:]
+            metadata.update(parse_tiff(lambda offset, size: tiff[offset:offset + size]))
+        elif b"http://ns.adobe.com/xap/1.0/" in segment[:64]:
+            metadata.update(parse_xmp(segment))
+
+    return metadata
+
+def read_png(file):
+    """
+    Reads the eXIf chunk of a PNG, stopping at the image data
+
+    :param file: file opened in binary mode, positioned after the signature
+    :return: metadata (dictionary)
+    """
+
+    while True:
+        header = file.read(8)
+        if len(header) < 8 or header[4:8] == b"IDAT":
+            return dict()
+
+        length = struct.unpack('>I', header[:4])[0]
+        if header[4:8] == b"eXIf":
+            tiff = file.read(length)
+            return parse_tiff(lambda offset, size: tiff[offset:offset + size])
+
+        file.seek(length + 4, 1) # data and CRC
+
+def read_metadata(path):
+    """
+    Reads the camera, time and GPS metadata of an image (JPEG, TIFF or PNG). Only the headers are read
+
+    :param path: path to image
+    :return: metadata (dictionary with any of make, model, datetime, width, height, focal_length,
+             latitude, longitude, altitude, heading, gimbal_yaw, flight_yaw, gimbal_pitch, relative_altitude,
+             subsec, band_name, central_wavelength and capture_id)
+    """
+
+    with open(path, 'rb') as file:
+        signature = file.read(8)
+
+        if signature[:2] == b"\xFF\xD8":
+            file.seek(2)
+            metadata = read_jpeg(file)
+        elif signature[:4] in (b"II*\x00", b"MM\x00*"):
+            def read(offset, size):
+                file.seek(offset)
+                return file.read(size)
+            metadata = parse_tiff(read)
+        elif signature == b"\x89PNG\r\n\x1a\n":
+            metadata = read_png(file)
+        else:
+            metadata = dict()
+
+    # direction the camera faces, GPSImgDirection if written, otherwise DJI's gimbal or aircraft yaw
+    if 'heading' not in metadata:
+        yaw = metadata.get('gimbal_yaw', metadata.get('flight_yaw'))
+        if yaw is not None:
+            metadata['heading'] = yaw % 360
+
+    return metadata
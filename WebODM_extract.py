@@ -0,0 +1,486 @@
+"""
+WebODM_extract.py: Extract all.zip while it downloads, or pull selected members out of it with Range requests
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, struct, zlib, zipfile, fnmatch, shutil # standard libraries
+import WebODM_download
+
+# global variables
+
+read_size = 1024 * 1024 # bytes read from the connection at a time (1 MiB)
+write_size = 8 * 1024 * 1024 # bytes buffered before writing to disk (8 MiB)
+range_block_size = 8 * 1024 * 1024 # bytes fetched per Range request by RangeFile (8 MiB)
+
+local_header_signature = b"PK\x03\x04"
+data_descriptor_signature = b"PK\x07\x08"
+central_directory_signatures = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06")
+
+# classes
+
+class ExtractError(Exception):
+    """
+    Raised when an archive cannot be extracted
+    """
+
+class RangeFile:
+    """
+    Read-only, seekable file over HTTP Range requests
+
+    Lets zipfile read the central directory at the end of a remote archive and then only
+    the members that are needed, without downloading the rest of the archive.
+    """
+
+    def __init__(self, client, url, size):
+        """
+        :param client: authenticated client (WebODMClient)
+        :param url: API path of the file
+        :param size: size of the file (bytes)
+        """
+
+        self.client = client
+        self.url = url
+        self.size = size
+        self.position = 0
+        self.block_start = 0
+        self.block = b""
+        self.requests = 0 # number of requests sent
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self.position = offset
+        elif whence == os.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.size + offset
+
+        return self.position
+
+    def read(self, size=-1):
+        """
+        Reads up to size bytes from the current position, fetching at least one block per request
+
+        :param size: maximum number of bytes to read, all remaining bytes if negative (int)
+        :return: data (bytes)
+        """
+
+        # var
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = max(0, min(size, self.size - self.position))
+        offset = self.position - self.block_start
+
+        # fetch if the data is not in the current block
+        if size and not (0 <= offset and offset + size <= len(self.block)):
+            end = min(self.size, self.position + max(size, range_block_size)) - 1
+            res = self.client.get(self.url, headers={'Range': f'bytes={self.position}-{end}'})
+            self.requests += 1
+            if res.status_code != 206:
+                raise ExtractError(f"Range request answered with status {res.status_code}")
+            self.block_start, self.block, offset = self.position, res.content, 0
+
+        self.position += size
+        return self.block[offset:offset + size]
+
+class StreamReader:
+    """
+    Reads exact numbers of bytes from an iterator of chunks, such as a streamed response
+    """
+
+    def __init__(self, chunks):
+        """
+        :param chunks: iterator of chunks (bytes)
+        """
+
+        self.chunks = chunks
+        self.buffer = bytearray()
+
+    def fill(self, size):
+        """
+        Reads chunks until at least size bytes are buffered, or the stream ends
+
+        :param size: number of bytes wanted (int)
+        :return: True if size bytes are buffered, False if the stream ended first
+        """
+
+        while len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return False
+            self.buffer.extend(chunk)
+
+        return True
+
+    def read(self, size):
+        """
+        Reads exactly size bytes
+
+        :param size: number of bytes (int)
+        :return: data (bytes)
+        """
+
+        if not self.fill(size):
+            raise ExtractError("Archive ended unexpectedly")
+
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def read_chunk(self):
+        """
+        Reads whatever is buffered, or the next chunk if nothing is
+
+        :param: N/A
+        :return: data (bytes), empty once the stream has ended
+        """
+
+        if not self.buffer:
+            self.fill(1)
+
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def unread(self, data):
+        """
+        Puts data back at the front of the stream
+
+        :param data: data (bytes)
+        :return: N/A
+        """
+
+        self.buffer[:0] = data
+
+class CheckedFile:
+    """
+    Writes to a file while keeping the CRC-32 and size of the data, to check an extracted member against its header
+    """
+
+    def __init__(self, file):
+        """
+        :param file: file to write to
+        """
+
+        self.file = file
+        self.crc = 0
+        self.size = 0
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        return self.file.write(data)
+
+# functions
+
+def get_member_path(dest_dir, name):
+    """
+    Gets the path a member of an archive is extracted to, refusing paths that would leave the destination directory
+
+    :param dest_dir: directory the archive is extracted to
+    :param name: name of member
+    :return: path (str)
+    """
+
+    path = os.path.normpath(os.path.join(dest_dir, name))
+
+    if os.path.isabs(name) or not path.startswith(os.path.normpath(dest_dir) + os.sep):
+        raise ExtractError(f"Member {name} would be extracted outside of {dest_dir}")
+
+    return path
+
+def is_selected(name, patterns):
+    """
+    Checks if a member of an archive matches any of the given patterns
+
+    :param name: name of member (ex. 'odm_orthophoto/odm_orthophoto.tif')
+    :param patterns: shell-style patterns (list, ex. ['odm_dem/*']), None or empty to select everything
+    :return: True if selected, False otherwise
+    """
+
+    if not patterns:
+        return True
+
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(os.path.basename(name), p) for p in patterns)
+
+def read_local_header(reader):
+    """
+    Reads the local header of the next member of a streamed archive
+
+    :param reader: StreamReader positioned at a header
+    :return: header (dictionary), None once the central directory is reached
+    """
+
+    signature = reader.read(4)
+    if signature in central_directory_signatures:
+        return None
+    if signature != local_header_signature:
+        raise ExtractError("Invalid local header in archive")
+
+    # fixed fields
+    (version, flags, method, mod_time, mod_date, crc, compressed_size, size,
+     name_length, extra_length) = struct.unpack("<HHHHHLLLHH", reader.read(26))
+    name = reader.read(name_length).decode("utf-8" if flags & 0x800 else "cp437")
+    extra = reader.read(extra_length)
+
+    # zip64 sizes are kept in the extra field
+    zip64 = False
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, field_length = struct.unpack("<HH", extra[position:position + 4])
+        if field_id == 0x0001:
+            zip64 = True
+            values = list(struct.unpack(f"<{field_length // 8}Q", extra[position + 4:position + 4 + field_length // 8 * 8]))
+            if size == 0xFFFFFFFF and values:
+                size = values.pop(0)
+            if compressed_size == 0xFFFFFFFF and values:
+                compressed_size = values.pop(0)
+        position += 4 + field_length
+
+    return {'name': name, 'flags': flags, 'method': method, 'crc': crc, 'compressed_size': compressed_size,
+            'size': size, 'zip64': zip64, 'descriptor': bool(flags & 0x08)}
+
+def read_data_descriptor(reader, header):
+    """
+    Reads the data descriptor following the data of a member
+
+    :param reader: StreamReader positioned after the data
+    :param header: header of member from read_local_header
+    :return: dictionary with crc, compressed_size and size of the member
+    """
+
+    if not reader.fill(4):
+        raise ExtractError("Archive ended unexpectedly")
+    if bytes(reader.buffer[:4]) == data_descriptor_signature:
+        reader.read(4)
+
+    crc, compressed_size, size = struct.unpack("<LQQ" if header['zip64'] else "<LLL", reader.read(20 if header['zip64'] else 12))
+
+    return {'crc': crc, 'compressed_size': compressed_size, 'size': size}
+
+def copy_known_size(reader, header, file):
+    """
+    Copies the data of a member whose compressed size is in its header
+
+    :param reader: StreamReader positioned at the data
+    :param header: header of member from read_local_header
+    :param file: file to write to, None to skip the member
+    :return: N/A
+    """
+
+    # var
+    remaining = header['compressed_size']
+    decompressor = zlib.decompressobj(-15) if header['method'] == zipfile.ZIP_DEFLATED else None
+
+    while remaining:
+        data = reader.read(min(remaining, read_size))
+        remaining -= len(data)
+        if file is not None:
+            file.write(decompressor.decompress(data) if decompressor else data)
+
+    if file is not None and decompressor:
+        file.write(decompressor.flush())
+
+def copy_deflated(reader, file):
+    """
+    Copies the data of a deflated member of unknown size. The deflate stream marks its own end
+
+    :param reader: StreamReader positioned at the data
+    :param file: file to write to, None to skip the member
+    :return: N/A
+    """
+
+    decompressor = zlib.decompressobj(-15)
+
+    while not decompressor.eof:
+        data = reader.read_chunk()
+        if not data:
+            raise ExtractError("Archive ended unexpectedly")
+        output = decompressor.decompress(data)
+        if file is not None:
+            file.write(output)
+
+    # bytes after the end of the deflate stream belong to the descriptor
+    reader.unread(decompressor.unused_data)
+
+def copy_stored(reader, header, file):
+    """
+    Copies the data of a stored member of unknown size, ending at the data descriptor whose CRC and size match the data
+
+    :param reader: StreamReader positioned at the data
+    :param header: header of member from read_local_header
+    :param file: file to write to, None to skip the member
+    :return: N/A
+    """
+
+    # var
+    crc = 0 # crc of the data written so far
+    size = 0 # size of the data written so far
+    descriptor_length = 24 if header['zip64'] else 16
+    search_from = 0
+
+    while True:
+        # look for a descriptor in the buffered data
+        buffer = reader.buffer
+        index = buffer.find(data_descriptor_signature, search_from)
+
+        if index != -1:
+            if not reader.fill(index + descriptor_length):
+                raise ExtractError("Archive ended unexpectedly")
+            buffer = reader.buffer
+            descriptor = buffer[index + 4:index + descriptor_length]
+            descriptor_crc, compressed_size = struct.unpack("<LQ" if header['zip64'] else "<LL", descriptor[:12 if header['zip64'] else 8])
+
+            # a signature inside the data is skipped, the real descriptor matches the data before it
+            if size + index == compressed_size and zlib.crc32(buffer[:index], crc) == descriptor_crc:
+                if file is not None:
+                    file.write(buffer[:index])
+                del buffer[:index]
+                return
+
+            search_from = index + 1
+            continue
+
+        # no descriptor yet, write all but the last bytes that could start a signature
+        keep = len(data_descriptor_signature) - 1
+        if len(buffer) > keep:
+            data = bytes(buffer[:-keep])
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            if file is not None:
+                file.write(data)
+            del buffer[:-keep]
+        search_from = 0
+
+        if not reader.fill(len(reader.buffer) + 1):
+            raise ExtractError("Archive ended unexpectedly")
+
+def extract_zip_stream(client, url, dest_dir, patterns=None):
+    """
+    Extracts a zip archive while it is downloaded, without writing the archive itself to disk
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the archive download
+    :param dest_dir: directory to extract to
+    :param patterns: shell-style patterns of members to extract (list), None to extract everything
+    :return: paths of extracted files (list)
+    """
+
+    # var
+    paths = list()
+    res = client.get(url, stream=True)
+    res.raise_for_status()
+    reader = StreamReader(res.iter_content(chunk_size=read_size))
+
+    # extract members in the order they arrive
+    while True:
+        header = read_local_header(reader)
+        if header is None:
+            break
+
+        if header['method'] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ExtractError(f"Unsupported compression of {header['name']}")
+
+        # directories have no data, but may still be followed by a descriptor
+        file = None
+        if header['name'].endswith("/"):
+            if is_selected(header['name'], patterns):
+                os.makedirs(get_member_path(dest_dir, header['name']), exist_ok=True)
+        elif is_selected(header['name'], patterns):
+            path = get_member_path(dest_dir, header['name'])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            file = CheckedFile(open(path, 'wb', buffering=write_size))
+            paths.append(path)
+
+        # var
+        verified = False
+
+        try:
+            if not header['descriptor'] or header['compressed_size']:
+                copy_known_size(reader, header, file)
+            elif header['method'] == zipfile.ZIP_DEFLATED:
+                copy_deflated(reader, file)
+            else:
+                copy_stored(reader, header, file)
+
+            # the descriptor holds the CRC and size when the header could not
+            expected = read_data_descriptor(reader, header) if header['descriptor'] else header
+            verified = file is None or (file.crc == expected['crc'] and file.size == expected['size'])
+        finally:
+            # a corrupt or partial member is not left behind looking complete
+            if file is not None:
+                file.file.close()
+                if not verified:
+                    os.remove(path)
+                    paths.remove(path)
+
+        if not verified:
+            raise ExtractError(f"{header['name']} does not match its CRC-32 or size, the archive is corrupt")
+
+    res.close()
+    return paths
+
+def extract_remote_zip(client, url, size, dest_dir, patterns=None):
+    """
+    Extracts selected members of a remote zip archive, reading only its central directory and those members
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the archive download
+    :param size: size of archive (bytes)
+    :param dest_dir: directory to extract to
+    :param patterns: shell-style patterns of members to extract (list), None to extract everything
+    :return: paths of extracted files (list)
+    """
+
+    # var
+    paths = list()
+
+    with zipfile.ZipFile(RangeFile(client, url, size)) as archive:
+        for member in archive.infolist():
+            if not is_selected(member.filename, patterns):
+                continue
+
+            path = get_member_path(dest_dir, member.filename)
+            if member.is_dir():
+                os.makedirs(path, exist_ok=True)
+                continue
+
+            # copy in large reads, each one a single Range request
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with archive.open(member) as source, open(path, 'wb') as file:
+                shutil.copyfileobj(source, file, range_block_size)
+            paths.append(path)
+
+    return paths
+
+def extract_asset(client, url, dest_dir, patterns=None):
+    """
+    Extracts a zip asset without keeping a copy of the archive. Selected members are read with Range
+    requests if the server supports them, otherwise (and when everything is extracted, which one
+    sequential stream does faster) the archive is extracted while it streams
+
+    :param client: authenticated client (WebODMClient)
+    :param url: API path of the archive download
+    :param dest_dir: directory to extract to
+    :param patterns: shell-style patterns of members to extract (list), None to extract everything
+    :return: paths of extracted files (list)
+    """
+
+    # a full extract reads every member anyway
+    if not patterns:
+        return extract_zip_stream(client, url, dest_dir, patterns)
+
+    info = WebODM_download.get_asset_info(client, url)
+
+    if info['ranges']:
+        return extract_remote_zip(client, url, info['size'], dest_dir, patterns)
+    else:
+        return extract_zip_stream(client, url, dest_dir, patterns)
@@ -0,0 +1,885 @@
+"""
+WebODM_fake_server.py: Local stand-in for the WebODM and NodeODM APIs, with configurable latency, bandwidth, failures and processing times
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import io, re, sys, json, time, uuid, random, base64, zipfile, argparse, threading, http.server, email.parser, urllib.parse # standard libraries
+import requests
+import status_codes
+
+# global variables
+
+default_port = 8000
+chunk_size = 64 * 1024 # bytes sent or read between bandwidth checks
+final_statuses = (status_codes.FAILED, status_codes.COMPLETED, status_codes.CANCELED)
+pending_restart = 3 # pending action WebODM reports until a worker picks up a restart
+asset_names = ("all.zip", "orthophoto.tif", "dsm.tif", "dtm.tif", "georeferenced_model.laz", "textured_model.zip")
+
+# classes
+
+class Throttle:
+    """
+    Token bucket shared by every connection, so all transfers together stay under a bandwidth cap
+    """
+
+    def __init__(self, rate):
+        """
+        :param rate: bandwidth cap (bytes per second), None for no cap
+        """
+
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_time = time.time() # when the bucket is empty again
+
+    def consume(self, size):
+        """
+        Waits until size bytes fit under the cap
+
+        :param size: bytes about to be sent or received
+        :return: N/A
+        """
+
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = time.time()
+            self.next_time = max(self.next_time, now) + size / self.rate
+            delay = self.next_time - now - size / self.rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+class FakeServer:
+    """
+    In-memory WebODM (under /api/) and NodeODM (under /info, /options and /task/) served from one port. Tasks queue on
+    processing nodes with a limited number of parallel tasks and run for a simulated time, uploads and downloads share
+    bandwidth caps, and any request can be made to fail. Counters of every endpoint are served at /stats
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, nodes=1, max_parallel_tasks=2, latency=0.0, jitter=0.0, upload_rate=None,
+                 download_rate=None, error_rate=0.0, error_paths=None, task_failure_rate=0.0, base_duration=5.0,
+                 seconds_per_image=0.1, duration_jitter=0.0, asset_size=5.0, token_lifetime=6 * 60 * 60, restart_delay=1.0, seed=None):
+        """
+        :param host: address to listen on
+        :param port: port to listen on, 0 for any free port
+        :param nodes: number of processing nodes WebODM has
+        :param max_parallel_tasks: tasks each node runs at the same time, others are queued
+        :param latency: time added to every request (seconds)
+        :param jitter: random time up to this added to the latency (seconds)
+        :param upload_rate: bandwidth cap of uploads (MB/s), None for no cap
+        :param download_rate: bandwidth cap of downloads (MB/s), None for no cap
+        :param error_rate: share of requests answered with an error 500 (0 to 1)
+        :param error_paths: substrings of the paths that can fail (ex. ['upload', 'download']), None for every path
+        :param task_failure_rate: share of tasks that end as failed (0 to 1)
+        :param base_duration: processing time of a task without images (seconds)
+        :param seconds_per_image: processing time added per image (seconds)
+        :param duration_jitter: share the processing time randomly varies by (0 to 1)
+        :param asset_size: size of every asset (MB)
+        :param token_lifetime: time before tokens expire (seconds)
+        :param restart_delay: time before a restart of a WebODM task is picked up (seconds)
+        :param seed: seed of the random failures and durations, None for a different run every time
+        """
+
+        # settings, can be changed while the server runs
+        self.latency = latency
+        self.jitter = jitter
+        self.upload_throttle = Throttle(upload_rate * 1e6 if upload_rate else None)
+        self.download_throttle = Throttle(download_rate * 1e6 if download_rate else None)
+        self.error_rate = error_rate
+        self.error_paths = error_paths
+        self.task_failure_rate = task_failure_rate
+        self.base_duration = base_duration
+        self.seconds_per_image = seconds_per_image
+        self.duration_jitter = duration_jitter
+        self.token_lifetime = token_lifetime
+        self.restart_delay = restart_delay
+        self.random = random.Random(seed)
+
+        # state
+        self.lock = threading.RLock()
+        self.nodes = {i: {'id': i, 'hostname': host, 'port': None, 'label': f"node-{i}", 'online': True, 'max_images': None,
+                          'max_parallel_tasks': max_parallel_tasks, 'last_refreshed': None, 'available_options': []}
+                      for i in range(1, nodes + 1)}
+        self.projects = dict() # id: project
+        self.tasks = dict() # id: task
+        self.tokens = dict() # token: time it expires
+        self.stats = dict() # endpoint: counters
+        self.asset = get_asset(asset_size * 1e6)
+        self.asset_etag = f'"{uuid.uuid4().hex}"'
+
+        # server
+        self.server = http.server.ThreadingHTTPServer((host, port), FakeRequestHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        for node in self.nodes.values(): # NodeODM of every node is this server
+            node['port'] = self.server.server_address[1]
+        self.running = False
+        self.threads = list()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """
+        Starts serving and simulating tasks in background threads
+
+        :param: N/A
+        :return: self
+        """
+
+        self.running = True
+        self.threads = [threading.Thread(target=self.server.serve_forever, daemon=True),
+                        threading.Thread(target=self.run_scheduler, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stops serving
+
+        :param: N/A
+        :return: N/A
+        """
+
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, endpoint, error=False, bytes_in=0, bytes_out=0, seconds=0.0):
+        """
+        Adds to the counters of an endpoint
+
+        :param endpoint: name of endpoint (ex. 'GET task')
+        :param error: whether an error was injected
+        :param bytes_in: bytes received
+        :param bytes_out: bytes sent
+        :param seconds: time taken to answer
+        :return: N/A
+        """
+
+        with self.lock:
+            stats = self.stats.setdefault(endpoint, {'requests': 0, 'errors': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0})
+            stats['requests'] += 1
+            stats['errors'] += int(error)
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['seconds'] += seconds
+
+    def create_token(self):
+        """
+        Creates a JWT, unsigned since only this server reads it
+
+        :param: N/A
+        :return: token (str)
+        """
+
+        # var
+        expires = int(time.time() + self.token_lifetime)
+        encode = lambda part: base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+        token = f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode({'exp': expires, 'jti': uuid.uuid4().hex})}.fake"
+
+        with self.lock:
+            self.tokens[token] = expires
+
+        return token
+
+    def is_authorized(self, header):
+        """
+        Checks the Authorization header of a WebODM request
+
+        :param header: Authorization header (ex. 'JWT <token>'), None if missing
+        :return: bool
+        """
+
+        # var
+        token = (header or "").partition(" ")[2]
+
+        with self.lock:
+            return token in self.tokens and self.tokens[token] > time.time()
+
+    def create_task(self, project_id=None, options=None, processing_node=None, webhook=None, name=None, partial=False):
+        """
+        Creates a task, queued at once unless it is partial
+
+        :param project_id: ID of project, None for NodeODM tasks
+        :param options: options (list of name and value)
+        :param processing_node: ID of processing node, None for the least loaded one
+        :param webhook: URL called when the task finishes, or None
+        :param name: name of task
+        :param partial: whether images are still being added
+        :return: task (dictionary)
+        """
+
+        with self.lock:
+            if processing_node is None:
+                processing_node = min(self.nodes, key=lambda i: self.get_node_load(i))
+            task = {'id': str(uuid.uuid4()), 'project': project_id, 'name': name or "Task", 'options': options or list(),
+                    'processing_node': processing_node, 'webhook': webhook or None, 'images': dict(), 'partial': partial,
+                    'status': None if partial else status_codes.QUEUED, 'created': time.time(), 'started': None,
+                    'duration': None, 'fail': False, 'last_error': "", 'pending_action': None, 'pending_until': None}
+            self.tasks[task['id']] = task
+
+        return task
+
+    def get_node_load(self, node_id):
+        """
+        Gets the number of unfinished tasks of a node
+
+        :param node_id: ID of processing node
+        :return: number of tasks (int)
+        """
+
+        with self.lock:
+            return sum(1 for t in self.tasks.values() if t['processing_node'] == node_id and t['status'] in (status_codes.QUEUED, status_codes.RUNNING))
+
+    def queue_task(self, task):
+        """
+        Queues a task for processing (ex. when committed or restarted)
+
+        :param task: task (dictionary)
+        :return: N/A
+        """
+
+        with self.lock:
+            task.update(partial=False, status=status_codes.QUEUED, started=None, duration=None, last_error="", pending_action=None,
+                        pending_until=None)
+
+    def restart_task(self, task):
+        """
+        Records a restart as the task's pending action, as WebODM does, so the task keeps its status and assets until
+        the scheduler picks the restart up
+
+        :param task: task (dictionary)
+        :return: N/A
+        """
+
+        with self.lock:
+            task.update(pending_action=pending_restart, pending_until=time.time() + self.restart_delay)
+
+    def run_scheduler(self):
+        """
+        Starts queued tasks on nodes with a free slot and finishes tasks whose simulated time is up, calling their webhooks
+
+        :param: N/A
+        :return: N/A
+        """
+
+        while self.running:
+            finished = list()
+
+            with self.lock:
+                now = time.time()
+                for task in self.tasks.values():
+                    if task['pending_action'] == pending_restart and now >= task['pending_until']:
+                        self.queue_task(task)
+                    if task['status'] == status_codes.RUNNING and now >= task['started'] + task['duration']:
+                        task['status'] = status_codes.FAILED if task['fail'] else status_codes.COMPLETED
+                        task['last_error'] = "Simulated failure" if task['fail'] else ""
+                        finished.append(task)
+
+                # oldest queued task first on each node
+                for task in sorted(self.tasks.values(), key=lambda t: t['created']):
+                    if task['status'] != status_codes.QUEUED:
+                        continue
+                    node = self.nodes.get(task['processing_node'])
+                    running = sum(1 for t in self.tasks.values() if t['processing_node'] == task['processing_node'] and t['status'] == status_codes.RUNNING)
+                    if node is None or running >= node['max_parallel_tasks']:
+                        continue
+                    duration = self.base_duration + self.seconds_per_image * len(task['images'])
+                    task.update(status=status_codes.RUNNING, started=now, fail=self.random.random() < self.task_failure_rate,
+                                duration=duration * (1 + self.random.uniform(-self.duration_jitter, self.duration_jitter)))
+
+            for task in finished:
+                if task['webhook']:
+                    threading.Thread(target=call_webhook, args=(task['webhook'], self.get_nodeodm_task(task)), daemon=True).start()
+
+            time.sleep(0.05)
+
+    def get_progress(self, task):
+        """
+        Gets the processing time and progress of a task
+
+        :param task: task (dictionary)
+        :return: processing time (milliseconds, -1 if not started), progress (0 to 1)
+        """
+
+        if task['started'] is None:
+            return -1, 0.0
+        if task['status'] == status_codes.RUNNING:
+            elapsed = time.time() - task['started']
+            return int(elapsed * 1000), min(elapsed / task['duration'], 0.99) if task['duration'] else 0.0
+
+        return int(task['duration'] * 1000), 1.0 if task['status'] == status_codes.COMPLETED else 0.0
+
+    def get_webodm_task(self, task):
+        """
+        Gets a task as WebODM's API returns it
+
+        :param task: task (dictionary)
+        :return: task (dictionary)
+        """
+
+        # var
+        processing_time, progress = self.get_progress(task)
+        node = self.nodes.get(task['processing_node'])
+
+        return {'id': task['id'], 'project': task['project'], 'name': task['name'], 'processing_node': task['processing_node'],
+                'processing_node_name': node['label'] if node else None, 'status': task['status'], 'processing_time': processing_time,
+                'running_progress': progress, 'images_count': len(task['images']), 'options': task['options'],
+                'available_assets': list(asset_names) if task['status'] == status_codes.COMPLETED else list(),
+                'last_error': task['last_error'] or None, 'partial': task['partial'], 'pending_action': task['pending_action'],
+                'created_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(task['created']))}
+
+    def get_nodeodm_task(self, task):
+        """
+        Gets a task as NodeODM's API returns it
+
+        :param task: task (dictionary)
+        :return: task (dictionary)
+        """
+
+        # var
+        processing_time, progress = self.get_progress(task)
+        status = {'code': task['status'] or status_codes.QUEUED}
+        if task['last_error']:
+            status['errorMessage'] = task['last_error']
+
+        return {'uuid': task['id'], 'name': task['name'], 'dateCreated': int(task['created'] * 1000), 'processingTime': processing_time,
+                'status': status, 'options': task['options'], 'imagesCount': len(task['images']), 'progress': progress * 100}
+
+class FakeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Routes requests to the WebODM and NodeODM endpoints, applying the latency, bandwidth caps and failures of the server
+    """
+
+    protocol_version = "HTTP/1.1" # keep connections alive, as the servers do
+    disable_nagle_algorithm = True # headers and body are written separately, without this every response waits on a delayed ACK
+
+    # method, path pattern, name of handler
+    routes = [
+        ("POST", r"/api/token-auth/", "post_token"),
+        ("GET", r"/api/processingnodes/", "get_nodes"),
+        ("POST", r"/api/processingnodes/", "post_node"),
+        ("GET", r"/api/processingnodes/(\d+)/", "get_node"),
+        ("DELETE", r"/api/processingnodes/(\d+)/", "delete_node"),
+        ("GET", r"/api/projects/", "get_projects"),
+        ("POST", r"/api/projects/", "post_project"),
+        ("GET", r"/api/projects/(\d+)/", "get_project"),
+        ("DELETE", r"/api/projects/(\d+)/", "delete_project"),
+        ("GET", r"/api/projects/(\d+)/tasks/", "get_tasks"),
+        ("POST", r"/api/projects/(\d+)/tasks/", "post_task"),
+        ("GET", r"/api/projects/(\d+)/tasks/([\w-]+)/", "get_task"),
+        ("PATCH", r"/api/projects/(\d+)/tasks/([\w-]+)/", "patch_task"),
+        ("POST", r"/api/projects/(\d+)/tasks/([\w-]+)/upload/", "post_upload"),
+        ("POST", r"/api/projects/(\d+)/tasks/([\w-]+)/(commit|restart|cancel|remove|duplicate)/", "post_action"),
+        ("GET", r"/api/projects/(\d+)/tasks/([\w-]+)/download/([\w.-]+)", "get_download"),
+        ("GET", r"/info", "get_info"),
+        ("GET", r"/options", "get_options"),
+        ("GET", r"/task/list", "get_node_tasks"),
+        ("POST", r"/task/new/init", "post_node_init"),
+        ("POST", r"/task/new/upload/([\w-]+)", "post_node_upload"),
+        ("POST", r"/task/new/commit/([\w-]+)", "post_node_commit"),
+        ("POST", r"/task/new", "post_node_task"),
+        ("GET", r"/task/([\w-]+)/info", "get_node_task"),
+        ("GET", r"/task/([\w-]+)/output", "get_node_output"),
+        ("GET", r"/task/([\w-]+)/download/([\w.-]+)", "get_download_node"),
+        ("POST", r"/task/(cancel|remove|restart)", "post_node_action"),
+        ("GET", r"/stats", "get_stats"),
+        ("POST", r"/stats/reset", "post_stats_reset"),
+    ]
+
+    def log_message(self, format, *args):
+        pass # requests are not printed
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def do_PATCH(self):
+        self.route("PATCH")
+
+    def do_DELETE(self):
+        self.route("DELETE")
+
+    def route(self, method):
+        """
+        Reads the request, applies latency and failures, and calls the handler of its endpoint
+
+        :param method: HTTP method
+        :return: N/A
+        """
+
+        # var
+        fake = self.server.fake
+        start = time.time()
+        path = urllib.parse.urlsplit(self.path).path
+        self.bytes_out = 0
+
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                break
+        else:
+            self.read_body()
+            self.send_json(404, {'detail': "Not found."})
+            return
+
+        self.body = self.read_body()
+
+        # latency
+        delay = fake.latency + (fake.random.uniform(0, fake.jitter) if fake.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        # failure injection, stats and NodeODM are never failed
+        error = name not in ("get_stats", "post_stats_reset") and fake.error_rate and \
+                (fake.error_paths is None or any(p in path for p in fake.error_paths)) and fake.random.random() < fake.error_rate
+
+        try:
+            if error:
+                self.send_json(500, {'detail': "Simulated error"})
+            elif path.startswith("/api/") and name != "post_token" and not fake.is_authorized(self.headers.get('Authorization')):
+                self.send_json(401, {'detail': "Authentication credentials were not provided."})
+            else:
+                getattr(self, name)(*match.groups())
+        except (BrokenPipeError, ConnectionResetError): # client went away mid-transfer
+            pass
+        finally:
+            fake.count(f"{method} {name}", bool(error), len(self.body), self.bytes_out, time.time() - start)
+
+    def read_body(self):
+        """
+        Reads the body of the request under the upload bandwidth cap
+
+        :param: N/A
+        :return: body (bytes)
+        """
+
+        # var
+        remaining = int(self.headers.get('Content-Length') or 0)
+        chunks = list()
+
+        while remaining > 0:
+            self.server.fake.upload_throttle.consume(min(chunk_size, remaining))
+            chunk = self.rfile.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+
+        return b"".join(chunks)
+
+    def get_fields(self):
+        """
+        Parses the body of the request as a multipart form, a URL encoded form or JSON
+
+        :param: N/A
+        :return: fields (dictionary of name: value), files (list of (name, size))
+        """
+
+        # var
+        content_type = self.headers.get('Content-Type') or ""
+        fields = dict()
+        files = list()
+
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + self.body)
+            for part in message.get_payload() if message.is_multipart() else list():
+                payload = part.get_payload(decode=True) or b""
+                if part.get_filename():
+                    files.append((part.get_filename(), len(payload)))
+                else:
+                    fields[part.get_param('name', header='content-disposition')] = payload.decode(errors="replace")
+        elif content_type.startswith("application/json"):
+            fields = json.loads(self.body or b"{}")
+        elif self.body:
+            fields = {k: v[0] for k, v in urllib.parse.parse_qs(self.body.decode()).items()}
+
+        return fields, files
+
+    def send_json(self, code, body):
+        """
+        Sends a JSON response
+
+        :param code: HTTP status code
+        :param body: body (JSON serializable)
+        :return: N/A
+        """
+
+        # var
+        data = json.dumps(body).encode() if code != 204 else b"" # No Content has no body, keep-alive clients would misread it
+
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.bytes_out += len(data)
+
+    def send_asset(self, data, name):
+        """
+        Sends an asset under the download bandwidth cap, answering Range requests with the requested segment
+
+        :param data: asset (bytes)
+        :param name: file name of asset
+        :return: N/A
+        """
+
+        # var
+        fake = self.server.fake
+        start, end = 0, len(data) - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get('Range') or "")
+
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/zip' if name.endswith(".zip") else 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', fake.asset_etag)
+        self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+        self.end_headers()
+
+        for offset in range(start, end + 1, chunk_size):
+            chunk = data[offset:min(offset + chunk_size, end + 1)]
+            fake.download_throttle.consume(len(chunk))
+            self.wfile.write(chunk)
+            self.bytes_out += len(chunk)
+
+    def get_task_or_404(self, task_id, project_id=None):
+        """
+        Gets a task, sending 404 if it does not exist
+
+        :param task_id: ID of task
+        :param project_id: ID of project the task must belong to, None for NodeODM tasks
+        :return: task (dictionary), None if not found
+        """
+
+        task = self.server.fake.tasks.get(task_id)
+
+        if task is None or (project_id is not None and task['project'] != int(project_id)):
+            self.send_json(404, {'detail': "Not found.", 'error': "Task not found"})
+            return None
+
+        return task
+
+    # WebODM
+
+    def post_token(self):
+        fields, files = self.get_fields()
+        if not fields.get('username') or not fields.get('password'):
+            return self.send_json(400, {'non_field_errors': ["Unable to log in with provided credentials."]})
+        self.send_json(200, {'token': self.server.fake.create_token()})
+
+    def get_nodes(self):
+        fake = self.server.fake
+        self.send_json(200, [dict(n, queue_count=fake.get_node_load(n['id'])) for n in fake.nodes.values()])
+
+    def get_node(self, node_id):
+        fake = self.server.fake
+        node = fake.nodes.get(int(node_id))
+        self.send_json(200, dict(node, queue_count=fake.get_node_load(node['id']))) if node else self.send_json(404, {'detail': "Not found."})
+
+    def post_node(self):
+        fake = self.server.fake
+        fields, files = self.get_fields()
+        with fake.lock:
+            node_id = max(fake.nodes, default=0) + 1
+            fake.nodes[node_id] = {'id': node_id, 'hostname': fields.get('hostname'), 'port': int(fields.get('port') or 3000),
+                                   'label': fields.get('label') or f"node-{node_id}", 'online': True, 'max_images': None,
+                                   'max_parallel_tasks': 2, 'last_refreshed': None, 'available_options': []}
+        self.send_json(201, dict(fake.nodes[node_id], queue_count=0))
+
+    def delete_node(self, node_id):
+        with self.server.fake.lock:
+            found = self.server.fake.nodes.pop(int(node_id), None)
+        self.send_json(204 if found else 404, {})
+
+    def get_projects(self):
+        self.send_json(200, list(self.server.fake.projects.values()))
+
+    def post_project(self):
+        fake = self.server.fake
+        fields, files = self.get_fields()
+        with fake.lock:
+            project = {'id': max(fake.projects, default=0) + 1, 'name': fields.get('name') or "Project", 'description': fields.get('description', "")}
+            fake.projects[project['id']] = project
+        self.send_json(201, project)
+
+    def get_project(self, project_id):
+        project = self.server.fake.projects.get(int(project_id))
+        self.send_json(200, project) if project else self.send_json(404, {'detail': "Not found."})
+
+    def delete_project(self, project_id):
+        fake = self.server.fake
+        with fake.lock:
+            found = fake.projects.pop(int(project_id), None)
+            for task_id in [t['id'] for t in fake.tasks.values() if t['project'] == int(project_id)]:
+                del fake.tasks[task_id]
+        self.send_json(204 if found else 404, {})
+
+    def get_tasks(self, project_id):
+        fake = self.server.fake
+        self.send_json(200, [fake.get_webodm_task(t) for t in list(fake.tasks.values()) if t['project'] == int(project_id)])
+
+    def post_task(self, project_id):
+        fake = self.server.fake
+        if int(project_id) not in fake.projects:
+            return self.send_json(404, {'detail': "Not found."})
+        fields, files = self.get_fields()
+        task = fake.create_task(int(project_id), json.loads(fields.get('options') or "[]"),
+                                int(fields['processing_node']) if fields.get('processing_node') else None,
+                                fields.get('webhook'), fields.get('name'), str(fields.get('partial', "")).lower() == "true")
+        task['images'].update(files)
+        self.send_json(201, fake.get_webodm_task(task))
+
+    def get_task(self, project_id, task_id):
+        task = self.get_task_or_404(task_id, project_id)
+        if task:
+            self.send_json(200, self.server.fake.get_webodm_task(task))
+
+    def patch_task(self, project_id, task_id):
+        task = self.get_task_or_404(task_id, project_id)
+        if task:
+            fields, files = self.get_fields()
+            with self.server.fake.lock:
+                task['name'] = fields.get('name', task['name'])
+                task['options'] = fields.get('options', task['options'])
+                if fields.get('processing_node') is not None:
+                    task['processing_node'] = int(fields['processing_node'])
+            self.send_json(200, self.server.fake.get_webodm_task(task))
+
+    def post_upload(self, project_id, task_id):
+        task = self.get_task_or_404(task_id, project_id)
+        if task:
+            fields, files = self.get_fields()
+            with self.server.fake.lock:
+                task['images'].update(files)
+            self.send_json(200, {'success': True, 'uploaded': dict(files)})
+
+    def post_action(self, project_id, task_id, action):
+        fake = self.server.fake
+        task = self.get_task_or_404(task_id, project_id)
+        if task is None:
+            return
+        if action == "commit":
+            fake.queue_task(task)
+            return self.send_json(200, fake.get_webodm_task(task))
+        if action == "restart":
+            fake.restart_task(task)
+        elif action == "cancel" and task['status'] not in final_statuses:
+            task['status'] = status_codes.CANCELED
+        elif action == "remove":
+            with fake.lock:
+                fake.tasks.pop(task_id, None)
+        elif action == "duplicate":
+            copy = fake.create_task(task['project'], list(task['options']), task['processing_node'], None, f"{task['name']} (copy)", partial=True)
+            copy['images'].update(task['images'])
+            # in the same state, with the source's pending action, until its own restart is picked up
+            copy.update({k: task[k] for k in ('partial', 'status', 'started', 'duration', 'fail', 'last_error', 'pending_action', 'pending_until')})
+            return self.send_json(200, {'success': True, 'task': fake.get_webodm_task(copy)})
+        self.send_json(200, {'success': True})
+
+    def get_download(self, project_id, task_id, asset):
+        task = self.get_task_or_404(task_id, project_id)
+        if task is None:
+            return
+        if task['status'] != status_codes.COMPLETED or asset not in asset_names:
+            return self.send_json(404, {'detail': "Asset not found"})
+        self.send_asset(self.server.fake.asset, asset)
+
+    # NodeODM
+
+    def get_info(self):
+        fake = self.server.fake
+        self.send_json(200, {'version': "2.2.0", 'taskQueueCount': sum(fake.get_node_load(i) for i in fake.nodes), 'maxImages': None,
+                             'maxParallelTasks': sum(n['max_parallel_tasks'] for n in fake.nodes.values()), 'engine': "odm",
+                             'engineVersion': "3.5.0", 'totalMemory': 16 * 1000 ** 3, 'availableMemory': 8 * 1000 ** 3, 'cpuCores': 8})
+
+    def get_options(self):
+        self.send_json(200, list())
+
+    def get_node_tasks(self):
+        self.send_json(200, [{'uuid': t['id']} for t in list(self.server.fake.tasks.values()) if t['project'] is None])
+
+    def post_node_init(self):
+        fields, files = self.get_fields()
+        task = self.server.fake.create_task(None, json.loads(fields.get('options') or "[]"), None, fields.get('webhook'), fields.get('name'), True)
+        self.send_json(200, {'uuid': task['id']})
+
+    def post_node_upload(self, task_id):
+        task = self.get_task_or_404(task_id)
+        if task:
+            fields, files = self.get_fields()
+            with self.server.fake.lock:
+                task['images'].update(files)
+            self.send_json(200, {'success': True})
+
+    def post_node_commit(self, task_id):
+        task = self.get_task_or_404(task_id)
+        if task:
+            self.server.fake.queue_task(task)
+            self.send_json(200, {'uuid': task_id})
+
+    def post_node_task(self):
+        fields, files = self.get_fields()
+        task = self.server.fake.create_task(None, json.loads(fields.get('options') or "[]"), None, fields.get('webhook'), fields.get('name'))
+        task['images'].update(files)
+        self.send_json(200, {'uuid': task['id']})
+
+    def get_node_task(self, task_id):
+        task = self.get_task_or_404(task_id)
+        if task:
+            self.send_json(200, self.server.fake.get_nodeodm_task(task))
+
+    def get_node_output(self, task_id):
+        self.send_json(200, list())
+
+    def get_download_node(self, task_id, asset):
+        task = self.get_task_or_404(task_id)
+        if task is None:
+            return
+        if task['status'] != status_codes.COMPLETED:
+            return self.send_json(400, {'error': "Task is not completed"})
+        self.send_asset(self.server.fake.asset, asset)
+
+    def post_node_action(self, action):
+        fake = self.server.fake
+        fields, files = self.get_fields()
+        task = self.get_task_or_404(fields.get('uuid', ""))
+        if task is None:
+            return
+        if action == "restart":
+            fake.queue_task(task)
+        elif action == "cancel" and task['status'] not in final_statuses:
+            task['status'] = status_codes.CANCELED
+        elif action == "remove":
+            with fake.lock:
+                fake.tasks.pop(task['id'], None)
+        self.send_json(200, {'success': True})
+
+    # stats
+
+    def get_stats(self):
+        with self.server.fake.lock:
+            self.send_json(200, json.loads(json.dumps(self.server.fake.stats)))
+
+    def post_stats_reset(self):
+        with self.server.fake.lock:
+            self.server.fake.stats.clear()
+        self.send_json(200, {'success': True})
+
+# functions
+
+def get_asset(size):
+    """
+    Creates the file served as every asset: a ZIP archive (so all.zip can be extracted) of about the given size
+
+    :param size: size of asset (bytes)
+    :return: asset (bytes)
+    """
+
+    # var
+    buffer = io.BytesIO()
+
+    # stored, not compressed, so the size is the given one
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        archive.writestr("odm_orthophoto/odm_orthophoto.tif", random.Random(0).randbytes(max(int(size) - 200, 0)))
+
+    return buffer.getvalue()
+
+def call_webhook(url, task):
+    """
+    Calls the webhook of a finished task, as NodeODM does
+
+    :param url: URL of webhook
+    :param task: task (dictionary as NodeODM returns it)
+    :return: N/A
+    """
+
+    try:
+        requests.post(url, json=task, timeout=10)
+    except requests.RequestException:
+        pass # the client polls as a fallback
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Address
+    parser.add_argument("-ho", "--host", help="Address to listen on", type=str, default="127.0.0.1")
+    parser.add_argument("-p", "--port", help="Port to listen on", type=int, default=default_port)
+
+    # Processing nodes
+    parser.add_argument("-n", "--nodes", help="Number of processing nodes", type=int, default=1)
+    parser.add_argument("-mp", "--max_parallel_tasks", help="Tasks each node runs at the same time, others are queued", type=int, default=2)
+
+    # Latency
+    parser.add_argument("-l", "--latency", help="Time added to every request (seconds)", type=float, default=0.0)
+    parser.add_argument("-j", "--jitter", help="Random time up to this added to the latency (seconds)", type=float, default=0.0)
+
+    # Bandwidth caps
+    parser.add_argument("-ur", "--upload_rate", help="Bandwidth cap of all uploads together (MB/s)", type=float)
+    parser.add_argument("-dr", "--download_rate", help="Bandwidth cap of all downloads together (MB/s)", type=float)
+
+    # Failure injection
+    parser.add_argument("-er", "--error_rate", help="Share of requests answered with an error 500 (0 to 1)", type=float, default=0.0)
+    parser.add_argument("-ep", "--error_paths", help="Only fail requests whose path contains one of these (ex. upload download)", type=str, nargs="+")
+    parser.add_argument("-tf", "--task_failure_rate", help="Share of tasks that end as failed (0 to 1)", type=float, default=0.0)
+
+    # Simulated processing
+    parser.add_argument("-bd", "--base_duration", help="Processing time of a task without images (seconds)", type=float, default=5.0)
+    parser.add_argument("-spi", "--seconds_per_image", help="Processing time added per image (seconds)", type=float, default=0.1)
+    parser.add_argument("-dj", "--duration_jitter", help="Share the processing time randomly varies by (0 to 1)", type=float, default=0.0)
+    parser.add_argument("-rd", "--restart_delay", help="Time before a restart of a WebODM task is picked up (seconds)", type=float, default=1.0)
+
+    # Assets
+    parser.add_argument("-as", "--asset_size", help="Size of every asset (MB)", type=float, default=5.0)
+
+    # Random seed
+    parser.add_argument("-sd", "--seed", help="Seed of the random failures and durations", type=int)
+
+    return parser
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # var
+    fake = FakeServer(args.host, args.port, args.nodes, args.max_parallel_tasks, args.latency, args.jitter, args.upload_rate,
+                      args.download_rate, args.error_rate, args.error_paths, args.task_failure_rate, args.base_duration,
+                      args.seconds_per_image, args.duration_jitter, args.asset_size, restart_delay=args.restart_delay, seed=args.seed)
+
+    print(f"Serving WebODM at {fake.base_url}/api/ and NodeODM at {fake.base_url}, any username and password are accepted, press Ctrl+C to stop")
+    fake.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
+        sys.exit(0)
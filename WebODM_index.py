@@ -0,0 +1,233 @@
+"""
+WebODM_index.py: Persistent, incremental index of the images in a directory tree, with their hashes and metadata
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, json, time, hashlib, threading, concurrent.futures # standard libraries
+import WebODM_download
+import WebODM_exif
+
+# global variables
+
+default_cache_dir = ".webodm_cache" # the index of each directory is kept here, image directories may be read only
+image_extensions = (".jpg", ".jpeg", ".tif", ".tiff", ".png")
+index_version = 2 # manifests of other versions are read again, since they may lack metadata read by newer versions
+
+# entries of every index loaded by this process, so later stages reuse their hashes and metadata
+known_entries = dict() # absolute path: entry
+known_lock = threading.Lock()
+indexes = dict() # absolute directory path: DirectoryIndex
+
+# functions
+
+def scan_directory(dir_path, extensions=image_extensions):
+    """
+    Lists the images in a directory and its subdirectories, skipping hidden ones. os.scandir gets
+    the size and modification time of each file without another request to the file system.
+    Linked directories are followed, but each directory is only scanned once so a link loop ends
+
+    :param dir_path: path to directory
+    :param extensions: file extensions to include (lower case)
+    :return: dictionary of path: (size, mtime)
+    """
+
+    # var
+    files = dict()
+    directories = [dir_path]
+    scanned = set() # (device, inode) of directories scanned
+
+    while directories:
+        path = directories.pop()
+        stat = os.stat(path)
+        if (stat.st_dev, stat.st_ino) in scanned:
+            continue
+        scanned.add((stat.st_dev, stat.st_ino))
+
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=True):
+                    directories.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in extensions:
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime)
+
+    return files
+
+def read_entry(path, size, mtime):
+    """
+    Hashes an image and reads its metadata. Runs in a worker thread
+
+    :param path: path to image
+    :param size: size of image (bytes)
+    :param mtime: modification time of image
+    :return: entry (dictionary with size, mtime, sha256 and metadata)
+    """
+
+    try:
+        metadata = WebODM_exif.read_metadata(path)
+    except (OSError, ValueError, IndexError): # unreadable or malformed headers, the image is still uploaded
+        metadata = dict()
+
+    return {'size': size, 'mtime': mtime, 'sha256': WebODM_download.get_sha256(path), 'metadata': metadata}
+
+def get_entry(path):
+    """
+    Gets the indexed entry of a file, if it has not changed since it was indexed
+
+    :param path: path to file
+    :return: entry (dictionary), None if not indexed or changed
+    """
+
+    # var
+    entry = known_entries.get(os.path.abspath(path))
+
+    if entry is None:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return entry if (stat.st_size, stat.st_mtime) == (entry['size'], entry['mtime']) else None
+
+def read_metadata(path):
+    """
+    Gets the metadata of an image from the index, reading its headers if it is not indexed
+
+    :param path: path to image
+    :return: metadata (dictionary, see WebODM_exif.read_metadata)
+    """
+
+    entry = get_entry(path)
+
+    return entry['metadata'] if entry else WebODM_exif.read_metadata(path)
+
+def get_index(dir_path):
+    """
+    Gets the index of a directory, shared by every caller in this process
+
+    :param dir_path: path to directory
+    :return: DirectoryIndex
+    """
+
+    # var
+    key = os.path.abspath(dir_path)
+
+    if key not in indexes:
+        indexes[key] = DirectoryIndex(dir_path)
+
+    return indexes[key]
+
+# classes
+
+class DirectoryIndex:
+    """
+    Manifest of the images under a directory (size, modification time, SHA-256 and EXIF metadata),
+    saved between runs. Updating only hashes and reads files that are new or whose size or
+    modification time changed
+    """
+
+    def __init__(self, dir_path, cache_dir=default_cache_dir, extensions=image_extensions):
+        """
+        :param dir_path: path to directory
+        :param cache_dir: directory the manifest is saved in
+        :param extensions: file extensions to include (lower case)
+        """
+
+        self.dir_path = dir_path
+        self.extensions = extensions
+        self.manifest_path = os.path.join(cache_dir, "index", hashlib.sha1(os.path.abspath(dir_path).encode("utf-8")).hexdigest()[:16] + ".json")
+        self.entries = dict() # path relative to directory: entry
+
+    def load(self):
+        """
+        Reads the saved manifest
+
+        :param: N/A
+        :return: N/A
+        """
+
+        if not os.path.isfile(self.manifest_path):
+            return
+
+        # a corrupt manifest (ex. truncated by a full disk) is a cache miss, every image is read again
+        try:
+            with open(self.manifest_path, 'r') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(manifest, dict) and manifest.get('version') == index_version and isinstance(manifest.get('files'), dict):
+            self.entries = manifest['files']
+
+    def save(self):
+        """
+        Writes the manifest, replacing the file atomically
+
+        :param: N/A
+        :return: N/A
+        """
+
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({'version': index_version, 'dir': os.path.abspath(self.dir_path), 'updated': time.time(), 'files': self.entries}, file)
+        os.replace(temp_path, self.manifest_path)
+
+    def update(self, threads=16):
+        """
+        Scans the directory, hashing and reading the metadata of new or changed images in a thread pool, and saves the manifest
+
+        :param threads: number of images read at the same time
+        :return: number of images read (int)
+        """
+
+        # var
+        self.load()
+        files = scan_directory(self.dir_path, self.extensions)
+        entries = dict()
+        changed = dict()
+
+        for path, (size, mtime) in files.items():
+            relative_path = os.path.relpath(path, self.dir_path)
+            entry = self.entries.get(relative_path)
+            if isinstance(entry, dict) and (entry.get('size'), entry.get('mtime')) == (size, mtime):
+                entries[relative_path] = entry
+            else:
+                changed[relative_path] = (path, size, mtime)
+
+        # read new and changed images
+        if changed:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+                futures = {relative_path: executor.submit(read_entry, *args) for relative_path, args in changed.items()}
+                for relative_path, future in futures.items():
+                    entries[relative_path] = future.result()
+
+        # removed images drop out of the manifest
+        if changed or len(entries) != len(self.entries):
+            self.entries = entries
+            self.save()
+        else:
+            self.entries = entries
+
+        with known_lock:
+            for relative_path, entry in self.entries.items():
+                known_entries[os.path.abspath(os.path.join(self.dir_path, relative_path))] = entry
+
+        return len(changed)
+
+    def get_paths(self):
+        """
+        Gets the paths of the indexed images, sorted
+
+        :param: N/A
+        :return: paths (list)
+        """
+
+        return sorted(os.path.join(self.dir_path, p) for p in self.entries)
@@ -0,0 +1,483 @@
+"""
+WebODM_jobs.py: SQLite job store recording every project, task and stage, with a CLI to list, reattach to and cancel jobs
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, sys, json, time, sqlite3, argparse, asyncio, threading # standard libraries
+import requests
+import status_codes
+import WebODM_cache
+import WebODM_download
+import WebODM_extract
+import WebODM_common
+import WebODM_watch
+
+# global variables
+
+default_store_path = ".webodm_jobs.sqlite"
+active_stages = ("uploading", "processing", "downloading") # stages a job can be reattached in, uploads excepted
+final_stages = ("done", "failed", "canceled")
+
+schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_name TEXT NOT NULL,
+    project_id INTEGER,
+    task_id TEXT,
+    variant TEXT,
+    stage TEXT NOT NULL,
+    output_dir TEXT,
+    assets TEXT,
+    extract TEXT,
+    cache_key TEXT,
+    owner_pid INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transitions (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    stage TEXT NOT NULL,
+    time REAL NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_stage ON jobs(stage);
+"""
+
+# classes
+
+class JobStore:
+    """
+    Jobs and their stage transitions, kept in SQLite so a job survives the process that started it.
+    Every change is committed at once, in WAL mode so a daemon can read while a run writes
+    """
+
+    def __init__(self, path=default_store_path):
+        """
+        :param path: path to SQLite database
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(schema)
+
+    def create_job(self, project_name, project_id, stage, output_dir=None, assets=None, extract=None, cache_key=None,
+                   task_id=None, variant=None):
+        """
+        Records a new job, owned by this process
+
+        :param project_name: name of project
+        :param project_id: ID of project
+        :param stage: first stage (ex. uploading)
+        :param output_dir: directory of where the files should be downloaded
+        :param assets: what to download (list)
+        :param extract: patterns of all.zip members to extract (list), None to download all.zip
+        :param cache_key: result cache key of the job's images and options
+        :param task_id: ID of task, if already created
+        :param variant: name of options profile, for variants of one upload
+        :return: ID of job
+        """
+
+        # var
+        now = time.time()
+
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO jobs (project_name, project_id, task_id, variant, stage, output_dir, assets, extract, cache_key, "
+                "owner_pid, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (project_name, project_id, task_id, variant, stage, output_dir, json.dumps(assets or ["all.zip"]),
+                 None if extract is None else json.dumps(extract), cache_key, os.getpid(), now, now))
+            self.connection.execute("INSERT INTO transitions (job_id, stage, time) VALUES (?, ?, ?)", (cursor.lastrowid, stage, now))
+
+        return cursor.lastrowid
+
+    def update(self, job_id, stage=None, detail=None, **fields):
+        """
+        Records a stage transition and/or changes fields of a job
+
+        :param job_id: ID of job
+        :param stage: new stage, None to keep the stage
+        :param detail: note stored with the transition (ex. error)
+        :param fields: columns to change (ex. task_id, owner_pid, error)
+        :return: N/A
+        """
+
+        # var
+        now = time.time()
+        if stage is not None:
+            fields['stage'] = stage
+        columns = ", ".join(f"{name} = ?" for name in fields)
+
+        with self.lock, self.connection:
+            self.connection.execute(f"UPDATE jobs SET {columns}{', ' if columns else ''}updated = ? WHERE id = ?",
+                                    (*fields.values(), now, job_id))
+            if stage is not None:
+                self.connection.execute("INSERT INTO transitions (job_id, stage, time, detail) VALUES (?, ?, ?, ?)",
+                                        (job_id, stage, now, detail))
+
+    def get_job(self, job_id):
+        """
+        Gets a job
+
+        :param job_id: ID of job
+        :return: job (dictionary), None if not found
+        """
+
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        return get_job_dict(row) if row else None
+
+    def find_job(self, project_id, variant=None):
+        """
+        Gets the latest unfinished job of a project, for example to continue it when an interrupted upload is resumed
+
+        :param project_id: ID of project
+        :param variant: name of options profile, None for jobs without one
+        :return: job (dictionary), None if not found
+        """
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM jobs WHERE project_id = ? AND variant IS ? AND stage NOT IN (?, ?, ?) ORDER BY id DESC LIMIT 1",
+                (project_id, variant, *final_stages)).fetchone()
+
+        return get_job_dict(row) if row else None
+
+    def list_jobs(self, include_finished=False):
+        """
+        Gets jobs, oldest first
+
+        :param include_finished: whether to include done, failed and canceled jobs
+        :return: jobs (list of dictionaries)
+        """
+
+        with self.lock:
+            if include_finished:
+                rows = self.connection.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+            else:
+                rows = self.connection.execute("SELECT * FROM jobs WHERE stage NOT IN (?, ?, ?) ORDER BY id", final_stages).fetchall()
+
+        return [get_job_dict(row) for row in rows]
+
+    def get_transitions(self, job_id):
+        """
+        Gets the stage transitions of a job, oldest first
+
+        :param job_id: ID of job
+        :return: transitions (list of dictionaries with stage, time and detail)
+        """
+
+        with self.lock:
+            rows = self.connection.execute("SELECT stage, time, detail FROM transitions WHERE job_id = ? ORDER BY rowid", (job_id,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+# functions
+
+def get_job_dict(row):
+    """
+    Converts a row of the jobs table to a dictionary, decoding its JSON columns
+
+    :param row: row (sqlite3.Row)
+    :return: job (dictionary)
+    """
+
+    job = dict(row)
+    job['assets'] = json.loads(job['assets']) if job['assets'] else ["all.zip"]
+    job['extract'] = json.loads(job['extract']) if job['extract'] is not None else None
+
+    return job
+
+def is_owned(job):
+    """
+    Checks whether the process that owns a job is still running, in which case it should not be reattached
+
+    :param job: job (dictionary)
+    :return: bool
+    """
+
+    if not job['owner_pid'] or job['owner_pid'] == os.getpid():
+        return False
+
+    try:
+        os.kill(job['owner_pid'], 0) # signal 0 only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError: # exists, owned by another user
+        return True
+
+    return True
+
+def save_job(client, job, task, cache=None):
+    """
+    Downloads (or extracts) the assets of a completed job. Interrupted downloads resume from their partial files
+
+    :param client: authenticated client (WebODMClient)
+    :param job: job (dictionary with project_name, project_id, task_id, variant, output_dir, assets, extract and cache_key)
+    :param task: final task
+    :param cache: result cache (ResultCache) to keep the assets in, the default cache if None
+    :return: paths of saved files (list)
+    """
+
+    # var
+    project_dir = job['project_name'] if job['variant'] is None else os.path.join(job['project_name'], job['variant'])
+    asset_dir = WebODM_common.get_asset_dir(project_dir, job['output_dir'])
+    assets = list(dict.fromkeys(WebODM_common.validate_asset(task['available_assets'], a) for a in job['assets']))
+    paths = list()
+
+    # extract all.zip instead of downloading it
+    if job['extract'] is not None and 'all.zip' in assets:
+        assets.remove('all.zip')
+        paths += WebODM_extract.extract_asset(client, "/api/projects/{}/tasks/{}/download/all.zip".format(job['project_id'], job['task_id']),
+                                              asset_dir, job['extract'])
+
+    # download assets
+    if assets:
+        asset_paths = WebODM_download.download_assets(client, job['project_id'], job['task_id'], assets, asset_dir)
+        paths += asset_paths
+
+        # keep assets for later runs
+        if job['cache_key']:
+            (cache or WebODM_cache.ResultCache()).store_assets(job['cache_key'], asset_paths)
+
+    return paths
+
+async def reattach_job(client, store, job, limits):
+    """
+    Takes over a job from a process that stopped: watches its task until it reaches a final status, then saves its assets
+
+    :param client: authenticated client (WebODMClient)
+    :param store: job store (JobStore)
+    :param job: job (dictionary)
+    :param limits: semaphores (dictionary with request and download)
+    :return: final stage of job (str)
+    """
+
+    # var
+    label = f"job {job['id']} ({job['project_name']}{'/' + job['variant'] if job['variant'] else ''})"
+
+    def print_transition(project_id, task_id, task, previous_status):
+        print(f"[{label}] {status_codes.names.get(task['status'], task['status'])}")
+
+    store.update(job['id'], owner_pid=os.getpid())
+
+    try:
+        # processing
+        if job['stage'] != "downloading":
+            task = await WebODM_watch.watch_task(client, job['project_id'], job['task_id'], limits['request'], limits['download'],
+                                                 on_transition=print_transition, download=False)
+            if task['status'] != status_codes.COMPLETED:
+                stage = "failed" if task['status'] == status_codes.FAILED else "canceled"
+                store.update(job['id'], stage, owner_pid=None)
+                return stage
+            store.update(job['id'], "downloading")
+        else:
+            async with limits['request']:
+                task = (await asyncio.to_thread(client.get, "/api/projects/{}/tasks/{}/".format(job['project_id'], job['task_id']))).json()
+
+        # download
+        async with limits['download']:
+            paths = await asyncio.to_thread(save_job, client, job, task)
+        print(f"[{label}] Saved {len(paths)} files")
+        store.update(job['id'], "done", owner_pid=None)
+
+        return "done"
+    except Exception as e: # the job stays in its stage, so it can be reattached again
+        print(f"[{label}] Failed ({e})")
+
+        # a task that no longer exists will not come back, so the daemon does not pick the job up again
+        if isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code == 404:
+            store.update(job['id'], "failed", detail=str(e), error=str(e), owner_pid=None)
+            return "failed"
+
+        store.update(job['id'], detail=str(e), error=str(e), owner_pid=None)
+        return "error"
+
+def get_skip_reason(job):
+    """
+    Gets why a job cannot be reattached
+
+    :param job: job (dictionary)
+    :return: reason (str), None if the job can be reattached
+    """
+
+    if job['stage'] in final_stages:
+        return f"already {job['stage']}"
+    if is_owned(job):
+        return f"being run by process {job['owner_pid']}"
+    if job['stage'] == "uploading" or job['task_id'] is None:
+        return "interrupted while uploading, run WebODM_main.py again with --parallel_upload to resume it"
+
+    return None
+
+async def reattach_jobs(client, store, job_ids=None, max_downloads=2):
+    """
+    Reattaches to jobs at the same time. Jobs still owned by a running process, and interrupted uploads, are skipped
+
+    :param client: authenticated client (WebODMClient)
+    :param store: job store (JobStore)
+    :param job_ids: IDs of jobs, None for every unfinished job
+    :param max_downloads: maximum number of jobs downloaded at the same time
+    :return: final stage of each job (dictionary of job ID: stage)
+    """
+
+    # var
+    limits = {'request': asyncio.Semaphore(16), 'download': asyncio.Semaphore(max_downloads)}
+    jobs = store.list_jobs() if job_ids is None else [j for j in (store.get_job(i) for i in job_ids) if j]
+    attachable = list()
+
+    for job in jobs:
+        reason = get_skip_reason(job)
+        if reason:
+            print(f"Job {job['id']} is {reason}")
+        else:
+            attachable.append(job)
+
+    stages = await asyncio.gather(*[reattach_job(client, store, job, limits) for job in attachable])
+
+    return {job['id']: stage for job, stage in zip(attachable, stages)}
+
+async def run_daemon(client, store, interval=60, max_downloads=2):
+    """
+    Reattaches to every job left behind by a stopped process as soon as it is noticed, until interrupted
+
+    :param client: authenticated client (WebODMClient)
+    :param store: job store (JobStore)
+    :param interval: seconds between checks of the job store
+    :param max_downloads: maximum number of jobs downloaded at the same time
+    :return: N/A
+    """
+
+    # var
+    limits = {'request': asyncio.Semaphore(16), 'download': asyncio.Semaphore(max_downloads)}
+    attached = dict() # job ID: asyncio task
+
+    while True:
+        for job in store.list_jobs():
+            if job['id'] not in attached and get_skip_reason(job) is None:
+                print(f"Reattaching job {job['id']}")
+                attached[job['id']] = asyncio.create_task(reattach_job(client, store, job, limits))
+
+        # jobs that stopped with an error may be picked up again
+        for job_id in [i for i, t in attached.items() if t.done() and t.result() == "error"]:
+            del attached[job_id]
+
+        await asyncio.sleep(interval)
+
+def cancel_job(client, store, job):
+    """
+    Cancels the task of a job on the server, keeping its project and everything already downloaded
+
+    :param client: authenticated client (WebODMClient)
+    :param store: job store (JobStore)
+    :param job: job (dictionary)
+    :return: True if canceled, False otherwise
+    """
+
+    if job['task_id'] is None:
+        store.update(job['id'], "canceled", owner_pid=None)
+        return True
+
+    res = client.post("/api/projects/{}/tasks/{}/cancel/".format(job['project_id'], job['task_id']))
+    if res.status_code != 200:
+        return False
+
+    store.update(job['id'], "canceled", owner_pid=None)
+    return True
+
+def print_jobs(jobs):
+    """
+    Prints jobs to the console
+
+    :param jobs: jobs (list of dictionaries)
+    :return: N/A
+    """
+
+    if not jobs:
+        print("No jobs")
+    for job in jobs:
+        name = job['project_name'] + ('/' + job['variant'] if job['variant'] else "")
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job['updated']))
+        print(f"\t* {job['id']}: {name} (project {job['project_id']}, task {job['task_id']}) {job['stage']} since {updated}"
+              + (f", running in process {job['owner_pid']}" if is_owned(job) else "")
+              + (f", last error: {job['error']}" if job['error'] and job['stage'] not in final_stages else ""))
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Command
+    parser.add_argument("command", help="list jobs, reattach to jobs, run as a daemon reattaching to every job left behind, or cancel jobs",
+                        choices=["list", "reattach", "daemon", "cancel"])
+
+    # Jobs
+    parser.add_argument("job_ids", help="IDs of jobs (default is every unfinished job, except for cancel)", type=int, nargs="*")
+
+    # Include finished jobs
+    parser.add_argument("-a", "--all", help="List finished jobs too", action="store_true", default=False)
+
+    # Daemon interval
+    parser.add_argument("-i", "--interval", help="Seconds between checks for jobs left behind when running as a daemon", type=float, default=60)
+
+    # Job store
+    parser.add_argument("-js", "--job_store", help="Path to job store", type=str, default=default_store_path)
+
+    return parser
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # var
+    store = JobStore(args.job_store)
+
+    if args.command == "list":
+        jobs = store.list_jobs(include_finished=args.all)
+        if args.job_ids:
+            jobs = [j for j in jobs if j['id'] in args.job_ids]
+        print_jobs(jobs)
+        sys.exit(0)
+
+    if args.command == "cancel" and not args.job_ids:
+        WebODM_common.print_error("Give the IDs of the jobs to cancel")
+
+    # authorize
+    client = WebODM_common.post_authentication(WebODM_common.username, WebODM_common.password)
+
+    if args.command == "cancel":
+        for job_id in args.job_ids:
+            job = store.get_job(job_id)
+            if job is None or job['stage'] in final_stages:
+                print(f"Job {job_id} not found or already finished")
+            elif cancel_job(client, store, job):
+                print(f"Job {job_id} canceled, its project and downloaded files are kept")
+            else:
+                print(f"Job {job_id} could not be canceled")
+    elif args.command == "reattach":
+        stages = asyncio.run(reattach_jobs(client, store, args.job_ids or None))
+        sys.exit(0 if all(s == "done" for s in stages.values()) else 1)
+    else: # daemon, reattach to jobs left behind until stopped
+        print(f"Watching {os.path.abspath(args.job_store)} for jobs left behind, press Ctrl+C to stop")
+        try:
+            asyncio.run(run_daemon(client, store, args.interval))
+        except KeyboardInterrupt:
+            print("Stopped, jobs in progress can be reattached again")
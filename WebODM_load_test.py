@@ -0,0 +1,388 @@
+"""
+WebODM_load_test.py: Measure upload, polling and download throughput of the client at several concurrency levels, against the local stand-in server
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, json, time, shutil, asyncio, argparse, tempfile, concurrent.futures # standard libraries
+import requests
+import status_codes
+import WebODM_client
+import WebODM_download
+import WebODM_fake_server
+import WebODM_main
+import WebODM_monitor
+import WebODM_upload
+import WebODM_watch
+
+# global variables
+
+default_levels = (1, 2, 4, 8, 16)
+scaling_threshold = 1.1 # throughput has to grow by this factor for a higher concurrency to count as scaling
+
+# functions
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Scenarios
+    parser.add_argument("scenarios", help="What to measure (default all)", nargs="*", choices=["upload", "poll", "download", "all"], default="all")
+
+    # Server
+    parser.add_argument("-url", "--url", help="URL of a stand-in server already running (default is to start one in this process)", type=str)
+
+    # Concurrency levels
+    parser.add_argument("-c", "--concurrency", help="Concurrency levels measured: upload threads, requests in flight, downloads at the same time", type=int, nargs="+",
+                        default=list(default_levels))
+
+    # Upload settings
+    parser.add_argument("-fc", "--file_count", help="Number of files uploaded per level", type=int, default=40)
+    parser.add_argument("-fs", "--file_size", help="Size of each uploaded file (MB)", type=float, default=0.5)
+    parser.add_argument("-bs", "--batch_size", help="Number of files uploaded per request", type=int, default=5)
+
+    # Polling settings
+    parser.add_argument("-pt", "--poll_tasks", help="Number of tasks watched at the same time", type=int, default=50)
+    parser.add_argument("-d", "--duration", help="Seconds polling is measured for per level", type=float, default=5.0)
+
+    # Download settings
+    parser.add_argument("-sg", "--segments", help="Segments per download (only assets of at least 32 MiB are split)", type=int, default=4)
+
+    # Stand-in server started in this process
+    parser.add_argument("-as", "--asset_size", help="Size of assets served (MB)", type=float, default=10.0)
+    parser.add_argument("-l", "--latency", help="Time added to every request by the server (seconds)", type=float, default=0.0)
+    parser.add_argument("-ur", "--upload_rate", help="Bandwidth cap of all uploads together (MB/s)", type=float)
+    parser.add_argument("-dr", "--download_rate", help="Bandwidth cap of all downloads together (MB/s)", type=float)
+    parser.add_argument("-er", "--error_rate", help="Share of measured requests answered with an error 500 (0 to 1)", type=float, default=0.0)
+
+    # Summary file
+    parser.add_argument("-sf", "--summary_file", help="Path of JSON file the results are written to", type=str)
+
+    return parser
+
+def get_stats(client):
+    """
+    Gets the counters of every endpoint of the stand-in server
+
+    :param client: authenticated client (WebODMClient)
+    :return: counters (dictionary of endpoint: counters), None if the server has none
+    """
+
+    res = client.get('/stats')
+
+    return res.json() if res.status_code == 200 else None
+
+def get_stats_delta(before, after):
+    """
+    Sums the counters of every endpoint between two snapshots
+
+    :param before: counters before (dictionary from get_stats), or None
+    :param after: counters after (dictionary from get_stats), or None
+    :return: requests, injected errors and mean time taken to answer (dictionary), None if the server has no counters
+    """
+
+    if before is None or after is None:
+        return None
+
+    # var
+    totals = {'requests': 0, 'errors': 0, 'seconds': 0.0}
+
+    for endpoint, stats in after.items():
+        if endpoint.endswith("_stats") or endpoint.endswith("_stats_reset"):
+            continue
+        for name in totals:
+            totals[name] += stats[name] - before.get(endpoint, {}).get(name, 0)
+
+    return {'requests': totals['requests'], 'errors': totals['errors'],
+            'server_ms': round(totals['seconds'] / totals['requests'] * 1000, 1) if totals['requests'] else None}
+
+def create_files(dir_path, count, size):
+    """
+    Creates files to upload, random so they cannot be compressed on the way
+
+    :param dir_path: directory of files
+    :param count: number of files
+    :param size: size of each file (MB)
+    :return: files (list of (field, path, content type) tuples)
+    """
+
+    # var
+    data = os.urandom(int(size * 1e6))
+    files = list()
+
+    for i in range(count):
+        path = os.path.join(dir_path, f"IMG_{i:04}.JPG")
+        with open(path, 'wb') as file:
+            file.write(data)
+        files.append(('images', path, 'image/jpeg'))
+
+    return files
+
+def measure_upload(client, project_id, task_id, files, threads, batch_size):
+    """
+    Uploads files to a partial task with the given number of upload threads
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of partial task
+    :param files: files to upload (list of (field, path, content type) tuples)
+    :param threads: number of batches uploaded at the same time
+    :param batch_size: number of files uploaded per request
+    :return: result (dictionary)
+    """
+
+    # var
+    state_path = os.path.join(os.path.dirname(files[0][1]), ".upload.json")
+    state = {'project_id': project_id, 'task_id': task_id, 'uploaded': list()}
+    size = sum(os.path.getsize(path) for field, path, content_type in files)
+
+    start = time.time()
+    WebODM_upload.upload_task_files(client, project_id, task_id, files, state_path, state, batch_size=batch_size, threads=threads)
+    seconds = time.time() - start
+
+    os.remove(state_path)
+
+    return {'seconds': round(seconds, 3), 'mb': round(size / 1e6, 2), 'mb_per_s': round(size / 1e6 / seconds, 2),
+            'requests_per_s': round(-(-len(files) // batch_size) / seconds, 1)}
+
+async def measure_polling(client, tasks, max_requests, duration):
+    """
+    Watches tasks as WebODM_watch.py does, polling without pause, and counts the polls answered in the given time
+
+    :param client: authenticated client (WebODMClient)
+    :param tasks: tasks to watch (list of (project ID, task ID) tuples)
+    :param max_requests: maximum number of requests in flight
+    :param duration: time measured (seconds)
+    :return: result (dictionary)
+    """
+
+    # var
+    polls = {'count': 0}
+
+    def count_poll(task):
+        polls['count'] += 1
+
+    # enough threads that every request in flight has one
+    asyncio.get_running_loop().set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=max_requests + 4))
+
+    start = time.time()
+    try:
+        await asyncio.wait_for(WebODM_watch.watch_tasks(client, tasks, max_requests=max_requests, download=False, min_interval=0,
+                                                        max_interval=0, on_tick=count_poll,
+                                                        on_transition=lambda project_id, task_id, task, previous_status: None),
+                               duration)
+    except asyncio.TimeoutError:
+        pass
+    seconds = time.time() - start
+
+    return {'seconds': round(seconds, 3), 'polls': polls['count'], 'requests_per_s': round(polls['count'] / seconds, 1),
+            'latency_ms': round(max_requests / (polls['count'] / seconds) * 1000, 1) if polls['count'] else None} # in flight / rate
+
+def measure_download(client, project_id, task_id, asset, dir_path, downloads, segments):
+    """
+    Downloads an asset several times at the same time, as several finished tasks would be
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of completed task
+    :param asset: what to download (ex. orthophoto.tif)
+    :param dir_path: directory the files are downloaded to, and removed from
+    :param downloads: number of downloads at the same time
+    :param segments: segments per download
+    :return: result (dictionary), with the number of downloads that failed
+    """
+
+    # var
+    url = "/api/projects/{}/tasks/{}/download/{}".format(project_id, task_id, asset)
+    paths = [os.path.join(dir_path, f"{i}_{asset}") for i in range(downloads)]
+
+    def download(path):
+        try:
+            WebODM_download.download_asset(client, url, path, segments, progress=None)
+            return True
+        except (WebODM_download.DownloadError, requests.RequestException, OSError) as e:
+            print(f"Download failed ({e})")
+            return False
+
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=downloads) as executor:
+        done = list(executor.map(download, paths))
+    seconds = time.time() - start
+
+    # only completed downloads count, the partial files of failed ones are removed too
+    size = sum(os.path.getsize(path) for path, ok in zip(paths, done) if ok)
+    for path in paths:
+        for leftover in (path, f"{path}.part", f"{path}.part.json"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return {'seconds': round(seconds, 3), 'mb': round(size / 1e6, 2), 'mb_per_s': round(size / 1e6 / seconds, 2),
+            'requests_per_s': round(done.count(True) / seconds, 2), 'errors': done.count(False)}
+
+def create_tasks(client, count):
+    """
+    Creates tasks in one project and starts processing them, without images since only their status is of interest
+
+    :param client: authenticated client (WebODMClient)
+    :param count: number of tasks
+    :return: project ID, tasks (list of (project ID, task ID) tuples)
+    """
+
+    # var
+    project_id = WebODM_main.post_project(client, "load_test_tasks")
+    tasks = list()
+
+    for i in range(count):
+        task_id = WebODM_upload.post_partial_task(client, project_id, "[]")
+        WebODM_upload.post_task_commit(client, project_id, task_id)
+        tasks.append((project_id, task_id))
+
+    return project_id, tasks
+
+def set_error_rate(fake, error_rate):
+    """
+    Sets the share of requests failed by the stand-in server started in this process, so only measured requests are failed
+
+    :param fake: stand-in server (FakeServer), or None if the server runs elsewhere
+    :param error_rate: share of requests answered with an error 500 (0 to 1)
+    :return: N/A
+    """
+
+    if fake is not None:
+        fake.error_rate = error_rate
+
+def get_knee(results, key):
+    """
+    Gets the concurrency above which throughput stops growing
+
+    :param results: results of one scenario, lowest concurrency first (list of dictionaries)
+    :param key: measure of throughput (ex. mb_per_s)
+    :return: concurrency (int)
+    """
+
+    for previous, result in zip(results, results[1:]):
+        if result[key] < previous[key] * scaling_threshold:
+            return previous['concurrency']
+
+    return results[-1]['concurrency']
+
+def print_results(scenario, results, key, unit):
+    """
+    Prints the results of one scenario to the console
+
+    :param scenario: name of scenario
+    :param results: results of each concurrency level (list of dictionaries)
+    :param key: measure of throughput (ex. mb_per_s)
+    :param unit: unit of throughput (ex. MB/s)
+    :return: N/A
+    """
+
+    print(f"\n{scenario}:")
+    for r in results:
+        line = f"\t* concurrency {r['concurrency']}: {r[key]} {unit} ({r['seconds']}s"
+        if r.get('latency_ms') is not None:
+            line += f", {r['latency_ms']} ms per poll"
+        if r.get('errors'):
+            line += f", {r['errors']} failed"
+        if r.get('server') is not None:
+            line += f", {r['server']['requests']} requests, {r['server']['errors']} errors injected, {r['server']['server_ms']} ms in server"
+        print(line + ")")
+    print(f"\tThroughput stops scaling above concurrency {get_knee(results, key)}")
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # var
+    levels = sorted(set(args.concurrency))
+    scenarios = ["upload", "poll", "download"] if "all" in args.scenarios else args.scenarios
+    summary = dict()
+    work_dir = tempfile.mkdtemp(prefix="webodm_load_test_")
+
+    # start the stand-in server, a real WebODM is never load tested
+    fake = None
+    if args.url is None:
+        fake = WebODM_fake_server.FakeServer(latency=args.latency, upload_rate=args.upload_rate, download_rate=args.download_rate,
+                                             asset_size=args.asset_size).start()
+    base_url = args.url or fake.base_url
+    print(f"Load testing {base_url}")
+
+    # authorize, with enough pooled connections for every level
+    client = WebODM_client.WebODMClient("load_test", "load_test", base_url, token_path=None, pool_size=max(levels) * max(args.segments, 1) + 4)
+    if get_stats(client) is None:
+        WebODM_main.print_error(f"{base_url} is not a stand-in server (no /stats), start one with WebODM_fake_server.py")
+
+    try:
+        if "upload" in scenarios:
+            # at least one batch per upload thread, or the highest levels measure idle threads
+            file_count = max(args.file_count, max(levels) * args.batch_size)
+            if file_count > args.file_count:
+                print(f"Uploading {file_count} files per level so each of {max(levels)} threads has a batch")
+            files = create_files(work_dir, file_count, args.file_size)
+            results = list()
+            for level in levels:
+                project_id = WebODM_main.post_project(client, f"load_test_upload_{level}")
+                task_id = WebODM_upload.post_partial_task(client, project_id, "[]")
+                before = get_stats(client)
+                set_error_rate(fake, args.error_rate)
+                result = measure_upload(client, project_id, task_id, files, level, args.batch_size)
+                set_error_rate(fake, 0.0)
+                results.append(dict(result, concurrency=level, server=get_stats_delta(before, get_stats(client))))
+                WebODM_main.delete_project(client, project_id)
+            print_results("Upload", results, 'mb_per_s', "MB/s")
+            summary['upload'] = results
+
+        if "poll" in scenarios:
+            # tasks keep running while they are polled
+            if fake:
+                fake.base_duration = args.duration * len(levels) * 10
+            project_id, tasks = create_tasks(client, args.poll_tasks)
+            results = list()
+            for level in levels:
+                before = get_stats(client)
+                set_error_rate(fake, args.error_rate)
+                result = asyncio.run(measure_polling(client, tasks, level, args.duration))
+                set_error_rate(fake, 0.0)
+                results.append(dict(result, concurrency=level, server=get_stats_delta(before, get_stats(client))))
+            WebODM_main.delete_project(client, project_id)
+            print_results("Poll", results, 'requests_per_s', "polls/s")
+            summary['poll'] = results
+
+        if "download" in scenarios:
+            # one task finished quickly, downloaded several times at once
+            if fake:
+                fake.base_duration = 0.5
+            project_id, tasks = create_tasks(client, 1)
+            task = WebODM_monitor.TaskMonitor(client, project_id, tasks[0][1], on_progress=None, min_interval=0.5, max_interval=5).run()
+            if task['status'] != status_codes.COMPLETED:
+                WebODM_main.print_error(f"Task to download did not complete ({status_codes.names.get(task['status'], task['status'])})")
+            results = list()
+            for level in levels:
+                before = get_stats(client)
+                set_error_rate(fake, args.error_rate)
+                result = measure_download(client, project_id, tasks[0][1], "orthophoto.tif", work_dir, level, args.segments)
+                set_error_rate(fake, 0.0)
+                results.append(dict(result, concurrency=level, server=get_stats_delta(before, get_stats(client))))
+            WebODM_main.delete_project(client, project_id)
+            print_results("Download", results, 'mb_per_s', "MB/s")
+            summary['download'] = results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if fake:
+            fake.stop()
+
+    # summary
+    if args.summary_file:
+        with open(args.summary_file, 'w') as file:
+            json.dump(summary, file, indent=4)
@@ -2,22 +2,30 @@
 WebODM_main.py: Create a project and task, upload and process images, and download the various output assets
 
 Author: Jonas 
-Last Updated: 2025-06-12
+Last Updated: 2026-10-18
 """
 
 # imports
-import requests, glob, sys, os, time, argparse, json # standard libraries
-from dotenv import load_dotenv 
+import requests, glob, sys, os, time, argparse, json, asyncio, atexit # standard libraries
 import status_codes 
-
-# environment variables
-load_dotenv() # load environment variables
-username = os.getenv("USERNAME") # set environment variable
-password = os.getenv("PASSWORD") # set environment variable
-
-# global variables
-
-min_number_of_images = 5 
+import WebODM_upload
+import WebODM_download
+import WebODM_extract
+import WebODM_monitor
+import WebODM_processing_nodes
+import WebODM_preprocess
+import WebODM_cache
+import WebODM_video
+import WebODM_spatial
+import WebODM_split
+import WebODM_multispectral
+import WebODM_variants
+import WebODM_jobs
+import WebODM_webhook
+import WebODM_metrics
+from WebODM_common import (username, password, min_number_of_images, validate_asset, print_error, post_authentication,
+                           get_image_paths, get_upload_files, get_asset_dir, get_options) # shared with the other scripts
+from WebODM_validate import get_preflight_report
 
 # functions
 
@@ -47,42 +55,76 @@ def create_parser():
     parser.add_argument("-od", "--output_dir", help="Directory path to folder where output files will be placed", type=str)
 
     # Asset to Download (default is all.zip)
-    parser.add_argument("-a", "--asset", help="What asset should be downloaded", type=str, default="all.zip")
+    parser.add_argument("-a", "--asset", help="What assets should be downloaded", type=str, nargs="+", default=["all.zip"])
+    
+    # Extract all.zip while downloading (optionally only matching members)
+    parser.add_argument("-x", "--extract", help="Extract all.zip while it downloads instead of saving it, optionally only the members matching the given patterns (ex. 'odm_orthophoto/*' 'dsm.tif')", type=str, nargs="*")
     
     # Video file
-    parser.add_argument("-v", "--video", help="Name of the video file to be uploaded instead of images", type=str)
+    parser.add_argument("-v", "--video", help="Name of the video file to extract keyframes from instead of images", type=str)
     
+    # Keyframe sampling
+    parser.add_argument("-vi", "--video_interval", help="Seconds between keyframes extracted from video", type=float, default=1.0)
+    parser.add_argument("-vd", "--video_distance", help="Meters flown between keyframes extracted from video, read from its SRT file (overrides interval)", type=float)
     
-    return parser
-
-def validate_asset(available_assets, asset):
-    """
-    Check if assets is in available assets list. If not, set to 'all.zip'
+    # Upload video instead of keyframes
+    parser.add_argument("-vu", "--video_upload", help="Upload the video and let the server extract frames instead of extracting keyframes locally", action="store_true", default=False)
     
-    :param available_assets: all assets available to download (list)
-    :param asset: user inputed asset (string)
-    :return: asset (string)
-    """
+    # Other options profiles run on the same upload
+    parser.add_argument("-vo", "--variant_options", help="Names of other options files (in the options directory) to process the same upload with, each downloaded to its own directory", type=str, nargs="+")
     
-    # var
-    default_asset = 'all.zip'
+    # Stream upload from disk
+    parser.add_argument("-s", "--stream", help="Stream the upload from disk instead of opening every file up front", action="store_true", default=False)
     
-    # validation
-    if asset in available_assets: # check if asset available
-        # asset is avaiable, so it is returned
-        return asset
-    else: 
-        
-        # notify user of availability and print available assets
-        print(f"\nAsset ({asset}) not found in available assets:")
-        for a in available_assets:
-            print(f"\t* {a}")
-        
-        # notify user that asset set to default
-        print(f"Setting asset to \'{default_asset}\'\n")
-        
-        # return the default asset
-        return default_asset
+    # Parallel, resumable upload
+    parser.add_argument("-pu", "--parallel_upload", help="Upload images in parallel batches to a partial task, resuming an interrupted upload if one exists", action="store_true", default=False)
+    
+    # Upload threads (parallel upload only)
+    parser.add_argument("-t", "--threads", help="Number of batches uploaded at the same time", type=int, default=4)
+    
+    # Upload batch size (parallel upload only)
+    parser.add_argument("-bs", "--batch_size", help="Number of images uploaded per request", type=int, default=10)
+    
+    # Pre-flight checks
+    parser.add_argument("-pf", "--preflight", help="Check image integrity, EXIF, cameras, duplicates and GCP files before anything is uploaded, stopping if a check fails", action="store_true", default=False)
+    
+    # Multispectral images
+    parser.add_argument("-ms", "--multispectral", help="Group multispectral images by capture and band, dropping incomplete captures", action="store_true", default=False)
+    
+    # Drop redundant images
+    parser.add_argument("-th", "--thin", help="Drop images taken closer than this ground distance (meters) to an image already kept, facing the same way", type=float)
+    parser.add_argument("-thd", "--thin_heading", help="Difference in heading (degrees) above which images closer than --thin are kept anyway", type=float, default=15)
+    
+    # Plan split-merge
+    parser.add_argument("-sm", "--split_merge", help="Split large datasets into submodels that fit the processing node's memory, setting split and split-overlap unless the options file does", action="store_true", default=False)
+    parser.add_argument("-nm", "--node_memory", help="Memory of the processing node in GB, used by --split_merge if it cannot be read from the node (default 16)", type=float)
+    
+    # Downscale images before upload
+    parser.add_argument("-rs", "--resize", help="Downscale JPEG images larger than this many pixels (width or height) before upload, keeping their metadata", type=int)
+    
+    # JPEG quality of downscaled images
+    parser.add_argument("-q", "--quality", help="JPEG quality of downscaled images (1-95)", type=int, default=90)
+    
+    # Disable result cache
+    parser.add_argument("-nc", "--no_cache", help="Do not reuse tasks or assets of earlier runs with the same images and options", action="store_true", default=False)
+    
+    # Size of cached assets
+    parser.add_argument("-cs", "--cache_size", help="Maximum size of cached assets in GB, least recently used assets are removed first", type=float, default=20)
+    
+    # Processing node (default is least loaded node)
+    parser.add_argument("-pn", "--processing_node", help="ID of processing node to use instead of the least loaded one", type=int)
+    
+    # Webhook instead of polling
+    parser.add_argument("-wh", "--webhook", help="Address WebODM reaches this machine at, as <host>[:<port>], to be called back when the task finishes instead of waiting for the next poll", type=str)
+    
+    # Job store
+    parser.add_argument("-js", "--job_store", help="Path to the job store recording this run, so it can be reattached with WebODM_jobs.py", type=str, default=WebODM_jobs.default_store_path)
+    
+    # Phase timing
+    parser.add_argument("-mf", "--metrics_file", help="Path to the JSON lines file the time of each phase of this run is appended to", type=str, default=WebODM_metrics.default_metrics_path)
+    parser.add_argument("-pt", "--prometheus_textfile", help="Path to a Prometheus textfile rewritten from the metrics file after the run (ex. for node_exporter)", type=str)
+    
+    return parser
 
 def get_options_file_path(args_dict):
     """
@@ -102,72 +144,75 @@ def get_options_file_path(args_dict):
     else: # if path provided, return joined path and name
         return os.path.join(options_file_path, options_name)
     
-def print_error(error_message):
-    """
-    Prints an error to the console and exits the system
-    
-    :param error_message: error message to be printed
-    :return: N/A
+def create_project(client, project_name):
     """
+    Creates a new project, raising on failure so scripts running several projects can carry on with the others
     
-    print(f"ERROR: {error_message} \nexiting with status 1")
-    sys.exit(1)
-    
-def post_authentication(username, password):
+    :param client: authenticated client (WebODMClient)
+    :param project_name: name of new project (str)
+    :return: id of new project
     """
-    Authenticates a user
     
-    :param username: username (str)
-    :param password: password (str)
-    :return: token or -1 if error
-    """
+    res = client.post('/api/projects/',
+                      data = {'name' : project_name})
+    res.raise_for_status()
+    res = res.json()
     
-    res = requests.post('http://localhost:8000/api/token-auth/',
-                    data = {'username': username, 
-                            'password': password}).json()
+    # get project id
+    if 'id' not in res:
+        raise ValueError("Unable to create Project")
     
-    # get authentication token
-    if 'token' in res:
-        return res['token'] 
-    else:
-        print_error("Invalid credentials")
-        
-def post_project(token, project_name):
+    return res['id']
+
+def post_project(client, project_name):
     """
     Creates a new project
     
-    :param token: authentication token (str)
+    :param client: authenticated client (WebODMClient)
     :param name: name of new project (str)
     :return: id of new project
     """
     
-    res = requests.post('http://localhost:8000/api/projects/',
-                        headers = {'Authorization': 'JWT {}'.format(token)}, #note, format replaces {} with token
-                        data = {'name' : project_name}).json() 
-    # get project id
-    if 'id' in res:
-        return res['id'] 
-    else:
+    try:
+        return create_project(client, project_name)
+    except (requests.RequestException, ValueError):
         print_error("Unable to create Project")
 
-def post_task(token, project_id, images, options):
+def post_task(client, project_id, images, options, stream=False, processing_node=None, webhook=None):
     """
     Sends images to WebODM
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_id: ID of project
-    :param images: list of images to send to server
+    :param images: list of images to send to server (list of (field, path, content type) tuples from get_upload_files if streaming)
     :param options: options for given task
+    :param stream: stream the files from disk one at a time, reporting throughput (bool)
+    :param processing_node: ID of processing node, None to let WebODM choose
+    :param webhook: URL the server should call when the task finishes, if it supports callbacks
     :return: ID of task
     
     """
 
-    res = requests.post('http://localhost:8000/api/projects/{}/tasks/'.format(project_id),
-                        headers = {'Authorization': 'JWT {}'.format(token)},
-                        files = images,
-                        data = {
-                            'options': options
-                        }).json()
+    # var
+    data = {'options': options}
+    if processing_node is not None:
+        data['processing_node'] = processing_node
+    if webhook is not None:
+        data['webhook'] = webhook
+
+    if stream:
+        # files are opened lazily while the body is sent
+        body = WebODM_upload.MultipartStream(data, images)
+        try:
+            res = client.post('/api/projects/{}/tasks/'.format(project_id),
+                              headers = {'Content-Type': body.content_type},
+                              data = body).json()
+        finally:
+            body.close()
+    else:
+        res = client.post('/api/projects/{}/tasks/'.format(project_id),
+                          files = images,
+                          data = data).json()
     
     # get project id
     if 'id' in res:
@@ -175,42 +220,26 @@ def post_task(token, project_id, images, options):
     else:
         print_error("Unable to create Task")
 
-def delete_project(token, project_id):
+def delete_project(client, project_id):
     """
     delete a project
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_id: ID of project to be deleted
     :return: N/A
     """
     
-    res = requests.delete("http://localhost:8000/api/projects/{}/".format(project_id),
-                          headers={'Authorization': 'JWT {}'.format(token)})
+    res = client.delete("/api/projects/{}/".format(project_id))
 
-def get_image_paths(dir_path):
+def open_upload_files(files):
     """
-    Gets all image paths from a given directory path
+    Opens a list of files to upload, in the format expected by requests
     
-    :param dir_path: directory path to images
-    :return images: list of image paths
+    :param files: list of (field, path, content type) tuples
+    :returns: list of (field, (file name, file, content type)) tuples
     """
     
-    # var
-    image_paths = list()
-    file_types = ("*.jpg", "*.jpeg", "*.JPG", "*.JPEG")
-    
-    # search for all file types
-    for type in file_types:
-        image_paths.extend(glob.glob(os.path.join(dir_path, type))) # add file paths of given type to image paths
-    
-    # check length
-    if len(image_paths) < min_number_of_images:
-        print_error("Less than {} images provided".format(min_number_of_images))
-    else:
-        print(f"Found {len(image_paths)} images")
-    
-    # return all of the paths
-    return image_paths
+    return [(field, (os.path.basename(path), open(path, 'rb'), content_type)) for field, path, content_type in files]
         
 def get_images(dir_path, image_paths):
     """
@@ -221,26 +250,80 @@ def get_images(dir_path, image_paths):
     :returns: images
     """
 
-    # create empty list of images    
-    images = list()
-    gcp_paths = list()
-    text_file_types = ["*.txt", "*.TXT"]
+    return open_upload_files(get_upload_files(dir_path, image_paths))
+
+def get_multispectral_paths(image_paths):
+    """
+    Groups multispectral images by capture and band, dropping incomplete captures, and stages them under unique names
+    
+    :param image_paths: paths to the images
+    :return: paths of images to upload, by capture then band
+    """
+    
+    # var
+    captures, bands, rejected, unbanded = WebODM_multispectral.bin_images(image_paths)
     
-    # iterate through each path
-    for image_path in image_paths:
-        # append tuple to images
-        images.append(('images', (os.path.basename(image_path), open(image_path, 'rb'), 'image/jpg')))
+    # notify user of images that were left out
+    if unbanded:
+        print(f"Skipped {len(unbanded)} images without a band (ex. {os.path.basename(unbanded[0])})")
+    for key, problem in rejected[:5]:
+        print(f"Rejected capture {key} ({problem})")
+    if len(rejected) > 5:
+        print(f"Rejected {len(rejected) - 5} more captures")
     
-    # append gcp data
-    for type in text_file_types: # check for gcp files
-        gcp_paths.extend(glob.glob(os.path.join(dir_path, type))) # add file paths of given type to image paths
+    # check length
+    if len(captures) < min_number_of_images:
+        print_error("Less than {} complete captures found".format(min_number_of_images))
+    
+    # notify user of binned captures
+    print(f"Binned {len(captures)} captures of {len(bands)} bands ({', '.join(bands)}), rejected {len(rejected)} incomplete captures")
+    
+    return WebODM_multispectral.stage_captures(captures, bands)
 
-    if gcp_paths != []: # check if gcp file give
-        for gcp_path in gcp_paths: # append all gcp files to end of images
-            images.append(('gcp', (os.path.basename(gcp_path), open(gcp_path, 'rb'), 'text/plain')))
+def get_thinned_image_paths(image_paths, min_distance, max_heading_delta):
+    """
+    Drops images taken within a ground distance of an image already kept, read from their GPS EXIF
+    
+    :param image_paths: paths to the images
+    :param min_distance: ground distance below which images are redundant (meters)
+    :param max_heading_delta: difference in heading above which images are kept anyway (degrees)
+    :return: paths of images to upload
+    """
+    
+    # var
+    thinned_paths = WebODM_spatial.thin_images(image_paths, min_distance, max_heading_delta)
+    
+    # check length
+    if len(thinned_paths) < min_number_of_images:
+        print_error("Less than {} images left after thinning, try a shorter distance".format(min_number_of_images))
+    
+    # notify user of reduction
+    print(f"Thinned {len(image_paths)} images to {len(thinned_paths)} ({(len(image_paths) - len(thinned_paths)) / len(image_paths) * 100:.0f}% fewer)")
+    
+    return thinned_paths
 
-    # return images
-    return images
+def get_resized_image_paths(image_paths, max_dimension, quality):
+    """
+    Downscales and recompresses JPEG images in parallel, writing them to the cache directory. Other formats are uploaded as they are
+    
+    :param image_paths: paths to the images
+    :param max_dimension: maximum width/height (pixels)
+    :param quality: JPEG quality (1-95)
+    :return: paths of images to upload
+    """
+    
+    try:
+        resized_paths = WebODM_preprocess.preprocess_images(image_paths, max_dimension, quality)
+    except ImportError as e:
+        print_error(e)
+    
+    # notify user of resized images
+    resized_count = sum(1 for old, new in zip(image_paths, resized_paths) if old != new)
+    old_size = sum(os.path.getsize(p) for p in image_paths)
+    new_size = sum(os.path.getsize(p) for p in resized_paths)
+    print(f"Resized {resized_count} images to {max_dimension}px ({WebODM_upload.format_bytes(old_size)} -> {WebODM_upload.format_bytes(new_size)})")
+    
+    return resized_paths
 
 def get_video_path(dir_path, video_file_name):
     """
@@ -268,139 +351,320 @@ def get_video_path(dir_path, video_file_name):
         print(f"{video_file_name} found")
         return video_path[0] # return the first found file path
 
-def get_video(dir_path, video_path, video_file_name):
+def get_srt_path(dir_path, video_file_name):
     """
-    Gets a video (and subtitle file) from a given directory path
+    Gets the path of the subtitle (SRT) file of a video, if there is one
     
     :param dir_path: path to directory containing video
-    :param video_path: path to video
     :param video_file_name: name of video file
-    :return: N/A
+    :return: path to SRT file, None if not found
     """
     
     # var
-    srt_file_path = str()
+    srt_file_path = list()
     subtitle_file_types = [f"{video_file_name}.srt", f"{video_file_name}.SRT"]
     
+    # check srt file
+    for t in subtitle_file_types:
+        srt_file_path.extend(glob.glob(os.path.join(dir_path, t)))
+    
+    return srt_file_path[0] if srt_file_path else None
+
+def get_video_files(dir_path, video_path, video_file_name):
+    """
+    Gets the files to upload for a video (and subtitle file), without opening them
+    
+    :param dir_path: path to directory containing video
+    :param video_path: path to video
+    :param video_file_name: name of video file
+    :return: list of (field, path, content type) tuples
+    """
+    
+    # var
+    srt_file_path = get_srt_path(dir_path, video_file_name)
+    
     video = list()
 
     # get video
     for i in range(2): # required to submit at least 2 images, so the video is uploaded twice
-        video.append(('images', (os.path.basename(video_path), open(video_path, 'rb'), 'video/mp4')))  
+        video.append(('images', video_path, 'video/mp4'))  
     
-    # check and append srt file
-    for t in subtitle_file_types:
-        srt_file_path = glob.glob(os.path.join(dir_path, t))
-        
+    # append srt file
     if srt_file_path:
-        video.append(('srt', (os.path.basename(srt_file_path), open(srt_file_path, 'rb'), '.srt')))
+        video.append(('srt', srt_file_path, '.srt'))
         
     return video
 
-def get_task(token, project_id, task_id):
+def get_keyframe_paths(dir_path, video_path, video_file_name, interval, distance):
+    """
+    Extracts sharp, distinct keyframes of a video locally, geotagged from its SRT file if there is one
+    
+    :param dir_path: path to directory containing video
+    :param video_path: path to video
+    :param video_file_name: name of video file
+    :param interval: seconds between keyframes
+    :param distance: meters flown between keyframes, or None to sample by interval
+    :return: paths of keyframes
+    """
+    
+    # var
+    srt_file_path = get_srt_path(dir_path, video_file_name)
+    
+    if distance and not srt_file_path:
+        print(f"No SRT file found for {video_file_name}, sampling every {interval} seconds instead of every {distance} meters")
+    
+    try:
+        keyframe_paths = WebODM_video.extract_keyframes(video_path, srt_file_path, interval, distance)
+    except ImportError as e:
+        print_error(e)
+    
+    # check length
+    if len(keyframe_paths) < min_number_of_images:
+        print_error("Less than {} keyframes extracted, try a shorter interval or distance".format(min_number_of_images))
+    
+    # notify user of extracted keyframes
+    keyframe_size = sum(os.path.getsize(p) for p in keyframe_paths)
+    print(f"Extracted {len(keyframe_paths)} keyframes ({WebODM_upload.format_bytes(os.path.getsize(video_path))} -> {WebODM_upload.format_bytes(keyframe_size)})")
+    
+    return keyframe_paths
+
+def get_video(dir_path, video_path, video_file_name):
+    """
+    Gets a video (and subtitle file) from a given directory path
+    
+    :param dir_path: path to directory containing video
+    :param video_path: path to video
+    :param video_file_name: name of video file
+    :return: video
+    """
+        
+    return open_upload_files(get_video_files(dir_path, video_path, video_file_name))
+
+def get_task(client, project_id, task_id):
     """
     Gets task
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_id: ID of project
     :param task_id: ID of task
     :return: task
     """
     
     # get project and task based on their respective identification
-    res = requests.get('http://localhost:8000/api/projects/{}/tasks/{}/'.format(project_id, task_id),
-                        headers = {'Authorization': 'JWT {}'.format(token)}).json()
+    res = client.get('/api/projects/{}/tasks/{}/'.format(project_id, task_id)).json()
     
     return res
 
-def get_download(token, project_name, project_id, task_id, output_dir, asset):
+def get_download(client, project_name, project_id, task_id, output_dir, asset):
     """
     Downloads a given asset. If output directory not found, defaults to root directory
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_name: name of project
     :param project_id: ID of project
     :param task_id: ID of task
     :param output_dir: directory of where the file should be downloaded
     :param asset: what to download (ex. orthophoto.tif)
-    :return: N/A
+    :return: paths of downloaded assets
     """
     
-    # get download
-    res = requests.get("http://localhost:8000/api/projects/{}/tasks/{}/download/{}".format(project_id, task_id, asset), 
-                        headers={'Authorization': 'JWT {}'.format(token)},
-                        stream=True)
+    return get_downloads(client, project_name, project_id, task_id, output_dir, [asset])
 
-    asset_path = str()
+def get_downloads(client, project_name, project_id, task_id, output_dir, assets):
+    """
+    Downloads several assets at the same time, splitting large files into segments. Interrupted downloads resume where they stopped
     
-    # check that output directory is valid
-    if output_dir == None:
-        # make directory 
-        os.makedirs("{}".format(project_name), exist_ok=True) 
-        
-        # get path
-        asset_path = os.path.join(project_name, asset)
-    elif os.path.exists(output_dir) and os.path.isdir(output_dir):
-        # make directory 
-        os.makedirs("{}/{}".format(output_dir, project_name), exist_ok=True)
-        
-        # get path
-        asset_path = os.path.join(output_dir, project_name)
-        asset_path = os.path.join(asset_path, asset)
-    else:
-        print(f"\nOutput_dir invalid, downloading {asset} to root directory\n")
+    :param client: authenticated client (WebODMClient)
+    :param project_name: name of project
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param output_dir: directory of where the files should be downloaded
+    :param assets: what to download (list, ex. ['orthophoto.tif', 'dsm.tif'])
+    :return: paths of downloaded assets
+    """
+    
+    # var
+    asset_dir = get_asset_dir(project_name, output_dir)
     
-    # write to new file in chunks 
-    with open(f"{asset_path}", 'wb') as f:
-        for chunk in res.iter_content(chunk_size=1024): 
-            if chunk:
-                f.write(chunk)
+    # download
+    try:
+        asset_paths = WebODM_download.download_assets(client, project_id, task_id, assets, asset_dir)
+    except (requests.RequestException, WebODM_download.DownloadError) as e:
+        print_error(f"Download interrupted ({e}), run again to resume")
 
     # print notification of download to console
-    print(f"Saved ./{asset_path}")
+    for asset_path in asset_paths:
+        print(f"Saved ./{asset_path}")
+    
+    return asset_paths
+    
+def get_extract(client, project_name, project_id, task_id, output_dir, patterns):
+    """
+    Extracts all.zip without keeping a copy of the archive, optionally only the members matching the given patterns
+    
+    :param client: authenticated client (WebODMClient)
+    :param project_name: name of project
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param output_dir: directory of where the files should be extracted
+    :param patterns: shell-style patterns of members to extract (list, ex. ['odm_dem/*']), empty to extract everything
+    :return: paths of extracted files
+    """
+    
+    # var
+    asset_dir = get_asset_dir(project_name, output_dir)
     
-def get_options(file_name):
+    # extract
+    try:
+        paths = WebODM_extract.extract_asset(client, "/api/projects/{}/tasks/{}/download/all.zip".format(project_id, task_id), 
+                                             asset_dir, patterns)
+    except (requests.RequestException, WebODM_extract.ExtractError) as e:
+        print_error(f"Extraction of all.zip failed ({e})")
+    
+    # print notification of extraction to console
+    print(f"Extracted {len(paths)} files to ./{asset_dir}")
+    
+    return paths
+    
+def get_cached_task(client, cache, cache_key):
+    """
+    Gets the task that already processed the same images and options, if it still exists and did not fail.
+    Only a task that is gone, failed or canceled is removed from the cache, other errors are raised
+    
+    :param client: authenticated client (WebODMClient)
+    :param cache: result cache (ResultCache)
+    :param cache_key: key of images and options
+    :return: task, None if there is no task to reuse
+    """
+    
+    # var
+    entry = cache.get(cache_key)
+    
+    if entry is None or entry['task_id'] is None:
+        return None
+    
+    # check task on server
+    res = client.get('/api/projects/{}/tasks/{}/'.format(entry['project_id'], entry['task_id']))
+    if res.status_code != 404:
+        res.raise_for_status() # the task may still exist, so nothing is removed
+    
+    if res.status_code == 404 or res.json()['status'] in (status_codes.FAILED, status_codes.CANCELED):
+        cache.remove(cache_key)
+        return None
+    
+    task = res.json()
+    task['project'] = entry['project_id']
+    
+    return task
+    
+def restore_cached_assets(cache, cache_key, assets, asset_dir):
     """
-    Reads in a JSON file to get the various options
+    Restores assets downloaded by an earlier run with the same images and options
     
-    :param file_name: file name of options (JSON)
+    :param cache: result cache (ResultCache)
+    :param cache_key: key of images and options
+    :param assets: what to restore (list, ex. ['orthophoto.tif'])
+    :param asset_dir: directory of where the files should be restored
+    :return: paths of restored assets, None if not every asset is cached
+    """
+    
+    restored_paths = cache.restore_assets(cache_key, assets, asset_dir)
+    
+    for path in restored_paths or list():
+        print(f"Restored ./{path} from cache")
+    
+    return restored_paths
+    
+def get_processing_node(client, image_count, processing_node=None):
+    """
+    Gets the processing node for a new task, the least loaded node that can take it if none is given
+    
+    :param client: authenticated client (WebODMClient)
+    :param image_count: number of images of the task
+    :param processing_node: ID of processing node chosen by the user, or None
+    :return: ID of processing node, None to let WebODM choose
+    """
+    
+    if processing_node is not None:
+        return processing_node
+    
+    node = WebODM_processing_nodes.select_processing_node(client, image_count)
+    
+    if node is None:
+        print("No processing node available for this task, letting WebODM choose")
+        return None
+    
+    print(f"Processing node selected: {node['label']} (queue {node['queue_count']})")
+    return node['id']
+    
+def get_split_options(client, image_paths, options, processing_node, node_memory=None):
+    """
+    Adds split-merge options planned from the image positions and the memory of the processing node
+    
+    :param client: authenticated client (WebODMClient)
+    :param image_paths: paths to the images
+    :param options: options in raw JSON format
+    :param processing_node: ID of processing node, or None
+    :param node_memory: memory of processing node (GB), read from the node if None
     :return: options in raw JSON format
     """
+    
+    # memory of node, assumed 16 GB if unknown
+    if node_memory is None and processing_node is not None:
+        node_memory = WebODM_processing_nodes.get_node_memory(client, processing_node)
+    if node_memory is None:
+        node_memory = 16
+        print(f"Memory of processing node unknown, planning split-merge for {node_memory} GB (set --node_memory)")
+    
+    plan = WebODM_split.plan_split(image_paths, node_memory)
+    
+    if plan is None:
+        print(f"Images fit in {node_memory:g} GB, no split-merge needed")
+        return options
+    
+    # notify user of plan
+    print(f"Split-merge planned: {plan['submodels']} submodels of about {plan['split']} images, overlap {plan['split_overlap']} m "
+          f"(about {plan['capacity']} images fit in {node_memory:g} GB)")
+    
+    return WebODM_split.set_split_options(options, plan)
 
-    with open(f"{file_name}", 'r') as file:
-        raw_options = file.read()
-
-    return raw_options
-
-def get_status(token, project_id, task_id):
+def get_upload_state_path(project_name):
+    """
+    Gets path of the file recording the progress of a parallel upload
+    
+    :param project_name: name of project
+    :return: upload state path (string)
+    """
+    
+    return f".{project_name}.upload.json"
+    
+def get_status(client, project_id, task_id):
     """
     Gets status of given project and task
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_id: ID of project
     :param task_id: ID of task
     :return: Status (corresponds to status_code), processing time (milliseconds ellapsed)
     """
     
     # get project and task based on their respective identification
-    res = requests.get('http://localhost:8000/api/projects/{}/tasks/{}/'.format(project_id, task_id),
-                        headers = {'Authorization': 'JWT {}'.format(token)}).json()
+    res = client.get('/api/projects/{}/tasks/{}/'.format(project_id, task_id)).json()
     # return status
     return res['status']
 
-def get_processing_time(token, project_id, task_id):
+def get_processing_time(client, project_id, task_id):
     """
     Gets processing time of given project and task
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param project_id: ID of project
     :param task_id: ID of task
     :return: Status (corresponds to status_code), processing time (milliseconds ellapsed)
     """
     
     # get project and task based on their respective identification
-    res = requests.get('http://localhost:8000/api/projects/{}/tasks/{}/'.format(project_id, task_id),
-                        headers = {'Authorization': 'JWT {}'.format(token)}).json()
+    res = client.get('/api/projects/{}/tasks/{}/'.format(project_id, task_id)).json()
     # return status
     return res['processing_time']
 
@@ -417,89 +681,277 @@ if __name__ == "__main__":
     options_file_name = get_options_file_path(args_dict) # assign options file name (and path)
     image_file_location = args_dict["image_files_dir"] # assign image file location
     output_dir = args_dict["output_dir"] # assign output directory
-    asset = args_dict["asset"] # assign asset to download (could be set to a default value)
+    assets = args_dict["asset"] # assign assets to download (could be set to a default value)
+    
+    # time each phase of the run, recorded even if the run stops early
+    metrics = WebODM_metrics.RunMetrics(args.metrics_file, args.prometheus_textfile, project_name=project_name,
+                                        options_profile=WebODM_variants.get_variant_name(options_file_name))
+    atexit.register(metrics.save)
     
     # get file paths 
-    if args.video:
-        video_path = get_video_path(image_file_location, args_dict['video'])
+    with metrics.phase("scan"):
+        if args.video:
+            video_path = get_video_path(image_file_location, args_dict['video'])
+            
+            # extract keyframes locally, so only stills are uploaded
+            if not args.video_upload:
+                image_paths = get_keyframe_paths(image_file_location, video_path, args_dict['video'], args.video_interval, args.video_distance)
+        else:
+            image_paths = get_image_paths(image_file_location, unique_names=not args.multispectral) # multispectral images are renamed when staged
+        
+    # thinning and resizing would break the captures and radiometry of multispectral images
+    if args.multispectral and (args.thin or args.resize):
+        print_error("--thin and --resize cannot be used with --multispectral")
+    
+    # check images before anything is sent
+    if args.preflight and not (args.video and args.video_upload):
+        with metrics.phase("validate"):
+            if not get_preflight_report(image_file_location, image_paths)['passed']:
+                metrics.set(status="invalid")
+                print_error("Pre-flight check failed")
+    
+    with metrics.phase("prepare"):
+        # group multispectral images by capture and band
+        if args.multispectral and not args.video:
+            image_paths = get_multispectral_paths(image_paths)
+        
+        # drop redundant images
+        if args.thin and not (args.video and args.video_upload):
+            image_paths = get_thinned_image_paths(image_paths, args.thin, args.thin_heading)
+        
+        # downscale images
+        if args.resize and not (args.video and args.video_upload):
+            image_paths = get_resized_image_paths(image_paths, args.resize, args.quality)
+    
+    # get images/video
+    if args.video and args.video_upload:
+        images = get_video_files(image_file_location, video_path, args_dict['video']) # note, video is uploaded as an image
     else:
-        image_paths = get_image_paths(image_file_location)
+        images = get_upload_files(image_file_location, image_paths)
+    metrics.set(image_count=len([f for f in images if f[0] == 'images']))
+    
+    # get options
+    options = get_options(options_file_name)
+    
+    # look up earlier runs with the same images and options, a split plan is only known once the node is chosen
+    cache = None if args.no_cache else WebODM_cache.ResultCache(max_size=args.cache_size * 1000 ** 3)
+    split = args.split_merge and not (args.video and args.video_upload)
+    if cache and not split:
+        cache_key = cache.get_key(images, options)
+        
+        # assets already downloaded, nothing to upload, process or download
+        if args.extract is None and not args.variant_options and restore_cached_assets(cache, cache_key, assets, get_asset_dir(project_name, output_dir)):
+            metrics.set(status="cached")
+            sys.exit(0)
     
     # authorize
-    token = post_authentication(username, password)
+    with metrics.phase("auth"):
+        client = post_authentication(username, password)
     
     # notify user of being logged in
     print(f"Logged in: {username}")
     
-    # create new project
-    project_id = post_project(token, project_name)
+    # record the run, so it can be reattached if this process stops
+    store = WebODM_jobs.JobStore(args.job_store)
     
-    # notify user of created project
-    print(f"Project created: {project_name}")
+    # listen for the server to call back when the task finishes
+    listener = WebODM_webhook.start_listener(args.webhook) if args.webhook else None
+    webhook_key, webhook_url = listener.register() if listener else (None, None)
     
-    # get images/video
-    if args.video:
-        images = get_video(image_file_location, video_path, args_dict['video']) # note, video is uploaded as an image
-    else:
-        images = get_images(image_file_location, image_paths)
-    
-    # get options
-    options = get_options(options_file_name)
-
-    # send images with the given options to server
-    task_id = post_task(token, project_id, images, options)
+    # split large datasets into submodels that fit the node, before the cache key is taken from the options
+    processing_node = None
+    if split:
+        processing_node = get_processing_node(client, len([f for f in images if f[0] == 'images']), args.processing_node)
+        options = get_split_options(client, image_paths, options, processing_node, args.node_memory)
+        
+        if cache:
+            cache_key = cache.get_key(images, options)
+            if args.extract is None and not args.variant_options and restore_cached_assets(cache, cache_key, assets, get_asset_dir(project_name, output_dir)):
+                metrics.set(status="cached")
+                sys.exit(0)
     
-    # monitor task until completion or failure
+    # reuse task of an earlier run, the cache is skipped for this run if the task cannot be checked
     try:
-        while True:
-            # get status 
-            status = get_status(token, project_id, task_id)
+        cached_task = get_cached_task(client, cache, cache_key) if cache else None
+    except (requests.RequestException, ValueError) as e:
+        print(f"Unable to check cached task ({e}), not using the cache for this run")
+        cache = None
+        cached_task = None
+    
+    if cached_task:
+        project_id = cached_task['project']
+        task_id = cached_task['id']
+        job_id = store.create_job(project_name, project_id, "processing", output_dir, assets, args.extract,
+                                  cache_key if cache else None, task_id)
+        metrics.set(status="cached", task_id=task_id)
+        
+        # notify user of reused task
+        print(f"Reusing task {task_id} of project {project_id}, which processed the same images and options")
+    else:
+        # var
+        upload_state_path = get_upload_state_path(project_name)
+        upload_state = WebODM_upload.get_upload_state(upload_state_path) if args.parallel_upload else None
+        
+        if upload_state: # resume interrupted upload in its project
+            project_id = upload_state['project_id']
             
-            # check status
-            if status == status_codes.COMPLETED:
-                print("Task completed")
-                break
-            elif status == status_codes.FAILED:
-                print_error("Task failed") # I am not deleting the task here, because it might be useful to keep it for diagnostic data
-                
+            # notify user of resumed project
+            print(f"Resuming project: {project_name}")
+        else:
+            # create new project
+            project_id = post_project(client, project_name)
+            
+            # notify user of created project
+            print(f"Project created: {project_name}")
+        
+        # continue the job of an interrupted upload
+        job = store.find_job(project_id) if upload_state else None
+        if job:
+            job_id = job['id']
+            store.update(job_id, owner_pid=os.getpid())
+        else:
+            job_id = store.create_job(project_name, project_id, "uploading", output_dir, assets, args.extract,
+                                      cache_key if cache else None)
+        
+        # get processing node, a resumed upload keeps the node (and callback) of its task
+        if upload_state:
+            webhook_key = None
+        elif not split:
+            processing_node = get_processing_node(client, len([f for f in images if f[0] == 'images']), args.processing_node)
+    
+        # send images with the given options to server
+        with metrics.phase("upload") as upload:
+            # a resumed upload only sends the files the server had not confirmed yet
+            uploaded = set(upload_state['uploaded']) if upload_state else set()
+            upload['bytes'] = WebODM_metrics.get_size(path for field, path, content_type in images if path not in uploaded)
+            
+            if args.parallel_upload:
+                try:
+                    task_id = WebODM_upload.post_task_resumable(client, project_id, images, options, upload_state_path, 
+                                                                batch_size=args.batch_size, threads=args.threads,
+                                                                processing_node=None if upload_state else processing_node, webhook=webhook_url)
+                except (requests.RequestException, WebODM_upload.UploadError) as e:
+                    state = WebODM_upload.get_upload_state(upload_state_path) # only the batches confirmed before the interruption were sent
+                    upload['bytes'] = WebODM_metrics.get_size(p for p in state['uploaded'] if p not in uploaded) if state else 0
+                    store.update(job_id, detail=str(e), error=str(e), owner_pid=None)
+                    metrics.set(status="interrupted")
+                    print_error(f"Upload interrupted ({e}), run again to resume")
             else:
-                # processing_time = get_processing_time(token, project_id, task_id)
-                res = get_task(token, project_id, task_id)
-                processing_time = res['processing_time']
-                progress = res['running_progress']
-                # print(res.keys())
-                
-                # format time
-                s = processing_time / 1000 # convert from milliseconds to seconds
-                s = 0 if processing_time < 0 else s # set to zero if less than zero
-                m, s = divmod(s, 60) # get minutes
-                h, m = divmod(m, 60) # get hours
-
-                # get time 
-                elapsed_time = f'{round(h):02}:{round(m):02}:{round(s):02}'
+                if not args.stream: # open every file up front
+                    images = open_upload_files(images)
                 
-                # print time
-                print(f"Processing . . . ({elapsed_time}) ({progress*100:2.2f}%)")
-                
-                # sleep
-                time.sleep(3)
+                task_id = post_task(client, project_id, images, options, stream=args.stream, processing_node=processing_node, webhook=webhook_url)
+        metrics.set(task_id=task_id)
+        
+        # remember task for later runs
+        if cache:
+            cache.put(cache_key, project_id, task_id)
+        store.update(job_id, "processing", task_id=task_id)
+    
+    # process the same upload with the other options profiles
+    if args.variant_options:
+        variants = [{'name': WebODM_variants.get_variant_name(options_file_name), 'options': options, 'task_id': task_id}]
+        for variant_options_name in args.variant_options:
+            variant_options_path = variant_options_name if args.options_dir is None else os.path.join(args.options_dir, variant_options_name)
+            variants.append({'name': WebODM_variants.get_variant_name(variant_options_path), 'options': get_options(variant_options_path)})
+        for variant in variants:
+            variant['cache_key'] = cache.get_key(images, variant['options']) if cache else None
+        
+        # names are the directories assets are saved to
+        if len({v['name'] for v in variants}) < len(variants):
+            print_error("Options files of variants must have different names")
+        
+        # the job of the upload is the first variant's
+        store.update(job_id, variant=variants[0]['name'])
+        variants[0]['job_id'] = job_id
+        
+        try:
+            summaries = asyncio.run(WebODM_variants.run_variants(client, project_name, project_id, variants, output_dir, assets, args.extract, cache,
+                                                                 image_count=len([f for f in images if f[0] == 'images']), store=store))
+        except (requests.RequestException, WebODM_variants.VariantError) as e:
+            print_error(e)
+        except KeyboardInterrupt:
+            # leave the tasks processing on the server
+            job_ids = [v['job_id'] for v in variants if v.get('job_id')]
+            for variant_job_id in job_ids:
+                store.update(variant_job_id, owner_pid=None)
+            metrics.set(status="interrupted")
+            
+            # stop program 
+            print_error(f"KeyboardInterrupt, tasks keep processing, reattach with: python WebODM_jobs.py reattach {' '.join(map(str, job_ids))}")
+        
+        WebODM_variants.print_summary(summaries)
+        metrics.set(status="completed" if all(s['status'] == 'COMPLETED' for s in summaries) else "failed")
+        sys.exit(0 if all(s['status'] == 'COMPLETED' for s in summaries) else 1)
+    
+    # monitor task until completion or failure, a callback only cuts the wait short since stock WebODM does not call back per task
+    if webhook_key and not cached_task:
+        monitor = WebODM_monitor.TaskMonitor(client, project_id, task_id, wait=lambda interval: listener.wait(webhook_key, interval))
+    else:
+        monitor = WebODM_monitor.TaskMonitor(client, project_id, task_id)
+    monitor_start = time.perf_counter()
+    try:
+        res = monitor.run() # final task
+    except (requests.RequestException, ValueError) as e:
+        # not a temporary failure (ex. the task was deleted), or the server stayed unreachable
+        store.update(job_id, detail=str(e), error=str(e), owner_pid=None)
+        metrics.set(status="interrupted")
+        print_error(f"Unable to watch task ({e}), reattach with: python WebODM_jobs.py reattach {job_id}")
     except KeyboardInterrupt:
-        # delete project
-        delete_project(token, project_id)
+        # leave the task processing on the server
+        store.update(job_id, owner_pid=None)
+        metrics.set(status="interrupted")
         
         # stop program 
-        print_error("KeyboardInterrupt")
+        print_error(f"KeyboardInterrupt, task keeps processing, reattach with: python WebODM_jobs.py reattach {job_id}")
+    
+    # split the time watched into waiting for a node and processing, a reused task was mostly done before this run
+    if not cached_task:
+        running_time = res['processing_time'] / 1000 if res['processing_time'] > 0 else 0
+        metrics.add("queue", max(0, time.perf_counter() - monitor_start - running_time))
+        metrics.add("running", running_time)
+    metrics.set(processing_node=res.get('processing_node_name') or res.get('processing_node'))
+    
+    # check status
+    if res['status'] == status_codes.FAILED:
+        store.update(job_id, "failed", owner_pid=None)
+        metrics.set(status="failed")
+        print_error("Task failed") # I am not deleting the task here, because it might be useful to keep it for diagnostic data
+    elif res['status'] == status_codes.CANCELED:
+        store.update(job_id, "canceled", owner_pid=None)
+        metrics.set(status="canceled")
+        print_error("Task canceled")
+    
+    print("Task completed")
+    store.update(job_id, "downloading")
     
     # print total time
-    print(f'Total Time: {elapsed_time}')
+    print(f'Total Time: {WebODM_monitor.format_processing_time(res["processing_time"])}')
     
     # get available assets
-    res = get_task(token, project_id, task_id) # get task
     available_assets = res['available_assets'] # get all available assets
     
-    # validate chosen asset
-    asset = validate_asset(available_assets, asset)
+    # validate chosen assets
+    assets = list(dict.fromkeys(validate_asset(available_assets, a) for a in assets)) # remove duplicates, keep order
+    
+    with metrics.phase("download") as download:
+        download['bytes'] = 0
+        
+        # extract all.zip instead of downloading it
+        if args.extract is not None and 'all.zip' in assets:
+            assets.remove('all.zip')
+            download['bytes'] += WebODM_metrics.get_size(get_extract(client, project_name, project_id, task_id, output_dir, args.extract))
+        
+        # download assets
+        if assets:
+            asset_paths = get_downloads(client, project_name, project_id, task_id, output_dir, assets)
+            download['bytes'] += WebODM_metrics.get_size(asset_paths)
+            
+            # keep assets for later runs
+            if cache:
+                cache.store_assets(cache_key, asset_paths)
     
-    # download asset
-    get_download(token, project_name, project_id, task_id, output_dir, asset)
+    store.update(job_id, "done", owner_pid=None)
+    if not cached_task:
+        metrics.set(status="completed")
 
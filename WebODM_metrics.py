@@ -0,0 +1,338 @@
+"""
+WebODM_metrics.py: Record how long each phase of a run takes (and how fast it moves data), as JSON lines with a Prometheus export
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, sys, json, time, uuid, argparse, contextlib, collections, http.server # standard libraries
+
+# global variables
+
+default_metrics_path = ".webodm_metrics.jsonl"
+phases = ("scan", "validate", "prepare", "auth", "upload", "queue", "running", "download") # in run order
+default_port = 9108
+
+# classes
+
+class RunMetrics:
+    """
+    Timing of the phases of one run, with the bytes moved by uploads and downloads. The run is
+    appended to a JSON lines file as one record when saved, so every run of every script adds up
+    """
+
+    def __init__(self, path=default_metrics_path, textfile_path=None, **labels):
+        """
+        :param path: path to JSON lines file
+        :param textfile_path: path to Prometheus textfile rewritten from every record when saved, or None
+        :param labels: fields describing the run (ex. project_name, options_profile, image_count, processing_node)
+        """
+
+        self.path = path
+        self.textfile_path = textfile_path
+        self.start = time.perf_counter()
+        self.saved = False
+        self.record = {'run_id': uuid.uuid4().hex[:12], 'started': time.time(), 'status': 'incomplete', **labels, 'phases': dict()}
+
+    def set(self, **fields):
+        """
+        Sets fields of the record (ex. status, task_id, processing_node)
+
+        :param fields: fields to set
+        :return: N/A
+        """
+
+        self.record.update(fields)
+
+    def add(self, name, seconds, bytes=None):
+        """
+        Adds time (and bytes) to a phase, a phase run several times adds up
+
+        :param name: name of phase (ex. upload)
+        :param seconds: time spent (seconds)
+        :param bytes: bytes moved, None if the phase moves no data
+        :return: N/A
+        """
+
+        # var
+        phase = self.record['phases'].setdefault(name, {'seconds': 0.0})
+        phase['seconds'] = round(phase['seconds'] + seconds, 3)
+
+        if bytes is not None:
+            phase['bytes'] = phase.get('bytes', 0) + bytes
+            phase['mb_per_s'] = round(phase['bytes'] / 1e6 / phase['seconds'], 2) if phase['seconds'] > 0 else None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times the code run inside it as a phase. The yielded dictionary takes the bytes moved, if any
+
+        :param name: name of phase (ex. upload)
+        :return: context manager yielding a dictionary
+        """
+
+        # var
+        fields = {'bytes': None}
+        start = time.perf_counter()
+
+        try:
+            yield fields
+        finally:
+            self.add(name, time.perf_counter() - start, fields['bytes'])
+
+    def save(self):
+        """
+        Appends the record to the JSON lines file, once, and rewrites the Prometheus textfile
+
+        :param: N/A
+        :return: N/A
+        """
+
+        if self.saved:
+            return
+        self.saved = True
+
+        self.record['total_seconds'] = round(time.perf_counter() - self.start, 3)
+
+        # one write per line, so runs of several processes do not interleave
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(self.record) + "\n")
+
+        if self.textfile_path:
+            write_textfile(self.textfile_path, read_records(self.path))
+
+# functions
+
+def get_size(paths):
+    """
+    Gets the total size of files
+
+    :param paths: paths to files
+    :return: size (bytes)
+    """
+
+    return sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+
+def read_records(path=default_metrics_path):
+    """
+    Reads the records of a JSON lines file, skipping lines cut off by a process that stopped while writing
+
+    :param path: path to JSON lines file
+    :return: records (list of dictionaries)
+    """
+
+    # var
+    records = list()
+
+    if not os.path.isfile(path):
+        return records
+
+    with open(path, 'r') as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return records
+
+def format_labels(labels):
+    """
+    Formats Prometheus labels, escaping their values
+
+    :param labels: labels (dictionary)
+    :return: formatted labels (ex. '{phase="upload"}')
+    """
+
+    # var
+    escaped = {k: str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for k, v in labels.items()}
+
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+def get_prometheus_text(records):
+    """
+    Aggregates records into Prometheus text format: runs by status, and time and bytes of each phase,
+    by options profile and processing node
+
+    :param records: records (list of dictionaries)
+    :return: text (str)
+    """
+
+    # var
+    runs = collections.Counter()
+    seconds = collections.defaultdict(lambda: [0.0, 0]) # labels: [sum, count]
+    moved = collections.Counter()
+
+    for record in records:
+        profile = record.get('options_profile') or ""
+        node = record.get('processing_node') or ""
+        runs[(('status', record.get('status')), ('profile', profile))] += 1
+        for name, phase in record.get('phases', dict()).items():
+            key = (('phase', name), ('profile', profile), ('node', node))
+            seconds[key][0] += phase['seconds']
+            seconds[key][1] += 1
+            if phase.get('bytes') is not None:
+                moved[key] += phase['bytes']
+
+    lines = ["# HELP webodm_runs_total Runs recorded, by final status",
+             "# TYPE webodm_runs_total counter"]
+    lines += [f"webodm_runs_total{format_labels(dict(key))} {count}" for key, count in sorted(runs.items(), key=str)]
+
+    lines += ["# HELP webodm_phase_seconds Wall-clock time spent in each phase of a run",
+              "# TYPE webodm_phase_seconds summary"]
+    for key, (total, count) in sorted(seconds.items(), key=str):
+        lines += [f"webodm_phase_seconds_sum{format_labels(dict(key))} {round(total, 3)}",
+                  f"webodm_phase_seconds_count{format_labels(dict(key))} {count}"]
+
+    lines += ["# HELP webodm_phase_bytes_total Bytes uploaded or downloaded in each phase",
+              "# TYPE webodm_phase_bytes_total counter"]
+    lines += [f"webodm_phase_bytes_total{format_labels(dict(key))} {total}" for key, total in sorted(moved.items(), key=str)]
+
+    lines += ["# HELP webodm_last_run_timestamp_seconds Start time of the latest run",
+              "# TYPE webodm_last_run_timestamp_seconds gauge",
+              f"webodm_last_run_timestamp_seconds {max((r['started'] for r in records), default=0)}"]
+
+    return "\n".join(lines) + "\n"
+
+def write_textfile(path, records):
+    """
+    Writes records as a Prometheus textfile (ex. for node_exporter's textfile collector), replacing the file atomically
+
+    :param path: path to textfile (*.prom)
+    :param records: records (list of dictionaries)
+    :return: N/A
+    """
+
+    # var
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, 'w') as file:
+        file.write(get_prometheus_text(records))
+    os.replace(temp_path, path)
+
+def serve(path=default_metrics_path, port=default_port):
+    """
+    Serves the records of a JSON lines file at /metrics for Prometheus to scrape, reading the file on every scrape
+
+    :param path: path to JSON lines file
+    :param port: port to listen on
+    :return: N/A
+    """
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_prometheus_text(read_records(path)).encode("utf-8")
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # scrapes are not printed
+
+    http.server.ThreadingHTTPServer(("", port), MetricsHandler).serve_forever()
+
+def summarize(records):
+    """
+    Works out where wall-clock time goes across runs: for each phase, its median and 95th percentile time,
+    its share of the total time of all runs, and its median throughput
+
+    :param records: records (list of dictionaries)
+    :return: summary of each phase, in run order (list of dictionaries)
+    """
+
+    # var
+    total = sum(r.get('total_seconds', 0) for r in records)
+    by_phase = collections.defaultdict(list)
+    rates = collections.defaultdict(list)
+
+    for record in records:
+        for name, phase in record.get('phases', dict()).items():
+            by_phase[name].append(phase['seconds'])
+            if phase.get('mb_per_s') is not None:
+                rates[name].append(phase['mb_per_s'])
+
+    summary = list()
+    for name in sorted(by_phase, key=lambda n: phases.index(n) if n in phases else len(phases)):
+        values = sorted(by_phase[name])
+        summary.append({'phase': name, 'runs': len(values), 'median_seconds': values[len(values) // 2],
+                        'p95_seconds': values[min(len(values) - 1, int(len(values) * 0.95))],
+                        'share': sum(values) / total if total else None,
+                        'median_mb_per_s': sorted(rates[name])[len(rates[name]) // 2] if rates[name] else None})
+
+    return summary
+
+def print_summary(records):
+    """
+    Prints the summary of records to the console
+
+    :param records: records (list of dictionaries)
+    :return: N/A
+    """
+
+    # var
+    statuses = collections.Counter(r.get('status') for r in records)
+
+    print(f"{len(records)} runs (" + ", ".join(f"{count} {status}" for status, count in statuses.most_common()) + ")")
+    for s in summarize(records):
+        print(f"\t* {s['phase']}: median {s['median_seconds']:.1f}s, p95 {s['p95_seconds']:.1f}s"
+              + (f", {s['share'] * 100:.1f}% of wall-clock" if s['share'] is not None else "")
+              + (f", median {s['median_mb_per_s']} MB/s" if s['median_mb_per_s'] is not None else ""))
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Command
+    parser.add_argument("command", help="print where time goes, write a Prometheus textfile, or serve /metrics over HTTP",
+                        choices=["summary", "prometheus", "serve"])
+
+    # Metrics file
+    parser.add_argument("-mf", "--metrics_file", help="Path to JSON lines file of run metrics", type=str, default=default_metrics_path)
+
+    # Filter by options profile
+    parser.add_argument("-pr", "--profile", help="Only include runs of this options profile (summary only)", type=str)
+
+    # Textfile path
+    parser.add_argument("-o", "--output", help="Path to Prometheus textfile (prometheus only)", type=str, default="webodm.prom")
+
+    # Port
+    parser.add_argument("-p", "--port", help="Port to serve /metrics on (serve only)", type=int, default=default_port)
+
+    return parser
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        print(f"Serving {args.metrics_file} at http://localhost:{args.port}/metrics, press Ctrl+C to stop")
+        try:
+            serve(args.metrics_file, args.port)
+        except KeyboardInterrupt:
+            sys.exit(0)
+
+    # var
+    records = read_records(args.metrics_file)
+
+    if args.command == "prometheus":
+        write_textfile(args.output, records)
+        print(f"Wrote {len(records)} runs to {args.output}")
+    else:
+        if args.profile:
+            records = [r for r in records if r.get('options_profile') == args.profile]
+        print_summary(records)
@@ -0,0 +1,229 @@
+"""
+WebODM_monitor.py: Monitor a task with one request per tick, polling less often while nothing changes
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import time # standard libraries
+import requests
+import status_codes
+
+# global variables
+
+terminal_statuses = (status_codes.FAILED, status_codes.COMPLETED, status_codes.CANCELED)
+max_failures = 10 # consecutive failed requests before giving up on a task
+
+# functions
+
+def is_retryable(error):
+    """
+    Checks if a failed request may succeed when sent again
+
+    Connection errors, timeouts, server errors, rate limits and bodies that are not JSON (ex. a proxy
+    error page) are temporary. Any other HTTP error (ex. 404 for a task that does not exist) is not.
+
+    :param error: exception raised by the request
+    :return: True if the request should be retried, False otherwise
+    """
+
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and (error.response.status_code >= 500 or error.response.status_code == 429)
+
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ValueError))
+
+def format_processing_time(processing_time):
+    """
+    Formats a processing time as hours, minutes and seconds
+
+    :param processing_time: processing time (milliseconds ellapsed)
+    :return: formatted time (ex. '01:02:03')
+    """
+
+    s = processing_time / 1000 # convert from milliseconds to seconds
+    s = 0 if processing_time < 0 else s # set to zero if less than zero
+    m, s = divmod(s, 60) # get minutes
+    h, m = divmod(m, 60) # get hours
+
+    return f'{round(h):02}:{round(m):02}:{round(s):02}'
+
+def print_task_progress(task):
+    """
+    Prints processing time and progress of a task to the console. Default progress callback of TaskMonitor
+
+    :param task: task (dictionary returned by the API)
+    :return: N/A
+    """
+
+    # var
+    elapsed_time = format_processing_time(task['processing_time'])
+    progress = task['running_progress']
+
+    if task['status'] == status_codes.QUEUED:
+        print(f"Queued . . . ({elapsed_time})")
+    else:
+        print(f"Processing . . . ({elapsed_time}) ({progress*100:2.2f}%)")
+
+class TaskMonitor:
+    """
+    Polls a task until it is completed, failed or canceled
+
+    Each tick is a single GET of the task. The interval between ticks grows while the task
+    is queued or its progress does not move, shrinks while progress is being made, and is
+    capped by the estimated time left so completion is noticed soon after it happens.
+    """
+
+    def __init__(self, client, project_id, task_id, on_progress=print_task_progress, on_status=None,
+                 min_interval=2.0, max_interval=60.0, backoff=1.5, wait=time.sleep):
+        """
+        :param client: authenticated client (WebODMClient)
+        :param project_id: ID of project
+        :param task_id: ID of task
+        :param on_progress: function called with the task after every tick, or None
+        :param on_status: function called with the task and the previous status when the status changes, or None
+        :param min_interval: shortest time between ticks (seconds)
+        :param max_interval: longest time between ticks (seconds)
+        :param backoff: factor the interval grows by while nothing changes
+        :param wait: function called with the interval between ticks, which may return early (ex. when a webhook arrives)
+        """
+
+        # var
+        self.client = client
+        self.project_id = project_id
+        self.task_id = task_id
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.wait = wait
+
+        # polling state
+        self.interval = min_interval
+        self.requests = 0 # number of requests sent
+        self.status = None
+        self.last_progress = None
+        self.last_tick = None
+        self.failures = 0 # consecutive failed requests
+
+    def get_task(self):
+        """
+        Gets the task, the only request sent per tick
+
+        :param: N/A
+        :return: task
+        """
+
+        self.requests += 1
+        res = self.client.get('/api/projects/{}/tasks/{}/'.format(self.project_id, self.task_id))
+        res.raise_for_status() # an error body is not a task, see retry_delay
+        task = res.json()
+        self.failures = 0
+
+        return task
+
+    def retry_delay(self, error):
+        """
+        Works out how long to wait before sending a failed request again, doubling with every consecutive failure
+
+        :param error: exception raised by get_task
+        :return: delay (seconds), the error is raised again if it is not temporary or too many requests failed in a row
+        """
+
+        if not is_retryable(error) or self.failures >= max_failures:
+            raise error
+
+        self.failures += 1
+
+        return min(self.max_interval, max(self.min_interval, 1) * 2 ** (self.failures - 1))
+
+    def next_interval(self, task):
+        """
+        Works out how long to wait before the next tick
+
+        :param task: task of this tick
+        :return: interval (seconds)
+        """
+
+        # var
+        now = time.time()
+        progress = task['running_progress']
+        interval = self.interval
+
+        if task['status'] == status_codes.RUNNING and self.last_progress is not None and progress > self.last_progress:
+            # progress is being made, poll a bit more often
+            interval = interval / self.backoff
+
+            # estimate time left from the rate of progress since the last tick
+            rate = (progress - self.last_progress) / (now - self.last_tick)
+            interval = min(interval, (1 - progress) / rate)
+        else:
+            # queued or no visible progress, poll less often
+            interval = interval * self.backoff
+
+        self.last_progress = progress
+        self.last_tick = now
+        self.interval = max(self.min_interval, min(self.max_interval, interval))
+
+        return self.interval
+
+    def update(self, task):
+        """
+        Records the status of a tick, calling on_status if it changed
+
+        :param task: task of this tick
+        :return: True if the status changed, False otherwise
+        """
+
+        if task['status'] == self.status:
+            return False
+
+        # notify of status change
+        previous_status = self.status
+        self.status = task['status']
+        if self.on_status is not None:
+            self.on_status(task, previous_status)
+
+        return True
+
+    def watch(self):
+        """
+        Polls the task, yielding it after every tick until it reaches a final status
+
+        :param: N/A
+        :return: generator of tasks, the last one having a final status
+        """
+
+        while True:
+            # a temporary failure (ex. a 502 while the server restarts) is retried with backoff, anything else is raised
+            try:
+                task = self.get_task()
+            except (requests.RequestException, ValueError) as e:
+                delay = self.retry_delay(e)
+                print(f"Request failed ({e}), retrying in {delay:.0f}s")
+                self.wait(delay)
+                continue
+
+            self.update(task)
+
+            yield task
+
+            if task['status'] in terminal_statuses:
+                return
+
+            self.wait(self.next_interval(task))
+
+    def run(self):
+        """
+        Polls the task until it reaches a final status, calling on_progress after every tick
+
+        :param: N/A
+        :return: final task, including its available assets
+        """
+
+        for task in self.watch():
+            if self.on_progress is not None and task['status'] not in terminal_statuses:
+                self.on_progress(task)
+
+        return task
@@ -0,0 +1,128 @@
+"""
+WebODM_multispectral.py: Group multispectral images by capture and band, drop incomplete captures, and stage them for upload
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, re, hashlib # standard libraries
+import WebODM_cache
+import WebODM_spatial
+
+# global variables
+
+default_cache_dir = ".webodm_cache" # scratch directory for staged captures
+band_suffix_pattern = re.compile(r"^(.*)_(\d+)$") # IMG_0001_1.tif: capture IMG_0001, band 1
+
+# functions
+
+def get_band(path, metadata):
+    """
+    Gets the band of an image, from its XMP band name, or the number at the end of its file name
+
+    :param path: path to image
+    :param metadata: image metadata from WebODM_exif.read_metadata
+    :return: band name (str), None if unknown
+    """
+
+    if metadata.get('band_name'):
+        return metadata['band_name']
+
+    match = band_suffix_pattern.match(os.path.splitext(os.path.basename(path))[0])
+
+    return match.group(2) if match and os.path.splitext(path)[1].lower() in (".tif", ".tiff") else None
+
+def get_capture(path, metadata):
+    """
+    Gets the capture an image belongs to, from its XMP capture ID, its time to the sub-second, or its file name without band number
+
+    :param path: path to image
+    :param metadata: image metadata from WebODM_exif.read_metadata
+    :return: capture key (str)
+    """
+
+    if metadata.get('capture_id'):
+        return metadata['capture_id']
+
+    if metadata.get('datetime') and metadata.get('subsec'):
+        return f"{metadata['datetime']}.{metadata['subsec']}"
+
+    match = band_suffix_pattern.match(os.path.splitext(os.path.basename(path))[0])
+
+    return os.path.join(os.path.dirname(path), match.group(1) if match else os.path.basename(path))
+
+def bin_images(image_paths, threads=8):
+    """
+    Groups images by capture and band, reading their metadata in parallel. Captures missing a band,
+    or with a band twice, are rejected, since ODM needs every band of every capture to align them
+
+    :param image_paths: paths to images
+    :param threads: number of images read at the same time
+    :return: captures (list of dictionaries of band: path), bands in wavelength order (list),
+             rejected captures (list of (capture key, problem)), images without a band (list)
+    """
+
+    # var
+    metadata = WebODM_spatial.get_positions(image_paths, threads)
+    captures = dict() # capture key: list of (band, path)
+    wavelengths = dict() # band: central wavelength
+    unbanded = list()
+
+    # group
+    for path, m in zip(image_paths, metadata):
+        band = get_band(path, m)
+        if band is None:
+            unbanded.append(path)
+            continue
+        captures.setdefault(get_capture(path, m), list()).append((band, path))
+        if m.get('central_wavelength'):
+            wavelengths.setdefault(band, m['central_wavelength'])
+
+    # bands of the camera, by wavelength if known
+    bands = sorted({band for images in captures.values() for band, path in images},
+                   key=lambda b: (wavelengths.get(b, float('inf')), int(b) if b.isdigit() else 0, b))
+
+    # keep complete captures, in capture order
+    complete = list()
+    rejected = list()
+    for key in sorted(captures, key=lambda k: min(p for b, p in captures[k])):
+        images = dict(captures[key])
+        missing = [b for b in bands if b not in images]
+        if missing:
+            rejected.append((key, "missing " + ", ".join(missing)))
+        elif len(images) < len(captures[key]):
+            rejected.append((key, "band repeated"))
+        else:
+            complete.append(images)
+
+    return complete, bands, rejected, unbanded
+
+def stage_captures(captures, bands, cache_dir=default_cache_dir):
+    """
+    Links the images of complete captures into a staging directory, named IMG_<capture>_<band number>
+    so names are unique across the camera's folders and ODM can also tell the bands apart by name
+
+    :param captures: captures from bin_images
+    :param bands: bands from bin_images, in order
+    :param cache_dir: scratch directory for staged captures
+    :return: paths of staged images, by capture then band (list)
+    """
+
+    # one directory per image set
+    source = "\n".join(sorted(os.path.abspath(p) for c in captures for p in c.values()))
+    staging_dir = os.path.join(cache_dir, "multispectral", hashlib.sha1(source.encode("utf-8")).hexdigest()[:16])
+    os.makedirs(staging_dir, exist_ok=True)
+
+    # var
+    staged_paths = list()
+
+    for i, capture in enumerate(captures):
+        for band_number, band in enumerate(bands, 1):
+            path = capture[band]
+            staged_path = os.path.join(staging_dir, f"IMG_{i:04d}_{band_number}{os.path.splitext(path)[1].lower()}")
+            if not os.path.isfile(staged_path) or os.path.getmtime(staged_path) < os.path.getmtime(path):
+                WebODM_cache.link_or_copy(path, staged_path)
+            staged_paths.append(staged_path)
+
+    return staged_paths
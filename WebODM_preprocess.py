@@ -0,0 +1,151 @@
+"""
+WebODM_preprocess.py: Downscale and recompress images in parallel before upload, keeping their EXIF/GPS/XMP metadata
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, io, hashlib, concurrent.futures # standard libraries
+
+try:
+    from PIL import Image # optional, only needed to resize images
+except ImportError:
+    Image = None
+
+# global variables
+
+default_cache_dir = ".webodm_cache" # scratch directory for processed images
+jpeg_extensions = (".jpg", ".jpeg") # other formats (TIFF, PNG) are uploaded as they are, recompressing them as JPEG would lose bands or bit depth
+
+# functions
+
+def get_app_segments(data):
+    """
+    Gets the APP1-APP15 segments of a JPEG (EXIF, XMP, ICC profile, maker data, ...)
+
+    :param data: JPEG file contents (bytes)
+    :return: segments including their markers (list of bytes)
+    """
+
+    # var
+    segments = list()
+    position = 2 # skip SOI
+
+    # walk the markers until the image data starts
+    while position + 4 <= len(data) and data[position] == 0xFF:
+        marker = data[position + 1]
+        length = int.from_bytes(data[position + 2:position + 4], 'big')
+
+        if marker == 0xDA: # start of scan
+            break
+        if 0xE1 <= marker <= 0xEF:
+            segments.append(data[position:position + 2 + length])
+
+        position += 2 + length
+
+    return segments
+
+def insert_app_segments(data, segments):
+    """
+    Replaces the APP0 segment of a JPEG written by Pillow with the metadata segments of the original
+
+    :param data: JPEG file contents (bytes)
+    :param segments: segments from get_app_segments (list of bytes)
+    :return: JPEG file contents (bytes)
+    """
+
+    # var
+    position = 2 # skip SOI
+
+    # drop APP0 (JFIF) so EXIF directly follows SOI, as cameras write it
+    if data[position:position + 2] == b"\xFF\xE0":
+        position += 2 + int.from_bytes(data[position + 2:position + 4], 'big')
+
+    return data[:2] + b"".join(segments) + data[position:]
+
+def get_cache_path(image_path, cache_dir, max_dimension, quality):
+    """
+    Gets the path a processed image is cached at. The file name is kept, since GCP files refer to images by name
+
+    :param image_path: path to original image
+    :param cache_dir: scratch directory for processed images
+    :param max_dimension: maximum width/height (pixels)
+    :param quality: JPEG quality (1-95)
+    :return: cache path (str)
+    """
+
+    # one directory per source directory and settings
+    source_dir = hashlib.sha1(os.path.abspath(os.path.dirname(image_path)).encode("utf-8")).hexdigest()[:16]
+
+    return os.path.join(cache_dir, "resized", f"{max_dimension}_{quality}", source_dir, os.path.basename(image_path))
+
+def resize_image(image_path, cache_path, max_dimension, quality):
+    """
+    Downscales and recompresses one JPEG image, keeping its metadata. Runs in a worker process
+
+    :param image_path: path to original image
+    :param cache_path: path of processed image
+    :param max_dimension: maximum width/height (pixels)
+    :param quality: JPEG quality (1-95)
+    :return: path of image to upload, the original if it is already small enough, not a JPEG or cannot be read (str)
+    """
+
+    if not image_path.lower().endswith(jpeg_extensions):
+        return image_path
+
+    # reuse processed image of an earlier run
+    if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(image_path):
+        return cache_path
+
+    try:
+        with open(image_path, 'rb') as file:
+            data = file.read()
+
+        with Image.open(io.BytesIO(data)) as image:
+            # small images, and images named .jpg that are not JPEGs, are uploaded as they are
+            if max(image.size) <= max_dimension or image.format != 'JPEG':
+                return image_path
+
+            # resize, pixel data keeps its orientation so the EXIF orientation tag stays valid
+            image.draft('RGB', (max_dimension, max_dimension)) # lets the JPEG decoder skip detail that is thrown away
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=quality, optimize=True)
+    except OSError as e: # one unreadable image does not stop the others
+        print(f"Unable to resize {image_path} ({e}), uploading it as it is")
+        return image_path
+
+    # write with the original metadata, through a temporary file so a crash leaves no half written image
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(insert_app_segments(output.getvalue(), get_app_segments(data)))
+    os.replace(temp_path, cache_path)
+
+    return cache_path
+
+def preprocess_images(image_paths, max_dimension, quality=90, cache_dir=default_cache_dir, processes=None):
+    """
+    Downscales and recompresses JPEG images larger than max_dimension across a process pool
+
+    :param image_paths: paths to images
+    :param max_dimension: maximum width/height (pixels)
+    :param quality: JPEG quality (1-95)
+    :param cache_dir: scratch directory for processed images
+    :param processes: number of worker processes, defaults to the number of CPUs
+    :return: paths of images to upload, in the same order (list)
+    """
+
+    if Image is None:
+        raise ImportError("Pillow is required to resize images (pip install Pillow)")
+
+    # var
+    cache_paths = [get_cache_path(p, cache_dir, max_dimension, quality) for p in image_paths]
+    chunksize = max(1, len(image_paths) // ((processes or os.cpu_count() or 1) * 4))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(resize_image, image_paths, cache_paths,
+                                 [max_dimension] * len(image_paths), [quality] * len(image_paths),
+                                 chunksize=chunksize))
@@ -1,15 +1,21 @@
 """
-WebODM_processing_nodes.py: add processing nodes
+WebODM_processing_nodes.py: add processing nodes, and pick the least loaded node for new tasks
 
 Author: Jonas 
-Last Updated: 2025-06-10
+Last Updated: 2026-10-18
 """
 
 # imports
-import os, sys, time
+import os, sys, time, threading
 import argparse
 import requests
-import WebODM_main
+from datetime import datetime, timezone
+import WebODM_common
+
+# global variables
+
+stale_after = 120 # nodes not refreshed for this long are trusted less (seconds)
+assigned_lock = threading.Lock() # nodes are selected from worker threads sharing one assigned dictionary
 
 # functions
 def create_parser():
@@ -37,22 +43,21 @@ def create_parser():
     
     return parser
 
-def post_processing_node(token, hostname, port):
+def post_processing_node(client, hostname, port):
     """
     adds a processing node
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param hostname: hostname of the processing node wanting to be added
     :param port: port of the processing node wanting to be added
     :return: processing node ID
     """
     
-    res = requests.post('http://localhost:8000/api/processingnodes/', 
-                        headers={'Authorization' : 'JWT {}'.format(token)}, 
-                        data = {
-                            'hostname' : hostname,
-                            'port' : port
-                            }).json()
+    res = client.post('/api/processingnodes/', 
+                      data = {
+                          'hostname' : hostname,
+                          'port' : port
+                          }).json()
     
     if res['id']:
         print(f'Processing node added at host {hostname} port {port}')
@@ -60,16 +65,15 @@ def post_processing_node(token, hostname, port):
     else:
         print(f'Could not add processing node at host {hostname} port {port}')
                
-def get_all_processing_nodes(token):
+def get_all_processing_nodes(client):
     """
     gets all processing nodes
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :return: list of processing nodes
     """
     
-    res = requests.get('http://localhost:8000/api/processingnodes/', 
-                       headers={'Authorization' : 'JWT {}'.format(token)}).json()
+    res = client.get('/api/processingnodes/').json()
     
     # for node in res:
     #     # print(node['id'])
@@ -77,11 +81,11 @@ def get_all_processing_nodes(token):
     
     return res
 
-def get_processing_nodes_ids(token, hostname, port):
+def get_processing_nodes_ids(client, hostname, port):
     """
     gets processing node ids based on hostname and port
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param hostname: hostname of the processing node wanting to be added
     :param port: port of the processing node wanting to be added
     :return: processing node IDs
@@ -91,7 +95,7 @@ def get_processing_nodes_ids(token, hostname, port):
     ids = list()
     
     # get processing nodes
-    processing_nodes = get_all_processing_nodes(token)
+    processing_nodes = get_all_processing_nodes(client)
     
     for pn in processing_nodes:
         if (hostname == pn['hostname']) and (int(port) == pn['port']):
@@ -99,22 +103,21 @@ def get_processing_nodes_ids(token, hostname, port):
     
     return ids
 
-def delete_processing_node(token, id):
+def delete_processing_node(client, id):
     """
     deletes a processing node based on id
     
-    :param token: authentication token
+    :param client: authenticated client (WebODMClient)
     :param hostname: hostname of the processing node wanting to be added
     :param port: port of the processing node wanting to be added
     :return: N/A
     """  
     
-    if (pnid == 1):
-        WebODM_main.print_error('Not allowed to delete default processing node')
+    if (id == 1):
+        WebODM_common.print_error('Not allowed to delete default processing node')
         
     
-    res = requests.delete('http://localhost:8000/api/processingnodes/{}/'.format(id), 
-                          headers={'Authorization' : 'JWT {}'.format(token)})
+    res = client.delete('/api/processingnodes/{}/'.format(id))
     
     # print(res.status_code)
     if res.status_code == 204:
@@ -122,17 +125,17 @@ def delete_processing_node(token, id):
     else:
         print(f'Deletion of proccess node {id} failure')
 
-def delete_processing_nodes(token, ids):
+def delete_processing_nodes(client, ids):
     """
     deletes processing nodes of given ids
     
-    :param hostname: authorization token 
+    :param client: authenticated client (WebODMClient)
     :param ids: list of ids to delete
     :return: N/A
     """
     
     for id in ids:
-        delete_processing_node(token, id)
+        delete_processing_node(client, id)
 
 def check_if_pn_added(hostname, port, processing_nodes):
     """
@@ -156,9 +159,103 @@ def check_if_pn_added(hostname, port, processing_nodes):
     print('Processing node of hostname {} and port {} has not yet been added'.format(hostname, port))
     return False
         
-# var
-username = WebODM_main.username
-password = WebODM_main.password
+def get_seconds_since_refresh(node):
+    """
+    gets the number of seconds since WebODM last refreshed the information of a processing node
+    
+    :param node: processing node (dictionary)
+    :return: seconds since last refresh, None if never refreshed
+    """
+    
+    if not node.get('last_refreshed'):
+        return None
+    
+    last_refreshed = datetime.fromisoformat(node['last_refreshed'].replace('Z', '+00:00'))
+    if last_refreshed.tzinfo is None:
+        last_refreshed = last_refreshed.replace(tzinfo=timezone.utc)
+    
+    return (datetime.now(timezone.utc) - last_refreshed).total_seconds()
+
+def score_processing_node(node, image_count, assigned=0):
+    """
+    scores how suitable a processing node is for a new task, lower is better
+    
+    :param node: processing node (dictionary)
+    :param image_count: number of images of the task
+    :param assigned: number of tasks already sent to this node that its queue count may not show yet
+    :return: score (float), None if the node cannot take the task
+    """
+    
+    # node must be online and accept this many images
+    if not node['online']:
+        return None
+    if node.get('max_images') and image_count > node['max_images']:
+        return None
+    
+    # tasks waiting on the node
+    score = node['queue_count'] + assigned
+    
+    # prefer nodes with more room for the task
+    if node.get('max_images'):
+        score += image_count / node['max_images']
+    
+    # the longer since the last refresh, the less the queue count can be trusted
+    seconds = get_seconds_since_refresh(node)
+    if seconds is None or seconds > stale_after:
+        score += 1 if seconds is None else seconds / stale_after
+    
+    return score
+
+def get_node_memory(client, id):
+    """
+    gets the total memory of a processing node, asking its NodeODM API directly since WebODM does not keep it
+    
+    :param client: authenticated client (WebODMClient)
+    :param id: ID of processing node
+    :return: memory (GB), None if the node cannot be reached from here
+    """
+    
+    res = client.get('/api/processingnodes/{}/'.format(id))
+    if res.status_code != 200:
+        return None
+    node = res.json()
+    
+    # the hostname WebODM uses may only resolve inside its own network, token protected nodes need the node's token
+    try:
+        info = requests.get('http://{}:{}/info'.format(node['hostname'], node['port']),
+                            params = {'token': node['token']} if node.get('token') else None, timeout=3).json()
+    except (requests.RequestException, ValueError):
+        return None
+    
+    return info['totalMemory'] / 1000 ** 3 if info.get('totalMemory') else None
+
+def select_processing_node(client, image_count, assigned=None):
+    """
+    selects the least loaded processing node that can take a task
+    
+    :param client: authenticated client (WebODMClient)
+    :param image_count: number of images of the task
+    :param assigned: tasks sent to each node by this process (dictionary of id: count), updated with the selected node
+    :return: processing node (dictionary), None if no node can take the task
+    """
+    
+    # var
+    assigned = dict() if assigned is None else assigned
+    nodes = get_all_processing_nodes(client)
+    best_node = None
+    best_score = None
+    
+    # score every processing node, counting and recording the selection at once
+    with assigned_lock:
+        for node in nodes:
+            score = score_processing_node(node, image_count, assigned.get(node['id'], 0))
+            if score is not None and (best_score is None or score < best_score):
+                best_node, best_score = node, score
+        
+        if best_node is not None:
+            assigned[best_node['id']] = assigned.get(best_node['id'], 0) + 1
+    
+    return best_node
 
 # main
 
@@ -175,41 +272,41 @@ if __name__ == "__main__":
     pnid = args_dict['identification']
     
     
-    # get authentication token
-    token = WebODM_main.post_authentication(username, password)
+    # get authenticated client
+    client = WebODM_common.post_authentication(WebODM_common.username, WebODM_common.password)
     
     if not ((args.hostname and args.port) or args.identification):
-        WebODM_main.print_error('Not enough arguments')
+        WebODM_common.print_error('Not enough arguments')
     
     # delete
     if args_dict['delete'] == True:
         
         if args.identification: # delete by ID
             # delete processing node
-            delete_processing_node(token, pnid)
+            delete_processing_node(client, pnid)
         elif args.hostname and args.port: # delte by hostname and port
             # get ids based on hostname and port
-            ids = get_processing_nodes_ids(token, hostname, port)
+            ids = get_processing_nodes_ids(client, hostname, port)
             
             # delete processing nodes with given ids
-            delete_processing_nodes(token, ids)  
+            delete_processing_nodes(client, ids)  
         else:
-            WebODM_main.print_error('Error deleting processing node')
+            WebODM_common.print_error('Error deleting processing node')
         
     elif args.hostname and args.port: # create
         # get processing nodes
-        processing_nodes = get_all_processing_nodes(token)
+        processing_nodes = get_all_processing_nodes(client)
         
         # check if processing node already exists
         if not (check_if_pn_added(hostname, port, processing_nodes)): 
             # add processing node
-            pnid = post_processing_node(token, hostname, port)
+            pnid = post_processing_node(client, hostname, port)
             print(f'Processing Node {pnid} added')
         else:
             # print error message
-            WebODM_main.print_error('Processing Node already exists')
+            WebODM_common.print_error('Processing Node already exists')
     else:
-        WebODM_main.print_error('Not enough arguments provided')
+        WebODM_common.print_error('Not enough arguments provided')
             
         
 
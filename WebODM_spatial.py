@@ -0,0 +1,162 @@
+"""
+WebODM_spatial.py: Spatial index of image positions, and thinning of images taken too close together
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import math, concurrent.futures # standard libraries
+import WebODM_index
+
+# global variables
+
+earth_radius = 6371000 # meters
+
+# classes
+
+class GridIndex:
+    """
+    Uniform grid over points in meters. Points within a distance of a location are found by only
+    checking the cells around it, so each lookup stays constant time however many points there are
+    """
+
+    def __init__(self, cell_size):
+        """
+        :param cell_size: width/height of grid cells, at least the largest query distance (meters)
+        """
+
+        self.cell_size = cell_size
+        self.cells = dict() # (column, row): list of (x, y, item)
+
+    def get_cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, x, y, item):
+        """
+        Adds a point
+
+        :param x: meters east
+        :param y: meters north
+        :param item: value stored with the point
+        :return: N/A
+        """
+
+        self.cells.setdefault(self.get_cell(x, y), list()).append((x, y, item))
+
+    def query(self, x, y, distance):
+        """
+        Gets the points within a distance of a location
+
+        :param x: meters east
+        :param y: meters north
+        :param distance: search radius, at most the cell size (meters)
+        :return: items of points within distance (list)
+        """
+
+        # var
+        column, row = self.get_cell(x, y)
+        items = list()
+
+        for dc in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                for px, py, item in self.cells.get((column + dc, row + dr), ()):
+                    if (px - x) ** 2 + (py - y) ** 2 <= distance ** 2:
+                        items.append(item)
+
+        return items
+
+# functions
+
+def get_positions(image_paths, threads=8):
+    """
+    Reads the GPS position and heading of images in parallel, or from the directory index if they are indexed
+
+    :param image_paths: paths to images
+    :param threads: number of images read at the same time
+    :return: metadata of each image, in the same order (list of dictionaries)
+    """
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(WebODM_index.read_metadata, image_paths))
+
+def project_positions(positions):
+    """
+    Projects GPS positions to meters east and north of their centre (equirectangular, accurate over a survey's extent)
+
+    :param positions: metadata with latitude and longitude (list of dictionaries, entries without GPS are skipped)
+    :return: (x, y) in meters for each position, None for positions without GPS (list)
+    """
+
+    # var
+    located = [p for p in positions if 'latitude' in p]
+
+    if not located:
+        return [None] * len(positions)
+
+    origin_latitude = sum(p['latitude'] for p in located) / len(located)
+    origin_longitude = sum(p['longitude'] for p in located) / len(located)
+    scale = math.cos(math.radians(origin_latitude))
+
+    return [(math.radians(p['longitude'] - origin_longitude) * earth_radius * scale,
+             math.radians(p['latitude'] - origin_latitude) * earth_radius) if 'latitude' in p else None
+            for p in positions]
+
+def get_heading_delta(a, b):
+    """
+    Gets the smallest angle between two headings
+
+    :param a: heading (degrees)
+    :param b: heading (degrees)
+    :return: angle (0 to 180 degrees)
+    """
+
+    delta = abs(a - b) % 360
+
+    return 360 - delta if delta > 180 else delta
+
+def thin_images(image_paths, min_distance, max_heading_delta=15, max_altitude_delta=None, threads=8):
+    """
+    Drops images taken within min_distance (on the ground) of an image that is already kept and facing
+    the same way, such as the photos of hover segments or excessive overlap. Images are visited in the
+    order they were taken, so the first of each cluster is kept. Images without GPS are always kept
+
+    :param image_paths: paths to images
+    :param min_distance: ground distance below which images are redundant (meters)
+    :param max_heading_delta: difference in heading above which images are kept anyway (degrees)
+    :param max_altitude_delta: difference in altitude above which images are kept anyway (meters), defaults to min_distance
+    :param threads: number of images read at the same time
+    :return: paths of kept images, in the original order (list)
+    """
+
+    # var
+    positions = get_positions(image_paths, threads)
+    points = project_positions(positions)
+    max_altitude_delta = min_distance if max_altitude_delta is None else max_altitude_delta
+    index = GridIndex(min_distance)
+    kept = set()
+
+    # capture order, file names as tiebreaker
+    order = sorted(range(len(image_paths)), key=lambda i: (str(positions[i].get('datetime', "")), image_paths[i]))
+
+    for i in order:
+        if points[i] is None:
+            kept.add(i)
+            continue
+
+        x, y = points[i]
+        redundant = False
+        for j in index.query(x, y, min_distance):
+            if abs(positions[i].get('altitude', 0) - positions[j].get('altitude', 0)) > max_altitude_delta:
+                continue
+            if 'heading' in positions[i] and 'heading' in positions[j] and \
+               get_heading_delta(positions[i]['heading'], positions[j]['heading']) > max_heading_delta:
+                continue
+            redundant = True
+            break
+
+        if not redundant:
+            kept.add(i)
+            index.insert(x, y, i)
+
+    return [p for i, p in enumerate(image_paths) if i in kept]
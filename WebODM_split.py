@@ -0,0 +1,221 @@
+"""
+WebODM_split.py: Plan split-merge (number of submodels and their overlap) from image positions and node memory, or partition images into submodels
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import json, math # standard libraries
+import WebODM_spatial
+
+# global variables
+
+# images of about 12 megapixels a node can reconstruct at once, by memory (GB), from the ODM hardware recommendations
+memory_capacity = [(4, 40), (8, 120), (16, 250), (32, 500), (64, 1500), (128, 2500)]
+reference_megapixels = 12
+overlap_headroom = 0.75 # share of a node's capacity given to a submodel's own images, the rest is taken by overlap
+min_overlap = 20 # meters
+kmeans_iterations = 20
+
+# functions
+
+def get_image_capacity(memory_gb, megapixels=reference_megapixels):
+    """
+    Gets the number of images a node can reconstruct at once, interpolated from the memory recommendations and scaled by image size
+
+    :param memory_gb: memory of node (GB)
+    :param megapixels: size of images (megapixels)
+    :return: number of images (int)
+    """
+
+    # interpolate between recommendations, extrapolate past the ends
+    for (low_memory, low_images), (high_memory, high_images) in zip(memory_capacity, memory_capacity[1:]):
+        if memory_gb <= high_memory or high_memory == memory_capacity[-1][0]:
+            images = low_images + (high_images - low_images) * (memory_gb - low_memory) / (high_memory - low_memory)
+            break
+
+    return max(1, int(images * reference_megapixels / max(megapixels, 1)))
+
+def cluster_points(points, count):
+    """
+    Groups points into clusters of nearby points (k-means, seeded with the points farthest from each other)
+
+    :param points: (x, y) in meters (list)
+    :param count: number of clusters
+    :return: cluster of each point (list of int)
+    """
+
+    # seed with points spread over the whole extent
+    centres = [points[0]]
+    distances = [(x - points[0][0]) ** 2 + (y - points[0][1]) ** 2 for x, y in points]
+    while len(centres) < count:
+        farthest = max(range(len(points)), key=distances.__getitem__)
+        centres.append(points[farthest])
+        distances = [min(d, (x - points[farthest][0]) ** 2 + (y - points[farthest][1]) ** 2) for d, (x, y) in zip(distances, points)]
+
+    # refine
+    labels = [0] * len(points)
+    for iteration in range(kmeans_iterations):
+        new_labels = [min(range(count), key=lambda c: (x - centres[c][0]) ** 2 + (y - centres[c][1]) ** 2) for x, y in points]
+        if new_labels == labels and iteration:
+            break
+        labels = new_labels
+
+        for c in range(count):
+            members = [p for p, label in zip(points, labels) if label == c]
+            if members:
+                centres[c] = (sum(x for x, y in members) / len(members), sum(y for x, y in members) / len(members))
+
+    return labels
+
+def get_spacing(points):
+    """
+    Gets the median distance from each point to its nearest neighbour
+
+    :param points: (x, y) in meters (list)
+    :return: distance (meters)
+    """
+
+    # var
+    extent = max(max(x for x, y in points) - min(x for x, y in points), max(y for x, y in points) - min(y for x, y in points))
+    cell_size = max(extent / math.sqrt(len(points)), 1) # about one point per cell
+    index = WebODM_spatial.GridIndex(cell_size)
+    for i, (x, y) in enumerate(points):
+        index.insert(x, y, i)
+
+    # nearest neighbour within the surrounding cells
+    nearest = list()
+    for i, (x, y) in enumerate(points):
+        others = [j for j in index.query(x, y, cell_size) if j != i]
+        if others:
+            nearest.append(min(math.hypot(points[j][0] - x, points[j][1] - y) for j in others))
+
+    return sorted(nearest)[len(nearest) // 2] if nearest else cell_size
+
+def get_footprint(metadata):
+    """
+    Gets the ground width an image covers, from its height above ground and 35 mm equivalent focal length
+
+    :param metadata: image metadata from WebODM_exif.read_metadata
+    :return: width (meters), None if unknown
+    """
+
+    if not metadata.get('relative_altitude') or not metadata.get('focal_length_35mm'):
+        return None
+
+    return abs(metadata['relative_altitude']) * 36 / metadata['focal_length_35mm']
+
+def get_overlap(metadata, points):
+    """
+    Gets the distance neighbouring submodels should overlap by: one image footprint, or three image spacings if the footprint is unknown
+
+    :param metadata: image metadata from WebODM_exif.read_metadata (list)
+    :param points: (x, y) in meters of images with GPS (list)
+    :return: overlap (meters)
+    """
+
+    # var
+    footprints = sorted(f for f in (get_footprint(m) for m in metadata) if f)
+    overlap = footprints[len(footprints) // 2] if footprints else 3 * get_spacing(points)
+
+    return max(min_overlap, round(overlap))
+
+def plan_split(image_paths, memory_gb, threads=8):
+    """
+    Plans split-merge for an image set. The images are clustered by position into as few submodels as
+    fit the node's memory (leaving room for overlap), and the overlap is set to one image footprint, or
+    three image spacings if the footprint is unknown, so neighbouring submodels share enough images to merge
+
+    :param image_paths: paths to images
+    :param memory_gb: memory of node (GB)
+    :param threads: number of images read at the same time
+    :return: plan (dictionary with split, split_overlap, submodels and capacity), None if the images fit on one node
+    """
+
+    # var
+    metadata = WebODM_spatial.get_positions(image_paths, threads)
+    points = [p for p in WebODM_spatial.project_positions(metadata) if p is not None]
+    sizes = [m['width'] * m['height'] / 1e6 for m in metadata if isinstance(m.get('width'), int) and isinstance(m.get('height'), int)]
+    megapixels = sorted(sizes)[len(sizes) // 2] if sizes else reference_megapixels
+    capacity = get_image_capacity(memory_gb, megapixels)
+    target = max(1, int(capacity * overlap_headroom))
+
+    if len(image_paths) <= capacity or len(points) < 2:
+        return None
+
+    # fewest clusters whose largest one fits
+    count = math.ceil(len(points) / target)
+    while True:
+        labels = cluster_points(points, count)
+        if max(labels.count(c) for c in range(count)) <= target or count >= len(points) // 2:
+            break
+        count += 1
+
+    return {'split': math.ceil(len(image_paths) / count), 'split_overlap': get_overlap(metadata, points),
+            'submodels': count, 'capacity': capacity}
+
+def partition_images(image_paths, count, overlap=None, threads=8):
+    """
+    Partitions an image set into overlapping submodels on the client, for processing on separate nodes. Images are
+    clustered by position, then each submodel also takes the images of other clusters within the overlap distance of
+    its own, so neighbouring submodels share the images needed to align them. Images without GPS follow the image
+    before them in name (capture) order
+
+    :param image_paths: paths to images
+    :param count: number of submodels
+    :param overlap: overlap distance (meters), None to work it out from the images
+    :param threads: number of images read at the same time
+    :return: paths of each submodel's images, in name order (list of lists), overlap (meters)
+    """
+
+    # var
+    metadata = WebODM_spatial.get_positions(image_paths, threads)
+    positions = WebODM_spatial.project_positions(metadata)
+    located = [i for i, p in enumerate(positions) if p is not None]
+
+    if len(located) < count:
+        raise ValueError(f"{len(located)} images have a GPS position, at least {count} are needed for {count} submodels")
+
+    # cluster located images
+    labels = dict(zip(located, cluster_points([positions[i] for i in located], count)))
+
+    # images without GPS, in capture order
+    order = sorted(range(len(image_paths)), key=lambda i: image_paths[i])
+    previous = labels[next(i for i in order if i in labels)]
+    for i in order:
+        previous = labels.setdefault(i, previous)
+
+    # overlap with neighbouring clusters
+    overlap = get_overlap(metadata, [positions[i] for i in located]) if overlap is None else overlap
+    index = WebODM_spatial.GridIndex(max(overlap, 1))
+    for i in located:
+        index.insert(*positions[i], i)
+
+    submodels = [set() for c in range(count)]
+    for i, label in labels.items():
+        submodels[label].add(i)
+        if positions[i] is not None:
+            submodels[label].update(index.query(*positions[i], overlap))
+
+    return [sorted(image_paths[i] for i in s) for s in submodels], overlap
+
+def set_split_options(raw_options, plan):
+    """
+    Adds the split and split-overlap options of a plan, unless the options already set them
+
+    :param raw_options: options in raw JSON format (list of name/value objects)
+    :param plan: plan from plan_split
+    :return: options in raw JSON format
+    """
+
+    # var
+    options = json.loads(raw_options)
+    names = {o['name'] for o in options}
+
+    if 'split' not in names:
+        options.append({'name': 'split', 'value': plan['split']})
+    if 'split-overlap' not in names:
+        options.append({'name': 'split-overlap', 'value': plan['split_overlap']})
+
+    return json.dumps(options)
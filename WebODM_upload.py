@@ -0,0 +1,410 @@
+"""
+WebODM_upload.py: Stream task uploads to WebODM and upload large image sets in parallel, resumable batches
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, time, uuid, json, threading, concurrent.futures # standard libraries
+import requests
+
+# global variables
+
+stream_block_size = 1024 * 1024 # bytes read from disk at a time (1 MiB)
+
+# functions
+
+def format_bytes(num_bytes):
+    """
+    Formats a number of bytes as a human readable string
+
+    :param num_bytes: number of bytes (int)
+    :return: formatted string (ex. '12.34 MB')
+    """
+
+    # var
+    units = ["B", "KB", "MB", "GB", "TB"]
+    size = float(num_bytes)
+
+    # divide until the value fits in the unit
+    for unit in units:
+        if size < 1000 or unit == units[-1]:
+            return f"{size:.2f} {unit}"
+        size /= 1000
+
+def print_upload_progress(bytes_sent, total_bytes, elapsed):
+    """
+    Prints upload progress and throughput to the console. Default progress callback of MultipartStream
+
+    :param bytes_sent: number of bytes sent so far (int)
+    :param total_bytes: total number of bytes to send (int)
+    :param elapsed: seconds since the upload started (float)
+    :return: N/A
+    """
+
+    # var
+    rate = bytes_sent / elapsed if elapsed > 0 else 0 # bytes per second
+    percent = bytes_sent / total_bytes * 100 if total_bytes > 0 else 100
+
+    # print progress
+    print(f"Uploading . . . ({format_bytes(bytes_sent)} / {format_bytes(total_bytes)}) ({percent:2.2f}%) ({format_bytes(rate)}/s)")
+
+class MultipartStream:
+    """
+    File-like multipart/form-data body that is read lazily from disk
+
+    Only one file is open at any time and at most one block is held in memory, so the
+    memory used by an upload does not depend on the number or size of the images.
+    The total length is computed from the file sizes up front so that requests sends a
+    Content-Length header instead of a chunked body.
+    """
+
+    def __init__(self, fields, files, progress=print_upload_progress, progress_interval=1.0):
+        """
+        :param fields: form fields to send before the files (dictionary of name: value)
+        :param files: files to send (list of (field name, file path, content type) tuples)
+        :param progress: function called with (bytes sent, total bytes, elapsed seconds), or None
+        :param progress_interval: minimum number of seconds between progress calls
+        """
+
+        # var
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.progress = progress
+        self.progress_interval = progress_interval
+
+        # build list of parts, each either bytes or (path, size)
+        self.parts = list()
+        for name, value in fields.items():
+            self.parts.append(self._field_header(name) + str(value).encode("utf-8") + b"\r\n")
+        for name, path, file_content_type in files:
+            self.parts.append(self._file_header(name, os.path.basename(path), file_content_type))
+            self.parts.append((path, os.path.getsize(path)))
+            self.parts.append(b"\r\n")
+        self.parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        # total length of the body
+        self.len = sum(len(p) if isinstance(p, bytes) else p[1] for p in self.parts)
+
+        # reading state
+        self.part_index = 0
+        self.part_offset = 0 # offset within the current bytes part
+        self.current_file = None
+        self.bytes_sent = 0
+        self.start_time = None
+        self.last_report = 0
+
+    def _field_header(self, name):
+        """
+        Builds the header of a form field part
+
+        :param name: name of form field (str)
+        :return: header (bytes)
+        """
+
+        return (f"--{self.boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n").encode("utf-8")
+
+    def _file_header(self, name, file_name, file_content_type):
+        """
+        Builds the header of a file part
+
+        :param name: name of form field (str)
+        :param file_name: name of the file sent to the server (str)
+        :param file_content_type: content type of the file (str)
+        :return: header (bytes)
+        """
+
+        file_name = file_name.replace("\"", "%22") # quotes would end the filename early
+        return (f"--{self.boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"{name}\"; filename=\"{file_name}\"\r\n"
+                f"Content-Type: {file_content_type}\r\n\r\n").encode("utf-8")
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        # lets requests treat the body as a stream, data is pulled with read()
+        while True:
+            block = self.read(stream_block_size)
+            if not block:
+                break
+            yield block
+
+    def read(self, size=-1):
+        """
+        Reads up to size bytes of the body, opening and closing files as they are reached
+
+        :param size: maximum number of bytes to read, all remaining bytes if negative (int)
+        :return: block of the body (bytes), empty once the body has been fully read
+        """
+
+        # var
+        if size is None or size < 0:
+            size = self.len - self.bytes_sent
+        block = bytearray()
+
+        if self.start_time is None:
+            self.start_time = time.time()
+
+        # fill block from the current part onwards
+        while len(block) < size and self.part_index < len(self.parts):
+            part = self.parts[self.part_index]
+
+            if isinstance(part, bytes): # headers and separators
+                data = part[self.part_offset:self.part_offset + size - len(block)]
+                self.part_offset += len(data)
+                finished = self.part_offset >= len(part)
+            else: # file contents, opened only when reached
+                if self.current_file is None:
+                    self.current_file = open(part[0], 'rb')
+                data = self.current_file.read(size - len(block))
+                finished = not data
+                if finished:
+                    self.current_file.close()
+                    self.current_file = None
+
+            block.extend(data)
+
+            # move to next part
+            if finished:
+                self.part_index += 1
+                self.part_offset = 0
+
+        self.bytes_sent += len(block)
+        self._report()
+
+        return bytes(block)
+
+    def _report(self):
+        """
+        Calls the progress function if the interval passed or the body has been fully read
+
+        :param: N/A
+        :return: N/A
+        """
+
+        if self.progress is None:
+            return
+
+        # var
+        now = time.time()
+        done = self.bytes_sent >= self.len
+
+        if done or now - self.last_report >= self.progress_interval:
+            self.last_report = now
+            self.progress(self.bytes_sent, self.len, now - self.start_time)
+            if done:
+                self.progress = None # only report completion once
+
+    def close(self):
+        """
+        Closes the currently open file, if any
+
+        :param: N/A
+        :return: N/A
+        """
+
+        if self.current_file is not None:
+            self.current_file.close()
+            self.current_file = None
+
+class UploadError(Exception):
+    """
+    Raised when WebODM does not confirm an upload request
+    """
+
+def get_upload_state(state_path):
+    """
+    Reads the state of an interrupted upload
+
+    :param state_path: path to upload state file (JSON)
+    :return: state (dictionary with project_id, task_id and uploaded file paths), or None if no upload to resume
+    """
+
+    if not os.path.isfile(state_path):
+        return None
+
+    with open(state_path, 'r') as file:
+        return json.load(file)
+
+def save_upload_state(state_path, state):
+    """
+    Writes the state of an upload. The file is replaced atomically so a crash never leaves it half written
+
+    :param state_path: path to upload state file (JSON)
+    :param state: state (dictionary with project_id, task_id and uploaded file paths)
+    :return: N/A
+    """
+
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_path, state_path)
+
+def post_partial_task(client, project_id, options, processing_node=None, webhook=None):
+    """
+    Creates a task in partial mode, so images can be added in several requests before it is processed
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param options: options for given task
+    :param processing_node: ID of processing node, None to let WebODM choose
+    :param webhook: URL the server should call when the task finishes, if it supports callbacks
+    :return: ID of task
+    """
+
+    # var
+    data = {'options': options, 'partial': 'true'}
+    if processing_node is not None:
+        data['processing_node'] = processing_node
+    if webhook is not None:
+        data['webhook'] = webhook
+
+    res = client.post('/api/projects/{}/tasks/'.format(project_id),
+                      data = data).json()
+
+    # get task id
+    if 'id' in res:
+        return res['id']
+    else:
+        raise UploadError("Unable to create partial Task")
+
+def post_task_upload(client, project_id, task_id, files):
+    """
+    Uploads a batch of files to a partial task
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of partial task
+    :param files: files to upload (list of (field, path, content type) tuples)
+    :return: names of the files confirmed by the server (set)
+    """
+
+    # all files of a partial task are sent as images, WebODM sorts out the GCP file itself
+    body = MultipartStream({}, [('images', path, content_type) for field, path, content_type in files], progress=None)
+    try:
+        res = client.post('/api/projects/{}/tasks/{}/upload/'.format(project_id, task_id),
+                          headers = {'Content-Type': body.content_type},
+                          data = body)
+    finally:
+        body.close()
+
+    res.raise_for_status()
+    res = res.json()
+
+    if not res.get('success'):
+        raise UploadError("Upload of batch not confirmed")
+
+    return set(res.get('uploaded', dict()).keys())
+
+def post_task_commit(client, project_id, task_id):
+    """
+    Commits a partial task, starting its processing
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of partial task
+    :return: ID of task
+    """
+
+    res = client.post('/api/projects/{}/tasks/{}/commit/'.format(project_id, task_id)).json()
+
+    if 'id' in res:
+        return res['id']
+    else:
+        raise UploadError("Unable to commit Task")
+
+def upload_task_files(client, project_id, task_id, files, state_path, state, batch_size=10, threads=4, retries=3):
+    """
+    Uploads files to a partial task in batches across a thread pool, recording each confirmed batch in the upload state
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of partial task
+    :param files: files to upload (list of (field, path, content type) tuples)
+    :param state_path: path to upload state file (JSON)
+    :param state: upload state, files listed under 'uploaded' are skipped
+    :param batch_size: number of files sent per request
+    :param threads: number of requests sent at the same time
+    :param retries: number of times a failed batch is retried
+    :return: N/A
+    """
+
+    # var
+    uploaded = set(state['uploaded'])
+    pending = [f for f in files if f[1] not in uploaded]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    total_bytes = sum(os.path.getsize(f[1]) for f in pending)
+    lock = threading.Lock()
+    progress = {'bytes': 0, 'start': time.time()}
+
+    if uploaded:
+        print(f"Resuming upload, {len(uploaded)} of {len(files)} files already uploaded")
+
+    def send_batch(batch):
+        # retry the batch until confirmed, the server keeps files that were already received
+        for attempt in range(retries + 1):
+            try:
+                confirmed = post_task_upload(client, project_id, task_id, batch)
+                break
+            except (requests.RequestException, UploadError) as e:
+                if attempt == retries:
+                    raise
+                print(f"Batch upload failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+
+        # record confirmed files
+        with lock:
+            for field, path, content_type in batch:
+                if os.path.basename(path) in confirmed:
+                    state['uploaded'].append(path)
+                    progress['bytes'] += os.path.getsize(path)
+            save_upload_state(state_path, state)
+            print_upload_progress(progress['bytes'], total_bytes, time.time() - progress['start'])
+
+        # every file of the batch has to be confirmed, otherwise the next run picks it up
+        missing = [path for field, path, content_type in batch if os.path.basename(path) not in confirmed]
+        if missing:
+            raise UploadError(f"Server did not confirm {len(missing)} files")
+
+    # upload batches in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(send_batch, b) for b in batches]):
+            future.result() # re-raise errors of failed batches
+
+def post_task_resumable(client, project_id, files, options, state_path, batch_size=10, threads=4, processing_node=None, webhook=None):
+    """
+    Sends images to WebODM through a partial task, uploading batches in parallel. If the upload is
+    interrupted, calling this again with the same state file resumes it where it stopped
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param files: files to upload (list of (field, path, content type) tuples)
+    :param options: options for given task
+    :param state_path: path to upload state file (JSON), removed once the task is committed
+    :param batch_size: number of files sent per request
+    :param threads: number of requests sent at the same time
+    :param processing_node: ID of processing node, None to let WebODM choose
+    :param webhook: URL the server should call when the task finishes, only sent with a new task
+    :return: ID of task
+    """
+
+    # get state of previous attempt, or create partial task
+    state = get_upload_state(state_path)
+    if state is None or state['project_id'] != project_id:
+        task_id = post_partial_task(client, project_id, options, processing_node, webhook)
+        state = {'project_id': project_id, 'task_id': task_id, 'uploaded': list()}
+        save_upload_state(state_path, state)
+    else:
+        task_id = state['task_id']
+
+    # upload and commit
+    upload_task_files(client, project_id, task_id, files, state_path, state, batch_size, threads)
+    task_id = post_task_commit(client, project_id, task_id)
+
+    # upload finished, nothing left to resume
+    os.remove(state_path)
+
+    return task_id
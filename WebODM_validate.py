@@ -0,0 +1,283 @@
+"""
+WebODM_validate.py: Pre-flight checks of an image set (integrity, EXIF, cameras, duplicates, GCP files) before anything is uploaded
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, re, sys, argparse, collections, concurrent.futures # standard libraries
+import WebODM_cache
+import WebODM_common
+import WebODM_spatial
+
+try:
+    from PIL import Image # optional, only needed to fully decode images
+except ImportError:
+    Image = None
+
+# global variables
+
+# first line of a GCP file, ex. "EPSG:4326", "WGS84 UTM 32N" or "+proj=utm +zone=32 +datum=WGS84"
+gcp_header_pattern = re.compile(r"^(EPSG:\d+|WGS84 UTM \d{1,2}[NS]|\+proj=.+)$", re.IGNORECASE)
+max_listed = 5 # files listed per check in the report
+
+# functions
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Image directory
+    parser.add_argument("image_files_dir", help="Directory path to folder containing the images (and GCP file)")
+
+    # Structure only
+    parser.add_argument("-nd", "--no_decode", help="Only check the structure of images instead of decoding them", action="store_true", default=False)
+
+    return parser
+
+def check_structure(path):
+    """
+    Checks that an image file is complete without decoding it: JPEGs must have their markers up to the image data and end with EOI
+
+    :param path: path to image
+    :return: error (str), None if the file looks complete
+    """
+
+    # var
+    size = os.path.getsize(path)
+
+    if size == 0:
+        return "empty file"
+
+    with open(path, 'rb') as file:
+        header = file.read(4)
+
+        if header[:2] != b"\xFF\xD8": # not a JPEG, only the signature can be checked cheaply
+            if header[:4] in (b"II*\x00", b"MM\x00*") or header == b"\x89PNG":
+                return None
+            return "not a JPEG, TIFF or PNG image"
+
+        # walk the markers up to the image data
+        file.seek(2)
+        while True:
+            marker = file.read(4)
+            if len(marker) < 4 or marker[0] != 0xFF:
+                return "broken JPEG header"
+            if marker[1] == 0xDA: # start of scan
+                break
+            file.seek(int.from_bytes(marker[2:4], 'big') - 2, 1)
+
+        # cameras may pad the file after EOI
+        file.seek(max(0, size - 1024))
+        if b"\xFF\xD9" not in file.read():
+            return "truncated JPEG (no end of image marker)"
+
+    return None
+
+def check_image(path, decode=True):
+    """
+    Checks that an image is complete, decoding it at reduced scale if Pillow is installed. Runs in a worker process
+
+    :param path: path to image
+    :param decode: whether to decode the image
+    :return: error (str), None if the image is valid
+    """
+
+    try:
+        error = check_structure(path)
+        if error or not decode or Image is None:
+            return error
+
+        with Image.open(path) as image:
+            image.draft('RGB', (max(1, image.size[0] // 8), max(1, image.size[1] // 8))) # JPEG decodes every block, at 1/8 scale
+            image.load()
+    except Exception as e: # any decoder error means the image is unusable
+        return f"cannot be decoded ({e})"
+
+    return None
+
+def check_gcp_file(gcp_path, image_names):
+    """
+    Checks the syntax of a GCP file: a projection line, then lines of geo_x geo_y geo_z im_x im_y image_name [gcp_name]
+
+    :param gcp_path: path to GCP file
+    :param image_names: file names of the images (set)
+    :return: errors (list of str), warnings (list of str)
+    """
+
+    # var
+    errors = list()
+    warnings = list()
+    gcp_names = set()
+
+    with open(gcp_path, 'r', encoding='utf-8', errors='replace') as file:
+        lines = [(n, line.strip()) for n, line in enumerate(file, 1) if line.strip() and not line.strip().startswith("#")]
+
+    if not lines:
+        return [f"{os.path.basename(gcp_path)} is empty"], warnings
+
+    if not gcp_header_pattern.match(lines[0][1]):
+        errors.append(f"{os.path.basename(gcp_path)} line {lines[0][0]}: unknown projection '{lines[0][1]}'")
+
+    for n, line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 6:
+            errors.append(f"{os.path.basename(gcp_path)} line {n}: expected at least 6 fields, found {len(fields)}")
+            continue
+        try:
+            [float(f) for f in fields[:5]]
+        except ValueError:
+            errors.append(f"{os.path.basename(gcp_path)} line {n}: coordinates are not numbers")
+            continue
+        if fields[5] not in image_names:
+            warnings.append(f"{os.path.basename(gcp_path)} line {n}: image {fields[5]} is not in the image set")
+        gcp_names.add(fields[6] if len(fields) > 6 else " ".join(fields[:3]))
+
+    if len(gcp_names) < 3:
+        warnings.append(f"{os.path.basename(gcp_path)} has {len(gcp_names)} ground control points, at least 3 are needed")
+
+    return errors, warnings
+
+def add_check(report, name, errors=None, warnings=None):
+    """
+    Adds the result of a check to a report
+
+    :param report: report (dictionary)
+    :param name: name of check
+    :param errors: problems that make the task fail (list of str)
+    :param warnings: problems that may give poor results (list of str)
+    :return: N/A
+    """
+
+    # var
+    errors = errors or list()
+    warnings = warnings or list()
+    status = "FAIL" if errors else "WARN" if warnings else "PASS"
+
+    report['checks'].append({'name': name, 'status': status, 'errors': errors, 'warnings': warnings})
+    if errors:
+        report['passed'] = False
+
+def validate_images(image_paths, gcp_paths=(), decode=True, processes=None):
+    """
+    Runs the pre-flight checks of an image set. Images are checked for integrity across a process pool,
+    while their metadata and hashes are read from the directory index (or their headers) in threads
+
+    :param image_paths: paths to images
+    :param gcp_paths: paths to GCP files
+    :param decode: whether to decode images, otherwise only their structure is checked
+    :param processes: number of worker processes, defaults to the number of CPUs
+    :return: report (dictionary with passed and checks)
+    """
+
+    # var
+    report = {'passed': True, 'images': len(image_paths), 'checks': list()}
+    names = [os.path.basename(p) for p in image_paths]
+    chunksize = max(1, len(image_paths) // ((processes or os.cpu_count() or 1) * 4))
+
+    # integrity, the CPU heavy check, in other processes while this one reads metadata
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        integrity = executor.map(check_image, image_paths, [decode] * len(image_paths), chunksize=chunksize)
+
+        metadata = WebODM_spatial.get_positions(image_paths)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as threads:
+            hashes = list(threads.map(WebODM_cache.get_file_hash, image_paths))
+
+        add_check(report, "integrity", [f"{n}: {e}" for n, e in zip(names, integrity) if e])
+
+    # EXIF
+    missing_exif = [n for n, m in zip(names, metadata) if not m]
+    add_check(report, "exif", warnings=[f"{n}: no EXIF metadata" for n in missing_exif])
+
+    # GPS, images without GPS among images with GPS cannot be placed
+    missing_gps = [n for n, m in zip(names, metadata) if 'latitude' not in m]
+    if missing_gps and len(missing_gps) < len(names):
+        add_check(report, "gps", [f"{n}: no GPS position" for n in missing_gps])
+    elif missing_gps and not gcp_paths:
+        add_check(report, "gps", warnings=["no image has a GPS position and there is no GCP file, results will not be georeferenced"])
+    else:
+        add_check(report, "gps")
+
+    # cameras, images of a camera should all have the same size
+    cameras = collections.Counter(f"{m.get('make', '?')} {m.get('model', '?')}" for m in metadata)
+    sizes = collections.defaultdict(collections.Counter)
+    for m in metadata:
+        if m.get('width') and m.get('height'):
+            sizes[f"{m.get('make', '?')} {m.get('model', '?')}"][f"{m['width']}x{m['height']}"] += 1
+    camera_warnings = [f"{len(cameras)} cameras: " + ", ".join(f"{c} ({n})" for c, n in cameras.most_common())] if len(cameras) > 1 else list()
+    camera_warnings += [f"{c} images have {len(s)} sizes: " + ", ".join(f"{z} ({n})" for z, n in s.most_common())
+                        for c, s in sizes.items() if len(s) > 1]
+    add_check(report, "cameras", warnings=camera_warnings)
+
+    # duplicate files, identical images break matching
+    by_hash = collections.defaultdict(list)
+    for n, h in zip(names, hashes):
+        by_hash[h].append(n)
+    add_check(report, "duplicates", [" = ".join(d) for d in by_hash.values() if len(d) > 1])
+
+    # GCP files
+    gcp_errors, gcp_warnings = list(), list()
+    for gcp_path in gcp_paths:
+        errors, warnings = check_gcp_file(gcp_path, set(names))
+        gcp_errors += errors
+        gcp_warnings += warnings
+    add_check(report, "gcp", gcp_errors, gcp_warnings)
+
+    return report
+
+def print_report(report):
+    """
+    Prints a pre-flight report to the console
+
+    :param report: report from validate_images
+    :return: N/A
+    """
+
+    print(f"Pre-flight check of {report['images']} images: {'PASSED' if report['passed'] else 'FAILED'}")
+    for check in report['checks']:
+        problems = check['errors'] + check['warnings']
+        print(f"\t* {check['status']} {check['name']}" + (f" ({len(problems)})" if problems else ""))
+        for problem in problems[:max_listed]:
+            print(f"\t\t- {problem}")
+        if len(problems) > max_listed:
+            print(f"\t\t- ... {len(problems) - max_listed} more")
+
+def get_preflight_report(dir_path, image_paths, decode=True):
+    """
+    Runs the pre-flight checks of an image set and its GCP files, printing the report
+
+    :param dir_path: path to directory containing the images
+    :param image_paths: paths to the images
+    :param decode: whether to decode images, otherwise only their structure is checked
+    :return: report (dictionary with passed and checks)
+    """
+
+    # var
+    gcp_paths = [path for field, path, content_type in WebODM_common.get_upload_files(dir_path, []) if field == 'gcp']
+
+    report = validate_images(image_paths, gcp_paths, decode)
+    print_report(report)
+
+    return report
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # var
+    image_paths = WebODM_common.get_image_paths(args.image_files_dir)
+
+    # check
+    report = get_preflight_report(args.image_files_dir, image_paths, decode=not args.no_decode)
+
+    sys.exit(0 if report['passed'] else 1)
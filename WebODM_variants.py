@@ -0,0 +1,258 @@
+"""
+WebODM_variants.py: Process one upload with several options profiles, by duplicating the uploaded task with other options
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, json, time, asyncio # standard libraries
+import status_codes
+import WebODM_jobs
+import WebODM_monitor
+import WebODM_processing_nodes
+import WebODM_watch
+
+# classes
+
+class VariantError(Exception):
+    """
+    Raised when a variant task could not be created or restarted
+    """
+
+# functions
+
+def get_variant_name(options_path):
+    """
+    Gets the name of a variant from its options file (ex. options/options_3d_model.json -> 3d_model)
+
+    :param options_path: path to options file
+    :return: name (str)
+    """
+
+    name = os.path.splitext(os.path.basename(options_path))[0]
+
+    return name[len("options_"):] if name.startswith("options_") and len(name) > len("options_") else name
+
+def update_task(client, project_id, task_id, name, options, processing_node=None):
+    """
+    Changes the name, options and optionally processing node of a task, then restarts it so it is processed with them
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param name: name of task
+    :param options: options in raw JSON format
+    :param processing_node: ID of processing node, None to keep the task's node
+    :return: restarted task
+    """
+
+    # var
+    data = {'name': name, 'options': json.loads(options)}
+    if processing_node is not None:
+        data['processing_node'] = processing_node
+
+    res = client.patch('/api/projects/{}/tasks/{}/'.format(project_id, task_id), json=data)
+    if res.status_code != 200:
+        raise VariantError(f"Unable to change options of task {task_id} (status {res.status_code})")
+    previous = res.json()
+
+    res = client.post('/api/projects/{}/tasks/{}/restart/'.format(project_id, task_id))
+    if res.status_code != 200:
+        raise VariantError(f"Unable to restart task {task_id} (status {res.status_code})")
+
+    return wait_for_restart(client, project_id, task_id, previous)
+
+def wait_for_restart(client, project_id, task_id, previous, interval=1.0, timeout=600):
+    """
+    Waits until a worker has picked up the restart of a task. Until then WebODM only records the restart as the
+    task's pending action, and the task keeps the status (and assets) of its previous run
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param previous: task as it was before the restart
+    :param interval: time between checks (seconds)
+    :param timeout: time after which the restart is given up on (seconds)
+    :return: restarted task, its processing time counted from the restart
+    """
+
+    # var
+    start = time.time()
+
+    while True:
+        res = client.get('/api/projects/{}/tasks/{}/'.format(project_id, task_id))
+        res.raise_for_status()
+        task = res.json()
+
+        if task.get('pending_action') is None and task['status'] != previous['status']:
+            # a processing time longer than the wait is the previous run's, timings of the variant would include it
+            if task['processing_time'] > (time.time() - start + 1) * 1000:
+                raise VariantError(f"Processing time of task {task_id} was not reset by the restart")
+            return task
+
+        if time.time() - start > timeout:
+            raise VariantError(f"Restart of task {task_id} was not picked up within {timeout}s")
+
+        time.sleep(interval)
+
+def post_task_duplicate(client, project_id, task_id, name, options, processing_node=None):
+    """
+    Duplicates a task, including its uploaded images on the server, and restarts the copy with other options
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task to duplicate
+    :param name: name of new task
+    :param options: options of new task in raw JSON format
+    :param processing_node: ID of processing node, None to keep the original task's node
+    :return: ID of new task, None if the server cannot duplicate tasks
+    """
+
+    res = client.post('/api/projects/{}/tasks/{}/duplicate/'.format(project_id, task_id))
+    if res.status_code in (404, 405): # WebODM before task duplication
+        return None
+    if res.status_code != 200 or not res.json().get('success'):
+        raise VariantError(f"Unable to duplicate task {task_id} (status {res.status_code})")
+
+    new_task_id = res.json()['task']['id']
+    update_task(client, project_id, new_task_id, name, options, processing_node)
+
+    return new_task_id
+
+async def run_variant(client, project_name, project_id, variant, limits, output_dir, assets, extract, cache, store=None):
+    """
+    Watches one variant until it reaches a final status, then saves its assets into its own directory
+
+    :param client: authenticated client (WebODMClient)
+    :param project_name: name of project
+    :param project_id: ID of project
+    :param variant: variant (dictionary with name, task_id and cache_key)
+    :param limits: semaphores (dictionary with request and download)
+    :param output_dir: directory of where the files should be downloaded
+    :param assets: what to download (list)
+    :param extract: patterns of all.zip members to extract (list), None to download all.zip
+    :param cache: result cache (ResultCache), or None
+    :param store: job store (JobStore) recording the variant's stages, if the variant has a job_id
+    :return: summary of variant (dictionary)
+    """
+
+    # var
+    name = variant['name']
+    job = {'project_name': project_name, 'project_id': project_id, 'task_id': variant['task_id'], 'variant': name,
+           'output_dir': output_dir, 'assets': assets, 'extract': extract, 'cache_key': variant['cache_key'] if cache else None}
+
+    def set_stage(stage, **fields):
+        if store is not None and variant.get('job_id'):
+            store.update(variant['job_id'], stage, **fields)
+
+    summary = {'name': name, 'task_id': variant['task_id'], 'status': None, 'processing_time': None,
+               'download_time': None, 'files': 0, 'error': None}
+
+    def print_transition(project_id, task_id, task, previous_status):
+        print(f"[{name}] {status_codes.names.get(task['status'], task['status'])} "
+              f"({WebODM_monitor.format_processing_time(task['processing_time'])})")
+
+    try:
+        task = await WebODM_watch.watch_task(client, project_id, variant['task_id'], limits['request'], limits['download'],
+                                             on_transition=print_transition, download=False)
+        summary.update(status=status_codes.names.get(task['status'], task['status']),
+                       processing_time=WebODM_monitor.format_processing_time(task['processing_time']))
+
+        if task['status'] == status_codes.COMPLETED:
+            set_stage("downloading")
+            async with limits['download']:
+                start = time.time()
+                paths = await asyncio.to_thread(WebODM_jobs.save_job, client, job, task, cache)
+                summary.update(download_time=round(time.time() - start, 1), files=len(paths))
+            print(f"[{name}] Saved {len(paths)} files")
+            set_stage("done", owner_pid=None)
+        else:
+            set_stage("failed" if task['status'] == status_codes.FAILED else "canceled", owner_pid=None)
+    except Exception as e: # one failed variant does not stop the others
+        summary.update(status='ERROR', error=str(e))
+        print(f"[{name}] Failed ({e})")
+        set_stage(None, detail=str(e), error=str(e))
+
+    return summary
+
+async def run_variants(client, project_name, project_id, variants, output_dir=None, assets=("all.zip",), extract=None,
+                       cache=None, image_count=0, max_downloads=2, store=None):
+    """
+    Runs every options profile on the images of the first variant's task, which must already be uploaded.
+    The task is duplicated on the server for each other profile, so the images are uploaded once, and
+    all variants are processed, watched and downloaded at the same time. If the server cannot duplicate
+    tasks, the first task is restarted with each profile in turn once the previous one is saved
+
+    :param client: authenticated client (WebODMClient)
+    :param project_name: name of project
+    :param project_id: ID of project
+    :param variants: variants (list of dictionaries with name, options and cache_key, the first one also with task_id)
+    :param output_dir: directory of where the files should be downloaded
+    :param assets: what to download (list)
+    :param extract: patterns of all.zip members to extract (list), None to download all.zip
+    :param cache: result cache (ResultCache), or None
+    :param image_count: number of images, to pick the least loaded processing node for each variant
+    :param max_downloads: maximum number of variants downloaded at the same time
+    :param store: job store (JobStore), each variant is recorded as a job of its own
+    :return: summary of each variant (list of dictionaries)
+    """
+
+    # var
+    limits = {'request': asyncio.Semaphore(16), 'download': asyncio.Semaphore(max_downloads)}
+    source = variants[0]
+    assigned = dict() # spread variants over processing nodes
+
+    # duplicate the uploaded task for every other profile
+    duplicated = True
+    for variant in variants[1:]:
+        node = await asyncio.to_thread(WebODM_processing_nodes.select_processing_node, client, image_count, assigned)
+        variant['task_id'] = await asyncio.to_thread(post_task_duplicate, client, project_id, source['task_id'],
+                                                     variant['name'], variant['options'], node['id'] if node else None)
+        if variant['task_id'] is None:
+            duplicated = False
+            break
+        print(f"[{variant['name']}] Task {variant['task_id']} created from the uploaded images")
+        if cache:
+            cache.put(variant['cache_key'], project_id, variant['task_id'])
+        if store is not None:
+            variant['job_id'] = store.create_job(project_name, project_id, "processing", output_dir, list(assets), extract,
+                                                 variant['cache_key'], variant['task_id'], variant['name'])
+
+    if duplicated:
+        return await asyncio.gather(*[run_variant(client, project_name, project_id, v, limits, output_dir, assets, extract, cache, store)
+                                      for v in variants])
+
+    # restart the same task with one profile after another
+    print("Server cannot duplicate tasks, processing the options profiles one after another")
+    summaries = list()
+    for i, variant in enumerate(variants):
+        if i:
+            variant['task_id'] = source['task_id']
+            if cache: # the task no longer holds the previous profile's results
+                cache.forget_task(variants[i - 1]['cache_key'])
+            await asyncio.to_thread(update_task, client, project_id, source['task_id'], variant['name'], variant['options'])
+            if cache:
+                cache.put(variant['cache_key'], project_id, variant['task_id'])
+            if store is not None:
+                variant['job_id'] = store.create_job(project_name, project_id, "processing", output_dir, list(assets), extract,
+                                                     variant['cache_key'], variant['task_id'], variant['name'])
+        summaries.append(await run_variant(client, project_name, project_id, variant, limits, output_dir, assets, extract, cache, store))
+
+    return summaries
+
+def print_summary(summaries):
+    """
+    Prints the summary of each variant to the console
+
+    :param summaries: summary of each variant (list of dictionaries)
+    :return: N/A
+    """
+
+    print("\nSummary:")
+    for s in summaries:
+        if s['error']:
+            print(f"\t* {s['name']}: {s['status']} ({s['error']})")
+        else:
+            print(f"\t* {s['name']}: {s['status']} (task {s['task_id']}, processing {s['processing_time']}, "
+                  f"{s['files']} files in {s['download_time']}s)")
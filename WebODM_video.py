@@ -0,0 +1,370 @@
+"""
+WebODM_video.py: Extract sharp, distinct keyframes from a video and geotag them from its SRT file, so only stills are uploaded
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, re, json, math, bisect, hashlib, concurrent.futures # standard libraries
+import WebODM_preprocess
+
+try:
+    import cv2 # optional, only needed to extract keyframes
+except ImportError:
+    cv2 = None
+
+try:
+    from PIL import Image # optional, only needed to geotag keyframes
+except ImportError:
+    Image = None
+
+# global variables
+
+default_cache_dir = ".webodm_cache" # scratch directory for extracted keyframes
+earth_radius = 6371000 # meters
+
+# SRT telemetry of DJI drones, newer ([latitude: 45.1] [longitude: 7.1] [abs_alt: 300.0]) and older (GPS(7.1,45.1,19)) formats
+srt_time_pattern = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)\s*-->")
+srt_latitude_pattern = re.compile(r"\[\s*latitude\s*:\s*(-?[\d.]+)", re.IGNORECASE)
+srt_longitude_pattern = re.compile(r"\[\s*longt?itude\s*:\s*(-?[\d.]+)", re.IGNORECASE)
+srt_altitude_pattern = re.compile(r"(?:abs_alt|\[\s*altitude)\s*:\s*(-?[\d.]+)", re.IGNORECASE)
+srt_gps_pattern = re.compile(r"GPS\s*\(\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)")
+srt_date_pattern = re.compile(r"(\d{4})[-.](\d{2})[-.](\d{2})\s+(\d{2}):(\d{2}):(\d{2})")
+
+# functions
+
+def is_available():
+    """
+    Checks that the optional libraries needed to extract keyframes are installed
+
+    :param: N/A
+    :return: bool
+    """
+
+    return cv2 is not None and Image is not None
+
+def parse_srt(srt_path):
+    """
+    Reads the positions of a drone's SRT telemetry file
+
+    :param srt_path: path to SRT file
+    :return: positions sorted by time (list of dictionaries with time (seconds), latitude, longitude, altitude and date)
+    """
+
+    # var
+    positions = list()
+
+    with open(srt_path, 'r', encoding='utf-8', errors='ignore') as file:
+        blocks = re.split(r"\n\s*\n", file.read())
+
+    for block in blocks:
+        time_match = srt_time_pattern.search(block)
+        if not time_match:
+            continue
+        hours, minutes, seconds, millis = time_match.groups()
+        position = {'time': int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 10 ** len(millis),
+                    'latitude': None, 'longitude': None, 'altitude': 0.0, 'date': None}
+
+        # newer format, then older format
+        latitude, longitude = srt_latitude_pattern.search(block), srt_longitude_pattern.search(block)
+        gps = srt_gps_pattern.search(block)
+        if latitude and longitude:
+            position['latitude'], position['longitude'] = float(latitude.group(1)), float(longitude.group(1))
+            altitude = srt_altitude_pattern.search(block)
+            if altitude:
+                position['altitude'] = float(altitude.group(1))
+        elif gps:
+            position['longitude'], position['latitude'], position['altitude'] = (float(v) for v in gps.groups())
+        else:
+            continue
+
+        # no GPS fix
+        if position['latitude'] == 0 and position['longitude'] == 0:
+            continue
+
+        date = srt_date_pattern.search(block)
+        if date:
+            position['date'] = "{}:{}:{} {}:{}:{}".format(*date.groups()) # EXIF date format
+
+        positions.append(position)
+
+    return sorted(positions, key=lambda p: p['time'])
+
+def get_distance(a, b):
+    """
+    Gets the distance along the ground between two positions (haversine)
+
+    :param a: position (dictionary with latitude and longitude)
+    :param b: position (dictionary with latitude and longitude)
+    :return: distance (meters)
+    """
+
+    lat_a, lat_b = math.radians(a['latitude']), math.radians(b['latitude'])
+    d_lat = lat_b - lat_a
+    d_lon = math.radians(b['longitude'] - a['longitude'])
+    h = math.sin(d_lat / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin(d_lon / 2) ** 2
+
+    return 2 * earth_radius * math.asin(math.sqrt(h))
+
+def get_position(positions, time):
+    """
+    Gets the position at a time of the video, interpolated between the SRT positions around it
+
+    :param positions: positions from parse_srt
+    :param time: time in video (seconds)
+    :return: position (dictionary), None if there are no positions
+    """
+
+    if not positions:
+        return None
+
+    # var
+    i = bisect.bisect_right([p['time'] for p in positions], time)
+
+    if i == 0:
+        return positions[0]
+    if i == len(positions):
+        return positions[-1]
+
+    # interpolate
+    before, after = positions[i - 1], positions[i]
+    fraction = (time - before['time']) / (after['time'] - before['time']) if after['time'] > before['time'] else 0
+    position = dict(before)
+    for key in ('latitude', 'longitude', 'altitude'):
+        position[key] = before[key] + (after[key] - before[key]) * fraction
+
+    return position
+
+def get_sample_times(duration, interval=1.0, distance=None, positions=None):
+    """
+    Gets the times to sample frames at, every interval seconds, or every distance meters flown if the SRT has positions
+
+    :param duration: length of video (seconds)
+    :param interval: seconds between frames
+    :param distance: meters between frames, or None to sample by interval
+    :param positions: positions from parse_srt
+    :return: times (list of seconds)
+    """
+
+    # sample by time
+    if not distance or not positions:
+        return [i * interval for i in range(int(duration / interval) + 1)]
+
+    # sample by distance flown
+    times = [positions[0]['time']]
+    flown = 0
+    for before, after in zip(positions, positions[1:]):
+        flown += get_distance(before, after)
+        if flown >= distance:
+            times.append(after['time'])
+            flown = 0
+
+    return [t for t in times if t <= duration]
+
+def score_frame(frame, sharpness_width=1024, thumbnail_size=32):
+    """
+    Gets a cheap sharpness score (variance of the Laplacian) and a small thumbnail to compare frames with. Runs in a worker thread
+
+    :param frame: decoded frame (BGR array)
+    :param sharpness_width: width frames are downscaled to before measuring sharpness (pixels)
+    :param thumbnail_size: width/height of thumbnail (pixels)
+    :return: sharpness (float), thumbnail (grayscale array)
+    """
+
+    # var
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape
+
+    # same scale for every video, so scores are comparable
+    if width > sharpness_width:
+        gray = cv2.resize(gray, (sharpness_width, int(height * sharpness_width / width)), interpolation=cv2.INTER_AREA)
+
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    thumbnail = cv2.resize(gray, (thumbnail_size, thumbnail_size), interpolation=cv2.INTER_AREA)
+
+    return sharpness, thumbnail
+
+def get_difference(thumbnail_a, thumbnail_b):
+    """
+    Gets how different two frames look, from their thumbnails
+
+    :param thumbnail_a: thumbnail from score_frame
+    :param thumbnail_b: thumbnail from score_frame
+    :return: mean difference of pixels (0 to 1)
+    """
+
+    return cv2.absdiff(thumbnail_a, thumbnail_b).mean() / 255
+
+def get_gps_exif(position):
+    """
+    Gets an EXIF APP1 segment with the GPS position (and date) of a frame
+
+    :param position: position (dictionary with latitude, longitude, altitude and date)
+    :return: APP1 segment including its marker (bytes)
+    """
+
+    def to_dms(value):
+        value = abs(value)
+        degrees, minutes = int(value), int(value * 60 % 60)
+        return (degrees, minutes, round(value * 3600 % 60, 4))
+
+    # var
+    exif = Image.Exif()
+    gps = exif.get_ifd(0x8825) # GPSInfo
+
+    gps[1] = 'N' if position['latitude'] >= 0 else 'S' # GPSLatitudeRef
+    gps[2] = to_dms(position['latitude']) # GPSLatitude
+    gps[3] = 'E' if position['longitude'] >= 0 else 'W' # GPSLongitudeRef
+    gps[4] = to_dms(position['longitude']) # GPSLongitude
+    gps[5] = 0 if position['altitude'] >= 0 else 1 # GPSAltitudeRef, above sea level
+    gps[6] = round(abs(position['altitude']), 3) # GPSAltitude
+
+    if position['date']:
+        exif[0x0132] = position['date'] # DateTime
+        exif.get_ifd(0x8769)[0x9003] = position['date'] # DateTimeOriginal
+
+    data = exif.tobytes()
+
+    return b"\xFF\xE1" + (len(data) + 2).to_bytes(2, 'big') + data
+
+def write_frame(frame, frame_path, position, quality):
+    """
+    Writes a frame as a JPEG, geotagged if its position is known. Runs in a worker thread
+
+    :param frame: decoded frame (BGR array)
+    :param frame_path: path of image
+    :param position: position of frame (dictionary), or None
+    :param quality: JPEG quality (1-100)
+    :return: N/A
+    """
+
+    # encode, OpenCV releases the GIL
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    data = encoded.tobytes()
+
+    # geotag
+    if position is not None and position['latitude'] is not None:
+        data = WebODM_preprocess.insert_app_segments(data, [get_gps_exif(position)])
+
+    with open(frame_path, 'wb') as file:
+        file.write(data)
+
+def get_frames_dir(video_path, cache_dir, interval, distance, candidates, min_sharpness, min_difference, quality):
+    """
+    Gets the directory keyframes of a video are extracted to, one per video version and settings
+
+    :param video_path: path to video
+    :param cache_dir: scratch directory for extracted keyframes
+    :return: directory (str)
+    """
+
+    # var
+    stat = os.stat(video_path)
+    settings = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime}:{interval}:{distance}:{candidates}:{min_sharpness}:{min_difference}:{quality}"
+
+    return os.path.join(cache_dir, "frames", hashlib.sha1(settings.encode("utf-8")).hexdigest()[:16])
+
+def extract_keyframes(video_path, srt_path=None, interval=1.0, distance=None, candidates=3, min_sharpness=0.5,
+                      min_difference=0.03, quality=95, cache_dir=default_cache_dir, threads=None):
+    """
+    Decodes a video and keeps one frame per sample time. Around each sample time the sharpest of a few
+    candidate frames is kept, then blurry frames (less sharp than min_sharpness times the median) and
+    frames that look almost the same as the previous kept frame are dropped. Scoring and encoding run
+    in a thread pool while the video is decoded. Keyframes are geotagged from the SRT file, and reused
+    by later runs with the same video and settings
+
+    :param video_path: path to video
+    :param srt_path: path to SRT telemetry file, or None
+    :param interval: seconds between frames
+    :param distance: meters flown between frames, used instead of interval if the SRT file has positions
+    :param candidates: number of frames (0.1 s apart) compared around each sample time
+    :param min_sharpness: fraction of the median sharpness below which a frame is considered blurry
+    :param min_difference: mean pixel difference to the previous frame below which a frame is a duplicate (0 to 1)
+    :param quality: JPEG quality (1-100)
+    :param cache_dir: scratch directory for extracted keyframes
+    :param threads: number of worker threads, defaults to the number of CPUs
+    :return: paths of keyframes (list)
+    """
+
+    if not is_available():
+        raise ImportError("OpenCV and Pillow are required to extract keyframes (pip install opencv-python-headless Pillow)")
+
+    # reuse keyframes of an earlier run
+    frames_dir = get_frames_dir(video_path, cache_dir, interval, distance, candidates, min_sharpness, min_difference, quality)
+    manifest_path = os.path.join(frames_dir, "frames.json")
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, 'r') as file:
+            return [os.path.join(frames_dir, f) for f in json.load(file)]
+
+    # var
+    positions = parse_srt(srt_path) if srt_path else list()
+    capture = cv2.VideoCapture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30
+    frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    os.makedirs(frames_dir, exist_ok=True)
+
+    # frames to decode, grouped by sample time, candidates stop where the next sample time starts
+    step = max(1, round(fps / 10))
+    firsts = sorted(set(int(t * fps) for t in get_sample_times(frame_count / fps, interval, distance, positions)))
+    slots = dict() # frame index: slot
+    for slot, (first, end) in enumerate(zip(firsts, firsts[1:] + [frame_count])):
+        for index in range(first, min(first + candidates * step, end), step):
+            slots[index] = slot
+
+    # decode sequentially, score in parallel
+    scores = dict() # frame index: future
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        writes = list()
+        slot_frames = dict() # slot: [(frame index, frame)]
+        last_index = max(slots) if slots else -1
+
+        def write_best(slot):
+            # keep the sharpest candidate of a slot
+            best_index, best_frame = max(slot_frames.pop(slot), key=lambda f: scores[f[0]].result()[0])
+            frame_path = os.path.join(frames_dir, f"{name}_{best_index:06d}.jpg")
+            writes.append((best_index, frame_path,
+                           executor.submit(write_frame, best_frame, frame_path, get_position(positions, best_index / fps), quality)))
+
+        for index in range(last_index + 1):
+            if index not in slots:
+                if not capture.grab(): # decode without converting the frame
+                    break
+                continue
+
+            ok, frame = capture.read()
+            if not ok:
+                break
+
+            scores[index] = executor.submit(score_frame, frame)
+            slot_frames.setdefault(slots[index], list()).append((index, frame))
+
+            # slot complete once the next slot starts, only a few frames are held in memory
+            for slot in [s for s in slot_frames if s < slots[index]]:
+                write_best(slot)
+
+        for slot in list(slot_frames):
+            write_best(slot)
+
+        for index, frame_path, future in writes:
+            future.result()
+
+    capture.release()
+
+    # drop blurry and near duplicate frames
+    median = sorted(scores[i].result()[0] for i, p, f in writes)[len(writes) // 2] if writes else 0
+    kept = list()
+    previous = None
+    for index, frame_path, future in writes:
+        sharpness, thumbnail = scores[index].result()
+        if sharpness < min_sharpness * median or (previous is not None and get_difference(thumbnail, previous) < min_difference):
+            os.remove(frame_path)
+            continue
+        kept.append(os.path.basename(frame_path))
+        previous = thumbnail
+
+    with open(manifest_path, 'w') as file:
+        json.dump(kept, file)
+
+    return [os.path.join(frames_dir, f) for f in kept]
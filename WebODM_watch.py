@@ -0,0 +1,223 @@
+"""
+WebODM_watch.py: Watch many tasks at once from a single process, downloading each as soon as it completes
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import argparse, asyncio, sys # standard libraries
+import requests
+import status_codes
+import WebODM_download
+import WebODM_common
+import WebODM_monitor
+
+# functions
+
+def create_parser():
+    """
+    Creates Parser and adds required arguments to it
+
+    :param: N/A
+    :return: ArgumentParser object
+    """
+
+    parser = argparse.ArgumentParser()
+
+    # Tasks to watch
+    parser.add_argument("tasks", help="Tasks to watch, given as <project_id>:<task_id>", nargs="+")
+
+    # Output directory (default is root directory)
+    parser.add_argument("-od", "--output_dir", help="Directory path to folder where output files will be placed", type=str)
+
+    # Asset to Download (default is all.zip)
+    parser.add_argument("-a", "--asset", help="What asset should be downloaded", type=str, default="all.zip")
+
+    # Do not download
+    parser.add_argument("-nd", "--no_download", help="Only watch the tasks, do not download assets", action="store_true", default=False)
+
+    # Concurrent requests
+    parser.add_argument("-mr", "--max_requests", help="Maximum number of requests sent at the same time", type=int, default=16)
+
+    # Concurrent downloads
+    parser.add_argument("-md", "--max_downloads", help="Maximum number of assets downloaded at the same time", type=int, default=4)
+
+    return parser
+
+def parse_task(task):
+    """
+    Parses a task given as <project_id>:<task_id>
+
+    :param task: task (str)
+    :return: project ID (int), task ID (str)
+    """
+
+    project_id, separator, task_id = task.partition(":")
+
+    if not separator or not project_id.isdigit() or not task_id:
+        WebODM_common.print_error(f"Invalid task {task}, must be given as <project_id>:<task_id>")
+
+    return int(project_id), task_id
+
+def print_transition(project_id, task_id, task, previous_status):
+    """
+    Prints a status transition of a task to the console
+
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param task: task (dictionary returned by the API)
+    :param previous_status: status before the transition, None on the first tick
+    :return: N/A
+    """
+
+    # var
+    previous_name = status_codes.names.get(previous_status, "NEW")
+    name = status_codes.names.get(task['status'], str(task['status']))
+    elapsed_time = WebODM_monitor.format_processing_time(task['processing_time'])
+
+    print(f"[{project_id}:{task_id}] {previous_name} -> {name} ({elapsed_time})")
+
+def download_task(client, project_id, task_id, available_assets, output_dir, asset):
+    """
+    Downloads an asset of a completed task into a directory named after the project and task ID
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param available_assets: all assets available to download (list)
+    :param output_dir: directory of where the file should be downloaded
+    :param asset: what to download (ex. orthophoto.tif)
+    :return: paths of downloaded assets
+    """
+
+    # var
+    asset = WebODM_common.validate_asset(available_assets, asset)
+    asset_dir = WebODM_common.get_asset_dir(f"{project_id}_{task_id}", output_dir)
+
+    # errors are raised, so a failed download only stops its own task
+    asset_paths = WebODM_download.download_assets(client, project_id, task_id, [asset], asset_dir)
+    for asset_path in asset_paths:
+        print(f"[{project_id}:{task_id}] Saved ./{asset_path}")
+
+    return asset_paths
+
+async def watch_task(client, project_id, task_id, request_limit, download_limit, on_transition=print_transition,
+                     download=True, output_dir=None, asset="all.zip", min_interval=2.0, max_interval=60.0, wake=None, on_tick=None):
+    """
+    Watches one task until it reaches a final status, then downloads it if completed
+
+    Requests are sent from worker threads through the client's connection pool, so the event
+    loop is never blocked and only request_limit requests are in flight at any time.
+
+    :param client: authenticated client (WebODMClient)
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param request_limit: semaphore shared by all watched tasks, limiting requests in flight
+    :param download_limit: semaphore shared by all watched tasks, limiting downloads in progress
+    :param on_transition: function called with project ID, task ID, task and previous status on every status change
+    :param download: download the asset once the task completes (bool)
+    :param output_dir: directory of where the file should be downloaded
+    :param asset: what to download (ex. orthophoto.tif)
+    :param min_interval: shortest time between ticks (seconds)
+    :param max_interval: longest time between ticks (seconds)
+    :param wake: coroutine function called with the interval between ticks, which may return early (ex. when a webhook arrives)
+    :param on_tick: function called with the task after every tick (ex. to record its progress), or None
+    :return: final task
+    """
+
+    # the monitor keeps the status and backoff state, ticks are driven from here
+    monitor = WebODM_monitor.TaskMonitor(client, project_id, task_id, on_progress=None,
+                                         on_status=lambda task, previous: on_transition(project_id, task_id, task, previous),
+                                         min_interval=min_interval, max_interval=max_interval)
+
+    while True:
+        # get task, a temporary failure is retried with backoff, anything else (ex. a task that does not exist) is raised
+        try:
+            async with request_limit:
+                task = await asyncio.to_thread(monitor.get_task)
+        except (requests.RequestException, ValueError) as e:
+            delay = monitor.retry_delay(e)
+            print(f"[{project_id}:{task_id}] Request failed ({e}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        monitor.update(task)
+        if on_tick is not None:
+            on_tick(task)
+
+        if task['status'] in WebODM_monitor.terminal_statuses:
+            break
+
+        await (wake or asyncio.sleep)(monitor.next_interval(task))
+
+    # download as soon as the task completes, a failed download is raised
+    if download and task['status'] == status_codes.COMPLETED:
+        async with download_limit:
+            await asyncio.to_thread(download_task, client, project_id, task_id, task['available_assets'], output_dir, asset)
+
+    return task
+
+async def watch_tasks(client, tasks, max_requests=16, max_downloads=4, **kwargs):
+    """
+    Watches any number of tasks concurrently
+
+    :param client: authenticated client (WebODMClient)
+    :param tasks: tasks to watch (list of (project ID, task ID) tuples)
+    :param max_requests: maximum number of requests sent at the same time
+    :param max_downloads: maximum number of assets downloaded at the same time
+    :param kwargs: arguments passed to watch_task
+    :return: final status and error of each task (dictionary of (project ID, task ID): {'status', 'error'})
+    """
+
+    # var
+    request_limit = asyncio.Semaphore(max_requests)
+    download_limit = asyncio.Semaphore(max_downloads)
+    results = {task: {'status': None, 'error': None} for task in tasks}
+    on_tick = kwargs.pop('on_tick', None)
+
+    async def watch_one(project_id, task_id):
+        # an error only stops its own task, the status reached before it is kept
+        result = results[(project_id, task_id)]
+
+        def record(task):
+            result['status'] = task['status']
+            if on_tick is not None:
+                on_tick(task)
+
+        try:
+            await watch_task(client, project_id, task_id, request_limit, download_limit, on_tick=record, **kwargs)
+        except (requests.RequestException, WebODM_download.DownloadError, OSError, ValueError) as e:
+            result['error'] = str(e)
+            print(f"[{project_id}:{task_id}] Failed ({e})")
+
+    # watch all tasks
+    await asyncio.gather(*[watch_one(project_id, task_id) for project_id, task_id in tasks])
+
+    return results
+
+# main
+if __name__ == "__main__":
+
+    # init parser
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # get tasks
+    tasks = [parse_task(t) for t in args.tasks]
+
+    # authorize
+    client = WebODM_common.post_authentication(WebODM_common.username, WebODM_common.password)
+
+    # watch all tasks
+    results = asyncio.run(watch_tasks(client, tasks, max_requests=args.max_requests, max_downloads=args.max_downloads,
+                                       download=not args.no_download, output_dir=args.output_dir, asset=args.asset))
+
+    # print summary
+    print("\nSummary:")
+    for (project_id, task_id), result in results.items():
+        error = f" ({result['error']})" if result['error'] else ""
+        print(f"\t* {project_id}:{task_id} {status_codes.names.get(result['status'], 'UNKNOWN')}{error}")
+
+    # exit with an error unless every task completed and was downloaded
+    sys.exit(0 if all(r['status'] == status_codes.COMPLETED and not r['error'] for r in results.values()) else 1)
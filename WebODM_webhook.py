@@ -0,0 +1,230 @@
+"""
+WebODM_webhook.py: Local callback listener that wakes task watchers when the server reports a task as finished
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import json, socket, secrets, asyncio, threading, http.server # standard libraries
+
+# global variables
+
+fallback_interval = 60.0 # seconds between polls while waiting for a callback, in case it never comes
+
+# classes
+
+class WebhookHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Accepts POST /<key> from NodeODM (or a WebODM server that calls back), with the task as JSON body
+    """
+
+    def do_POST(self):
+        # var
+        key = self.path.strip("/").split("?")[0]
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        try:
+            payload = json.loads(body) if body else dict()
+        except ValueError: # the callback is only a wake-up, the task is fetched again anyway
+            payload = dict()
+
+        found = self.server.listener.notify(key, payload)
+
+        self.send_response(200 if found else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass # callbacks are not printed
+
+class WebhookListener:
+    """
+    Small HTTP server, running in one background thread, that receives task callbacks. Each task gets a
+    URL with a random key when it is created, and its watcher waits for a callback on that key instead of
+    polling. Waiting costs nothing, so any number of tasks can be watched by one listener
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, public_host=None):
+        """
+        :param host: address to listen on (ex. 0.0.0.0 to accept callbacks from other machines)
+        :param port: port to listen on, 0 for any free port
+        :param public_host: address the server reaches this machine at (ex. host.docker.internal), defaults to host
+        """
+
+        # var
+        self.server = http.server.ThreadingHTTPServer((host, port), WebhookHandler)
+        self.server.daemon_threads = True
+        self.server.listener = self
+        self.lock = threading.Lock()
+        self.hooks = dict() # key: {'event', 'payload', 'waiters': list of (loop, asyncio.Event)}
+        self.thread = None
+
+        # address the callbacks are sent to
+        if public_host is None:
+            public_host = socket.gethostname() if host in ("0.0.0.0", "") else host
+        self.base_url = f"http://{public_host}:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """
+        Starts listening in a background thread
+
+        :param: N/A
+        :return: self
+        """
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stops listening
+
+        :param: N/A
+        :return: N/A
+        """
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def register(self):
+        """
+        Creates a callback URL for one task
+
+        :param: N/A
+        :return: key (str), URL (str)
+        """
+
+        # var
+        key = secrets.token_urlsafe(12)
+
+        with self.lock:
+            self.hooks[key] = {'event': threading.Event(), 'payload': None, 'waiters': list()}
+
+        return key, f"{self.base_url}/{key}"
+
+    def release(self, key):
+        """
+        Forgets a callback URL, later callbacks to it are refused
+
+        :param key: key from register
+        :return: N/A
+        """
+
+        with self.lock:
+            self.hooks.pop(key, None)
+
+    def notify(self, key, payload):
+        """
+        Records a callback and wakes everything waiting for it. Called from the listener thread
+
+        :param key: key from the callback URL
+        :param payload: body of the callback (dictionary)
+        :return: True if the key is registered, False otherwise
+        """
+
+        with self.lock:
+            hook = self.hooks.get(key)
+            if hook is None:
+                return False
+            hook['payload'] = payload
+            waiters, hook['waiters'] = hook['waiters'], list()
+
+        hook['event'].set()
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+        return True
+
+    def wait(self, key, timeout):
+        """
+        Waits until a callback arrives or the timeout passes. A callback is only reported once
+
+        :param key: key from register
+        :param timeout: longest time to wait (seconds)
+        :return: body of the callback (dictionary), None if the timeout passed
+        """
+
+        # var
+        hook = self.hooks[key]
+
+        if not hook['event'].wait(timeout):
+            return None
+
+        with self.lock:
+            hook['event'].clear()
+            payload, hook['payload'] = hook['payload'], None
+
+        return payload
+
+    async def wait_async(self, key, timeout):
+        """
+        Waits, without holding a thread, until a callback arrives or the timeout passes
+
+        :param key: key from register
+        :param timeout: longest time to wait (seconds)
+        :return: body of the callback (dictionary), None if the timeout passed
+        """
+
+        # var
+        hook = self.hooks[key]
+        event = asyncio.Event()
+
+        with self.lock:
+            if not hook['event'].is_set():
+                hook['waiters'].append((asyncio.get_running_loop(), event))
+            else:
+                event.set()
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            with self.lock:
+                if (asyncio.get_running_loop(), event) in hook['waiters']:
+                    hook['waiters'].remove((asyncio.get_running_loop(), event))
+            return None
+
+        with self.lock:
+            hook['event'].clear()
+            payload, hook['payload'] = hook['payload'], None
+
+        return payload
+
+# functions
+
+def parse_address(address):
+    """
+    Parses the address callbacks are sent to, given as <host>[:<port>]
+
+    :param address: address (str)
+    :return: host (str), port (int, 0 for any free port)
+    """
+
+    host, separator, port = address.rpartition(":")
+
+    if not separator or not port.isdigit():
+        return address, 0
+
+    return host, int(port)
+
+def start_listener(address):
+    """
+    Starts a listener that the server sends callbacks to at the given address, listening on every interface
+
+    :param address: address the server reaches this machine at, given as <host>[:<port>] (ex. host.docker.internal:8765)
+    :return: started WebhookListener
+    """
+
+    # var
+    host, port = parse_address(address)
+    listen_host = "127.0.0.1" if host in ("127.0.0.1", "localhost") else "0.0.0.0"
+
+    return WebhookListener(listen_host, port, public_host=host).start()
@@ -2,4 +2,13 @@ QUEUED = 10
 RUNNING = 20
 FAILED = 30
 COMPLETED = 40
-CANCELED = 50
\ No newline at end of file
+CANCELED = 50
+
+# names of the status codes
+names = {
+    QUEUED: 'QUEUED',
+    RUNNING: 'RUNNING',
+    FAILED: 'FAILED',
+    COMPLETED: 'COMPLETED',
+    CANCELED: 'CANCELED'
+}
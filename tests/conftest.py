@@ -0,0 +1,54 @@
+"""
+conftest.py: Fixtures shared by the tests, each test gets its own stand-in server (see WebODM_fake_server.py)
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, sys # standard libraries
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # the scripts are not a package
+
+import WebODM_client
+import WebODM_fake_server
+
+# fixtures
+
+@pytest.fixture
+def fake():
+    """
+    Stand-in server with short tasks and small assets
+
+    :param: N/A
+    :return: FakeServer, stopped after the test
+    """
+
+    with WebODM_fake_server.FakeServer(base_duration=0.5, seconds_per_image=0, asset_size=1.0, seed=0) as fake:
+        yield fake
+
+@pytest.fixture
+def client(fake):
+    """
+    Client logged in to the stand-in server, without a token file
+
+    :param fake: stand-in server
+    :return: WebODMClient
+    """
+
+    return WebODM_client.WebODMClient("user", "password", fake.base_url, token_path=None)
+
+@pytest.fixture
+def project_id(client):
+    """
+    Project on the stand-in server
+
+    :param client: client logged in to the stand-in server
+    :return: ID of project
+    """
+
+    res = client.post('/api/projects/', data={'name': "test"})
+    res.raise_for_status()
+
+    return res.json()['id']
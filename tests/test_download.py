@@ -0,0 +1,44 @@
+"""
+test_download.py: Resuming an interrupted download with Range requests in WebODM_download
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, time # standard libraries
+import status_codes
+import WebODM_download
+
+# tests
+
+def test_download_resumes_with_range(fake, client, project_id, tmp_path):
+    """
+    Only the bytes missing from the partial file are requested, and the result is the whole asset
+    """
+
+    # var
+    task = fake.create_task(project_id)
+    url = "/api/projects/{}/tasks/{}/download/orthophoto.tif".format(project_id, task['id'])
+    asset_path = str(tmp_path / "orthophoto.tif")
+
+    while task['status'] != status_codes.COMPLETED:
+        time.sleep(0.1)
+
+    # partial file of a download stopped halfway through its only segment
+    info = WebODM_download.get_asset_info(client, url)
+    segments = WebODM_download.get_segments(info['size'], 4)
+    done = info['size'] // 2
+    segments[0][2] = done
+    with open(f"{asset_path}.part", 'wb') as file:
+        file.write(fake.asset[:done])
+        file.truncate(info['size'])
+    WebODM_download.save_download_state(f"{asset_path}.part.json", {'size': info['size'], 'validator': info['validator'], 'segments': segments})
+    bytes_sent = fake.stats['GET get_download']['bytes_out']
+
+    WebODM_download.download_asset(client, url, asset_path, progress=None)
+
+    with open(asset_path, 'rb') as file:
+        assert file.read() == fake.asset
+    assert fake.stats['GET get_download']['bytes_out'] - bytes_sent <= info['size'] - done + 1 # plus the probe's first byte
+    assert not os.path.exists(f"{asset_path}.part") and not os.path.exists(f"{asset_path}.part.json")
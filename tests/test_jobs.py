@@ -0,0 +1,32 @@
+"""
+test_jobs.py: Reattaching to a job left behind by a stopped process with WebODM_jobs
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os, asyncio # standard libraries
+import WebODM_jobs
+
+# tests
+
+def test_reattach_saves_job(fake, client, project_id, tmp_path):
+    """
+    A job whose process stopped while its task was processing is watched to the end and its assets saved
+    """
+
+    # var
+    store = WebODM_jobs.JobStore(str(tmp_path / "jobs.sqlite"))
+    task = fake.create_task(project_id)
+    job_id = store.create_job("test", project_id, "processing", str(tmp_path), ["orthophoto.tif"], task_id=task['id'])
+    store.update(job_id, owner_pid=None) # as if the process that created it had stopped
+
+    try:
+        stages = asyncio.run(WebODM_jobs.reattach_jobs(client, store))
+
+        assert stages == {job_id: "done"}
+        assert store.get_job(job_id)['stage'] == "done"
+        assert os.path.getsize(tmp_path / "test" / "orthophoto.tif") == len(fake.asset)
+    finally:
+        store.close()
@@ -0,0 +1,53 @@
+"""
+test_upload.py: Resuming an interrupted parallel upload with WebODM_upload
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import os # standard libraries
+import pytest
+import requests
+import WebODM_upload
+
+# tests
+
+def test_upload_resumes(fake, client, project_id, tmp_path, monkeypatch):
+    """
+    Files confirmed before an interruption are not sent again
+    """
+
+    # var
+    paths = [str(tmp_path / f"image_{i:02}.jpg") for i in range(12)]
+    files = [('images', path, 'image/jpeg') for path in paths]
+    state_path = str(tmp_path / "upload.json")
+    task_id = WebODM_upload.post_partial_task(client, project_id, "[]")
+    state = {'project_id': project_id, 'task_id': task_id, 'uploaded': list()}
+    batches = list()
+
+    for path in paths:
+        with open(path, 'wb') as file:
+            file.write(os.urandom(1000))
+
+    # the server fails every upload after the second batch
+    def on_batch(*args):
+        batches.append(args)
+        if len(batches) == 2:
+            fake.error_paths, fake.error_rate = ['upload'], 1.0
+
+    monkeypatch.setattr(WebODM_upload, "print_upload_progress", on_batch)
+    with pytest.raises(requests.HTTPError):
+        WebODM_upload.upload_task_files(client, project_id, task_id, files, state_path, state, batch_size=4, threads=1, retries=0)
+
+    assert WebODM_upload.get_upload_state(state_path)['uploaded'] == paths[:8]
+
+    # run again once the server is back
+    fake.error_rate = 0.0
+    requests_sent = fake.stats['POST post_upload']['requests']
+
+    state = WebODM_upload.get_upload_state(state_path)
+    WebODM_upload.upload_task_files(client, project_id, task_id, files, state_path, state, batch_size=4, threads=1)
+
+    assert fake.stats['POST post_upload']['requests'] == requests_sent + 1
+    assert sorted(fake.tasks[task_id]['images']) == [os.path.basename(path) for path in paths]
@@ -0,0 +1,31 @@
+"""
+test_variants.py: Restarting a task with other options with WebODM_variants, as WebODM picks restarts up later
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import time # standard libraries
+import status_codes
+import WebODM_variants
+
+# tests
+
+def test_update_task_waits_for_restart(fake, client, project_id):
+    """
+    The restarted task is returned once the restart is picked up, not with the status of its previous run
+    """
+
+    # var
+    task = fake.create_task(project_id)
+
+    while task['status'] != status_codes.COMPLETED:
+        time.sleep(0.1)
+    fake.base_duration = 10 # the restarted run is still going when the restart is noticed
+
+    restarted = WebODM_variants.update_task(client, project_id, task['id'], "variant", '[{"name": "fast-orthophoto", "value": true}]')
+
+    assert restarted['pending_action'] is None
+    assert restarted['status'] in (status_codes.QUEUED, status_codes.RUNNING)
+    assert restarted['name'] == "variant"
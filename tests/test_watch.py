@@ -0,0 +1,85 @@
+"""
+test_watch.py: Watching tasks with WebODM_watch, woken by the webhook listener or polling
+
+Author: Jonas
+Last Updated: 2026-10-18
+"""
+
+# imports
+import time, asyncio # standard libraries
+import pytest
+import requests
+import status_codes
+import WebODM_monitor
+import WebODM_watch
+import WebODM_webhook
+
+# functions
+
+def watch(client, project_id, task_id, **kwargs):
+    """
+    Watches one task without downloading it
+
+    :param client: client logged in to the stand-in server
+    :param project_id: ID of project
+    :param task_id: ID of task
+    :param kwargs: arguments passed to watch_task
+    :return: final task, seconds it took
+    """
+
+    async def run():
+        return await WebODM_watch.watch_task(client, project_id, task_id, asyncio.Semaphore(4), asyncio.Semaphore(1),
+                                             on_transition=lambda *args: None, download=False, **kwargs)
+
+    start = time.time()
+    task = asyncio.run(run())
+
+    return task, time.time() - start
+
+# tests
+
+def test_listener_wakes_watch(fake, client, project_id):
+    """
+    A callback ends the wait between ticks, long before the next poll is due
+    """
+
+    with WebODM_webhook.WebhookListener() as listener:
+        key, url = listener.register()
+        task = fake.create_task(project_id, webhook=url)
+
+        task, elapsed = watch(client, project_id, task['id'], min_interval=30, max_interval=30,
+                              wake=lambda interval: listener.wait_async(key, interval))
+
+    assert task['status'] == status_codes.COMPLETED
+    assert elapsed < 10
+
+def test_watch_falls_back_to_polling(fake, client, project_id):
+    """
+    A task that never calls back is still noticed by the regular poll
+    """
+
+    with WebODM_webhook.WebhookListener() as listener:
+        key, url = listener.register()
+        task = fake.create_task(project_id) # no webhook, as on stock WebODM
+
+        task, elapsed = watch(client, project_id, task['id'], min_interval=0.2, max_interval=1,
+                              wake=lambda interval: listener.wait_async(key, interval))
+
+    assert task['status'] == status_codes.COMPLETED
+    assert listener.wait(key, 0) is None
+
+def test_watch_stops_on_missing_task(client, project_id):
+    """
+    A task that does not exist is not retried forever
+    """
+
+    with pytest.raises(requests.HTTPError):
+        watch(client, project_id, "missing")
+
+def test_monitor_stops_on_missing_task(client, project_id):
+    """
+    TaskMonitor, which WebODM_main.py and WebODM_jobs.py watch with, raises on a 404 instead of polling forever
+    """
+
+    with pytest.raises(requests.HTTPError):
+        WebODM_monitor.TaskMonitor(client, project_id, "missing", on_progress=None, min_interval=0.1, max_interval=1).run()